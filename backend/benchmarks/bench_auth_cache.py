@@ -0,0 +1,76 @@
+# Run from backend/: FIRESTORE_EMULATOR_HOST=localhost:8080 python -m benchmarks.bench_auth_cache
+# Per-request auth overhead of the get_current_uid dependency with the token
+# cache off and on. Tokens are RS256 JWTs signed with a local key and checked
+# with the same google-auth RSA verification firebase_admin uses; only the
+# certificate download is replaced by the local public key.
+import asyncio
+import statistics
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from google.auth import crypt, jwt
+from starlette.requests import Request
+
+import firebase_config
+from firebase_config import auth, get_current_uid
+
+REQUESTS = 5000
+USERS = 50
+PROJECT_ID = "demo-recruitpro"
+
+
+def signing_material():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public_pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return crypt.RSASigner.from_string(private_pem, key_id="bench"), public_pem
+
+
+def id_token(signer, uid: str) -> str:
+    now = int(time.time())
+    claims = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}", "aud": PROJECT_ID,
+        "sub": uid, "uid": uid, "iat": now, "exp": now + 3600, "auth_time": now,
+    }
+    return jwt.encode(signer, claims).decode()
+
+
+def request_for(token: str) -> Request:
+    return Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+
+async def run(label: str, cache_size: int, requests: list):
+    firebase_config.AUTH_TOKEN_CACHE_SIZE = cache_size
+    firebase_config._token_cache.clear()
+    timings = []
+    for request in requests:
+        started = time.perf_counter()
+        await get_current_uid(request)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(
+        f"{label:<10} mean={statistics.mean(timings) * 1e6:8.1f}us  p50={timings[len(timings) // 2] * 1e6:8.1f}us  "
+        f"p99={timings[int(len(timings) * 0.99)] * 1e6:8.1f}us  total={sum(timings):6.2f}s"
+    )
+
+
+async def main():
+    signer, public_pem = signing_material()
+    auth.verify_id_token = lambda token, check_revoked=False: jwt.decode(
+        token, certs={"bench": public_pem}, audience=PROJECT_ID
+    )
+    tokens = [id_token(signer, f"user-{i}") for i in range(USERS)]
+    # The UI polls: each user's token shows up over and over
+    requests = [request_for(tokens[i % USERS]) for i in range(REQUESTS)]
+    print(f"{REQUESTS} requests from {USERS} users")
+    await run("cache off", 0, requests)
+    await run("cache on", 4096, requests)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
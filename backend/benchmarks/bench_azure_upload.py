@@ -0,0 +1,58 @@
+# Needs Azurite:
+#   azurite-blob --blobPort 10000
+#   AZURE_STORAGE_CONNECTION_STRING="UseDevelopmentStorage=true" AZURE_CONTAINER_NAME=bench \
+#       python -m benchmarks.bench_azure_upload
+#
+# Measures what an upload endpoint does with the spooled file before Gemini:
+# hash it, stream it to Azure, stream it to a parser process. Peak RSS is the
+# API process's own; the parser's copy of the document lives in its worker.
+# Not covered: the extracted text that comes back (small next to a PDF or
+# DOCX), and files with no text at all, like this random data or a scanned
+# PDF, which the endpoints still read whole for Gemini's inline bytes.
+import asyncio
+import os
+import resource
+import tempfile
+import time
+
+from starlette.datastructures import UploadFile
+
+from services.parsing_service import parse_document, shutdown_parser_pool
+from storage.azure import get_async_container_client, hash_upload, upload_stream_to_azure, close_async_client
+
+SIZES_MB = (8, 32, 128, 256)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def main():
+    container = get_async_container_client()
+    if not await container.exists():
+        await container.create_container()
+
+    # Start the parser process first, so its start-up is not in the first row
+    await parse_document(b"warm up", "warm.bin")
+    print(f"{'size MB':>8} {'seconds':>8} {'MB/s':>8} {'peak RSS MB':>12}")
+    for size_mb in SIZES_MB:
+        with tempfile.TemporaryFile() as f:
+            block = os.urandom(1024 * 1024)
+            for _ in range(size_mb):
+                f.write(block)
+            f.seek(0)
+            upload = UploadFile(f, filename=f"bench_{size_mb}.bin")
+            started = time.perf_counter()
+            await hash_upload(upload)
+            await upload_stream_to_azure("bench", "upload", upload.filename, upload, "application/octet-stream")
+            await parse_document(upload.file, upload.filename, "application/octet-stream")
+            elapsed = time.perf_counter() - started
+        # ru_maxrss is a high-water mark: it should stay roughly level as size grows
+        print(f"{size_mb:>8} {elapsed:>8.2f} {size_mb / elapsed:>8.1f} {peak_rss_mb():>12.1f}")
+
+    shutdown_parser_pool()
+    await close_async_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
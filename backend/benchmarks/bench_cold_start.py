@@ -0,0 +1,88 @@
+# Run from backend/: python -m benchmarks.bench_cold_start [--max-import-ms N] [--max-first-response-ms N]
+# Cold-start guard: `import main` time via python -X importtime, and time from
+# launching uvicorn to the first HTTP response. Exits 1 when a limit is exceeded.
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+RUNS = 3
+
+
+def import_profile() -> tuple:
+    # (cumulative microseconds for main, [(cumulative, module)] for the heaviest imports)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.append((int(cumulative), name.rstrip()))
+    main_us = next(us for us, name in modules if name.strip() == "main")
+    top_level = [(us, name.strip()) for us, name in modules if name.startswith("   ") and not name.startswith("    ")]
+    return main_us, sorted(top_level, reverse=True)[:8]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_response() -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, "INGEST_WORKERS": os.getenv("INGEST_WORKERS", "1")},
+    )
+    try:
+        while True:
+            try:
+                # Rejected before any client is touched: measures app startup only
+                httpx.get(f"http://127.0.0.1:{port}/api/jobs/cold-start", timeout=1)
+                return time.perf_counter() - started
+            except httpx.TransportError:
+                if server.poll() is not None:
+                    raise RuntimeError("uvicorn exited during startup")
+                time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-import-ms", type=float)
+    parser.add_argument("--max-first-response-ms", type=float)
+    args = parser.parse_args()
+
+    profiles = [import_profile() for _ in range(RUNS)]
+    import_ms = statistics.median(us for us, _ in profiles) / 1000
+    print(f"import main: {import_ms:.0f}ms (median of {RUNS})")
+    for us, name in profiles[-1][1]:
+        print(f"  {us / 1000:8.1f}ms  {name}")
+
+    first_response_ms = statistics.median(time_to_first_response() for _ in range(RUNS)) * 1000
+    print(f"uvicorn start to first response: {first_response_ms:.0f}ms (median of {RUNS})")
+
+    failed = False
+    if args.max_import_ms and import_ms > args.max_import_ms:
+        print(f"FAIL: import time above {args.max_import_ms:.0f}ms")
+        failed = True
+    if args.max_first_response_ms and first_response_ms > args.max_first_response_ms:
+        print(f"FAIL: time to first response above {args.max_first_response_ms:.0f}ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
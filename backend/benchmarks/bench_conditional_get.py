@@ -0,0 +1,89 @@
+# Run from backend/: python -m benchmarks.bench_conditional_get
+# One poll of a list endpoint (in-process ASGI, no network, no Firestore):
+# the previous FastAPI default encoder against orjson with br/gzip, and a
+# revalidation that ends in 304. Reports bytes on the wire and server CPU
+# per poll; Firestore reads are the same in every variant except 304, which
+# reads the version counter instead of the collection.
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+
+import httpx
+from fastapi import FastAPI, Request
+
+from benchmarks.corpus import make_candidate
+from services.responses import json_response, make_etag, not_modified
+
+PAGE_SIZES = (20, 200, 1000)
+POLLS = 200
+
+
+def make_page(count: int) -> dict:
+    rng = random.Random(count)
+    candidates = []
+    for i in range(count):
+        candidate = make_candidate(rng, i)
+        candidate.update(id=f"cand-{i}", uploaded_at=datetime(2025, 5, 1, 9, i % 60, tzinfo=timezone.utc))
+        candidates.append(candidate)
+    return {"status": "success", "uid": "bench-user", "candidates": candidates, "next_cursor": None}
+
+
+def build_app(page: dict) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/default")
+    async def default_encoder():
+        return page
+
+    @app.get("/fast")
+    async def fast(request: Request):
+        etag = make_etag("bench-user", "candidates", 7, None, None, None)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        return json_response(request, page, etag)
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, headers: dict) -> tuple:
+    response = await client.get(path, headers=headers)
+    # Bytes as sent: httpx decodes br/gzip, so take the raw stream length
+    wire = int(response.headers.get("content-length", len(response.content)))
+    for _ in range(10):  # warm up
+        await client.get(path, headers=headers)
+    started_cpu, started = time.process_time(), time.perf_counter()
+    for _ in range(POLLS):
+        await client.get(path, headers=headers)
+    cpu = (time.process_time() - started_cpu) / POLLS
+    wall = (time.perf_counter() - started) / POLLS
+    return response.status_code, wire, response.headers.get("etag"), cpu, wall
+
+
+async def run(count: int):
+    page = make_page(count)
+    transport = httpx.ASGITransport(app=build_app(page))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        _, _, etag, _, _ = await measure(client, "/fast", {"accept-encoding": "br"})
+        variants = [
+            ("default encoder", "/default", {"accept-encoding": "identity"}),
+            ("orjson", "/fast", {"accept-encoding": "identity"}),
+            ("orjson + gzip", "/fast", {"accept-encoding": "gzip"}),
+            ("orjson + br", "/fast", {"accept-encoding": "br, gzip"}),
+            ("revalidate (304)", "/fast", {"accept-encoding": "br, gzip", "if-none-match": etag}),
+        ]
+        print(f"{count} candidates")
+        for label, path, headers in variants:
+            status, wire, _, cpu, wall = await measure(client, path, headers)
+            print(f"  {label:<18} {status}  {wire / 1024:>8.1f} KiB on the wire  "
+                  f"{cpu * 1000:>7.2f} ms CPU/poll  {wall * 1000:>7.2f} ms wall/poll")
+
+
+async def main():
+    for count in PAGE_SIZES:
+        await run(count)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
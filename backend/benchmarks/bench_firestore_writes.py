@@ -0,0 +1,64 @@
+# Needs the Firestore emulator:
+#   firebase emulators:start --only firestore
+#   FIRESTORE_EMULATOR_HOST=localhost:8080 python -m benchmarks.bench_firestore_writes
+import os
+import time
+import uuid
+
+assert os.getenv("FIRESTORE_EMULATOR_HOST"), "Set FIRESTORE_EMULATOR_HOST to the emulator address"
+
+from firebase_config import db
+from storage.firestore import upsert_documents, _topscore_writes
+
+RESULTS = 1000
+
+
+def make_results(n):
+    return [
+        {
+            "candidate_id": str(uuid.uuid4()),
+            "name": f"Candidate {i}",
+            "email": f"candidate{i}@example.com",
+            "skills_score": i % 100,
+            "experience_score": (i * 7) % 100,
+            "education_score": (i * 3) % 100,
+            "certifications_score": (i * 5) % 100,
+            "total_score": (i * 11) % 100,
+            "skills_explanation": "x" * 200,
+        }
+        for i in range(n)
+    ]
+
+
+def legacy_save(uid, jd_id, candidate):
+    # Previous save_candidate_topscore_to_firestore: get, get, then set/update
+    jd_ref = db.collection("users").document(uid).collection("top_score").document(jd_id)
+    if not jd_ref.get().exists:
+        jd_ref.set({"jd_id": jd_id})
+    doc_ref = jd_ref.collection("candidates").document(candidate["candidate_id"])
+    if doc_ref.get().exists:
+        doc_ref.update({"total_score": candidate["total_score"]})
+    else:
+        doc_ref.set(candidate)
+
+
+def run(label, func):
+    uid, jd_id = f"bench-{uuid.uuid4()}", str(uuid.uuid4())
+    results = make_results(RESULTS)
+    started = time.perf_counter()
+    func(uid, jd_id, results)
+    elapsed = time.perf_counter() - started
+    print(f"{label:>28} {elapsed:>8.2f}s {RESULTS / elapsed:>10.0f} writes/s")
+
+
+def main():
+    run("legacy read-then-write", lambda uid, jd, rs: [legacy_save(uid, jd, r) for r in rs])
+    for batch_size, concurrency in ((100, 1), (400, 1), (100, 4), (400, 4)):
+        run(
+            f"batch={batch_size} concurrency={concurrency}",
+            lambda uid, jd, rs: upsert_documents(_topscore_writes(uid, jd, rs), batch_size, concurrency),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Run from backend/: python -m benchmarks.bench_jd_fanout
+# One new candidate scored against N matching JDs through a fake model with
+# fixed per-call latency. Compares the previous per-JD loop (one call, one
+# totals read and one commit per JD, strictly in sequence) with
+# score_candidate_against_jds plus one batched save. Firestore is not touched:
+# each commit is charged COMMIT_LATENCY.
+import asyncio
+import json
+import math
+import random
+import time
+from types import SimpleNamespace
+
+from benchmarks.corpus import make_candidate, make_jd
+from llmservices import gateway, score_cache
+from llmservices import topscore_gemini
+from llmservices.topscore_gemini import analyze_multiple_resumes_structured, score_candidate_against_jds
+from storage.firestore import WRITE_BATCH_SIZE
+
+CALL_LATENCY = 0.6
+LATENCY_PER_OUTPUT_TOKEN = 0.0005
+OUTPUT_TOKENS_PER_RESULT = 400
+COMMIT_LATENCY = 0.05
+JD_COUNTS = (1, 5, 10, 20, 40)
+
+
+class FakeScoringGemini:
+    def __init__(self):
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        candidates = json.loads(contents.split("Candidate Resumes:\n", 1)[1])
+        try:
+            await asyncio.sleep(CALL_LATENCY + len(candidates) * OUTPUT_TOKENS_PER_RESULT * LATENCY_PER_OUTPUT_TOKEN)
+        finally:
+            self.in_flight -= 1
+        parsed = [
+            {"candidate_id": c["candidate_id"], "skills_score": 80, "experience_score": 70,
+             "education_score": 60, "certifications_score": 50}
+            for c in candidates
+        ]
+        return SimpleNamespace(parsed=parsed, text=json.dumps(parsed), usage_metadata=None)
+
+
+async def commit(writes: int) -> int:
+    commits = math.ceil(writes / WRITE_BATCH_SIZE)
+    await asyncio.sleep(commits * COMMIT_LATENCY)
+    return commits
+
+
+async def per_jd_loop(jobs: list, candidate: dict) -> tuple:
+    scored, commits = 0, 0
+    for jd_id, jd_data in jobs:
+        results = [r for r in await analyze_multiple_resumes_structured(jd_data, [candidate]) if "error" not in r]
+        await asyncio.sleep(COMMIT_LATENCY)  # calculate_total_scores: weights read per JD
+        commits += await commit(1 + len(results))
+        scored += len(results)
+    return scored, commits
+
+
+async def fan_out(jobs: list, candidate: dict) -> tuple:
+    results = await score_candidate_against_jds(jobs, candidate)
+    scored = [r for r in results.values() if "error" not in r]
+    await asyncio.sleep(COMMIT_LATENCY)  # one calculate_total_scores for all JDs
+    return len(scored), await commit(2 * len(scored))
+
+
+async def run(label: str, jobs: list, candidate: dict, schedule):
+    backend = FakeScoringGemini()
+    gateway.set_backend(backend)
+    score_cache._cache.clear()
+    started = time.perf_counter()
+    scored, commits = await schedule(jobs, candidate)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<10} {len(jobs):>3} JDs  scored={scored:>3}  calls={backend.calls:>3}  "
+        f"peak in flight={backend.peak_in_flight:>2}  commits={commits:>3}  {elapsed:6.2f}s"
+    )
+    return elapsed
+
+
+async def main():
+    gateway.CONTEXT_CACHE_TTL_SECONDS = 0
+    rng = random.Random(7)
+    candidate = {**make_candidate(rng, 0), "candidate_id": "cand-0", "uid": "bench-user"}
+    print(f"fan-out concurrency {topscore_gemini.FANOUT_CONCURRENCY}, {CALL_LATENCY}s per call, "
+          f"{COMMIT_LATENCY}s per Firestore round trip")
+    for count in JD_COUNTS:
+        jobs = [(f"jd-{i}", make_jd(rng, i)) for i in range(count)]
+        before = await run("per JD", jobs, candidate, per_jd_loop)
+        after = await run("fan-out", jobs, candidate, fan_out)
+        print(f"{'':<10} speedup x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+# Run from backend/: python -m benchmarks.bench_metrics_overhead
+# Cost of the metrics layer: single recording calls, run_stage around a no-op,
+# and full HTTP requests through MetricsMiddleware (in-process ASGI, no network)
+# against the same app without it. Also times one /metrics render after the load.
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from services import metrics
+from services.pipeline import run_stage
+
+CALLS = 200_000
+STAGE_CALLS = 20_000
+REQUESTS = 3000
+USERS = 200
+
+
+def per_call(label: str, func, calls: int = CALLS):
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<34} {elapsed / calls * 1e9:>8.0f} ns/call")
+
+
+def recording_calls():
+    per_call("inc (no labels)", lambda: metrics.inc("firestore_reads", 1))
+    per_call("inc (model label)", lambda: metrics.inc("gemini_input_tokens", 1200, model="gemini-2.0-flash"))
+    per_call("observe (stage histogram)", lambda: metrics.observe("stage_seconds", 0.042, stage="azure", op="upload"))
+
+    def timed_block():
+        with metrics.timed("parse"):
+            pass
+    per_call("timed() context manager", timed_block)
+
+
+async def noop():
+    return None
+
+
+async def stage_overhead():
+    for enabled in (False, True):
+        metrics.METRICS_ENABLED = enabled
+        started = time.perf_counter()
+        for _ in range(STAGE_CALLS):
+            await run_stage("gemini", noop)
+        elapsed = time.perf_counter() - started
+        print(f"run_stage, metrics {'on ' if enabled else 'off'}{'':<15} {elapsed / STAGE_CALLS * 1e6:>8.2f} µs/call")
+
+
+def build_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/items/{item_id}")
+    async def item(item_id: str):
+        metrics.set_user(f"user-{int(item_id) % USERS}")
+        metrics.record_firestore(reads=3, writes=1)
+        return {"id": item_id}
+
+    if with_metrics:
+        app.add_middleware(metrics.MetricsMiddleware)
+    return app
+
+
+async def request_latencies(app: FastAPI) -> list:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(200):  # warm up
+            await client.get(f"/api/items/{i}")
+        timings = []
+        for i in range(REQUESTS):
+            started = time.perf_counter()
+            await client.get(f"/api/items/{i}")
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def request_overhead():
+    metrics.METRICS_ENABLED = True
+    results = {}
+    # Interleave rounds so drift in machine load hits both variants alike
+    for _ in range(3):
+        for with_metrics in (False, True):
+            results.setdefault(with_metrics, []).extend(await request_latencies(build_app(with_metrics)))
+    for with_metrics, timings in results.items():
+        timings.sort()
+        print(f"HTTP request, middleware {'on ' if with_metrics else 'off'}      "
+              f"p50 {statistics.median(timings) * 1e6:>6.0f} µs  p99 {timings[int(len(timings) * 0.99)] * 1e6:>6.0f} µs")
+    delta = statistics.median(results[True]) - statistics.median(results[False])
+    print(f"median overhead per request          {delta * 1e6:>6.1f} µs")
+
+
+def render_cost():
+    started = time.perf_counter()
+    body = metrics.render()
+    elapsed = time.perf_counter() - started
+    print(f"/metrics render: {len(body.splitlines())} lines, {len(body) / 1024:.0f} KiB in {elapsed * 1000:.1f} ms")
+
+
+def main():
+    recording_calls()
+    asyncio.run(stage_overhead())
+    asyncio.run(request_overhead())
+    render_cost()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Run from backend/: python -m benchmarks.bench_pdf_extraction [dir-of-pdfs]
+# Without a directory a synthetic corpus (text and image-only PDFs) is generated.
+import os
+import sys
+import time
+
+import fitz
+
+from services.parser import extract_text_from_pdf, is_usable_text_layer
+
+# Gemini bills each PDF page sent as bytes as an image (258 tokens), plus its own OCR text
+TOKENS_PER_RAW_PAGE = 258
+CHARS_PER_TOKEN = 4
+
+RESUME_TEXT = (
+    "Jane Doe | Senior Software Engineer | Bengaluru | jane@example.com | +91 98765 43210\n"
+    "Summary: Backend engineer with 7 years building Python and Go services on AWS.\n"
+    "Skills: Python, Go, FastAPI, PostgreSQL, Redis, Kafka, Docker, Kubernetes, Terraform\n"
+    "Experience: Acme Corp (2019-present) led migration of billing to event-driven microservices; "
+    "cut p95 latency 40%. Globex (2016-2019) built data pipelines processing 2TB/day.\n"
+    "Education: B.Tech Computer Science, IIT Madras, 2016\n"
+    "Certifications: AWS Certified Solutions Architect - Associate\n"
+)
+
+
+def synthetic_corpus():
+    corpus = []
+    for pages in (1, 2, 3):
+        doc = fitz.open()
+        for _ in range(pages):
+            doc.new_page().insert_textbox(fitz.Rect(40, 40, 560, 800), RESUME_TEXT * 4, fontsize=9)
+        text_pdf = doc.tobytes()
+        corpus.append((f"text_{pages}p.pdf", text_pdf))
+
+        # Rasterize the same pages to mimic a scanned resume
+        scanned = fitz.open()
+        for page in fitz.open(stream=text_pdf, filetype="pdf"):
+            pix = page.get_pixmap(dpi=100)
+            scanned.new_page(width=page.rect.width, height=page.rect.height).insert_image(page.rect, pixmap=pix)
+        corpus.append((f"scanned_{pages}p.pdf", scanned.tobytes()))
+    return corpus
+
+
+def load_corpus(directory):
+    return [
+        (name, open(os.path.join(directory, name), "rb").read())
+        for name in sorted(os.listdir(directory)) if name.lower().endswith(".pdf")
+    ]
+
+
+def main():
+    corpus = load_corpus(sys.argv[1]) if len(sys.argv) > 1 else synthetic_corpus()
+    print(f"{'file':<28} {'pages':>5} {'extract ms':>10} {'path':>6} {'raw tokens':>10} {'sent tokens':>11}")
+    raw_total = sent_total = 0
+    for name, data in corpus:
+        started = time.perf_counter()
+        text, pages = extract_text_from_pdf(data)
+        usable = is_usable_text_layer(text, pages)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        raw_tokens = pages * TOKENS_PER_RAW_PAGE + len(text) // CHARS_PER_TOKEN
+        sent_tokens = len(text) // CHARS_PER_TOKEN if usable else raw_tokens
+        raw_total += raw_tokens
+        sent_total += sent_tokens
+        print(f"{name:<28} {pages:>5} {elapsed_ms:>10.1f} {'text' if usable else 'bytes':>6} {raw_tokens:>10} {sent_tokens:>11}")
+    print(f"total input tokens: raw={raw_total} with text layer={sent_total} ({100 * (1 - sent_total / raw_total):.0f}% fewer)")
+
+
+if __name__ == "__main__":
+    main()
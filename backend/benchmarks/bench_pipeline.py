@@ -0,0 +1,54 @@
+# Run from backend/: PIPELINE_GEMINI_CONCURRENCY=16 python -m benchmarks.bench_pipeline
+import asyncio
+import time
+
+from services.pipeline import run_pipeline, run_stage, iter_pipeline
+
+FILES = 32
+AZURE_LATENCY = 0.05
+GEMINI_LATENCY = 0.4
+FIRESTORE_LATENCY = 0.02
+
+
+def fake_azure_upload(name):
+    time.sleep(AZURE_LATENCY)
+    return f"https://example.blob.core.windows.net/resumes/{name}"
+
+
+async def fake_gemini_extract(name):
+    await asyncio.sleep(GEMINI_LATENCY)
+    return {"name": name}
+
+
+def fake_firestore_set(doc):
+    time.sleep(FIRESTORE_LATENCY)
+
+
+async def process(name):
+    url = await run_stage("azure", fake_azure_upload, name)
+    doc = await run_stage("gemini", fake_gemini_extract, name)
+    doc["resume_url"] = url
+    await run_stage("firestore", fake_firestore_set, doc)
+    return doc
+
+
+async def main():
+    names = [f"resume_{i}.pdf" for i in range(FILES)]
+    print(f"{'max_in_flight':>14} {'seconds':>8} {'files/s':>8} {'first result (streamed)':>24}")
+    for limit in (1, 2, 4, 8, 16):
+        started = time.perf_counter()
+        results = await run_pipeline(names, process, max_in_flight=limit)
+        elapsed = time.perf_counter() - started
+        assert [r["name"] for r in results] == names
+
+        # Streaming mode: time until the first per-file result could be sent
+        started = time.perf_counter()
+        first_result = None
+        async for _ in iter_pipeline(names, process, max_in_flight=limit):
+            if first_result is None:
+                first_result = time.perf_counter() - started
+        print(f"{limit:>14} {elapsed:>8.2f} {FILES / elapsed:>8.1f} {first_result:>23.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
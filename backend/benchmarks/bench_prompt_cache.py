@@ -0,0 +1,98 @@
+# Run from backend/: python -m benchmarks.bench_prompt_cache
+# Scores the same JD against batches of candidates with the rubric sent inline
+# and then served from the explicit context cache. The fake backend bills cached
+# prefix tokens at a discount and spends prefill time only on uncached tokens.
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+
+from llmservices import gateway, score_cache
+from llmservices.gateway import estimate_tokens
+from llmservices.topscore_gemini import SCORING_PREFIX, analyze_multiple_resumes_structured
+
+CALLS = 40
+CANDIDATES_PER_CALL = 3
+CACHED_TOKEN_RATE = 0.25  # Cached input is billed at 25% of the normal rate
+BASE_LATENCY = 0.02
+PREFILL_SECONDS_PER_TOKEN = 0.00002
+
+JOB_TEXT = (
+    "Senior Backend Engineer, Bengaluru. 5+ years building Python services. "
+    "Required: Python, FastAPI, PostgreSQL, Kafka, Kubernetes, AWS. Preferred: Go, Terraform."
+)
+
+
+class FakeCachingGemini:
+    def __init__(self):
+        self.caches = {}
+        self.calls = []
+
+    async def create_cached_content(self, model, display_name, system_instruction, ttl_seconds):
+        name = f"cachedContents/{len(self.caches)}"
+        self.caches[name] = estimate_tokens(system_instruction)
+        return name
+
+    async def generate_content(self, model, contents, config=None):
+        uncached = estimate_tokens(contents)
+        cached = 0
+        if config.cached_content:
+            cached = self.caches[config.cached_content]
+        elif config.system_instruction:
+            uncached += estimate_tokens(config.system_instruction)
+        latency = BASE_LATENCY + uncached * PREFILL_SECONDS_PER_TOKEN
+        await asyncio.sleep(latency)
+        self.calls.append({
+            "input_tokens": uncached + cached,
+            "billed_tokens": uncached + cached * CACHED_TOKEN_RATE,
+            "latency": latency,
+        })
+        return SimpleNamespace(
+            parsed=[],
+            text="[]",
+            usage_metadata=SimpleNamespace(prompt_token_count=uncached + cached, cached_content_token_count=cached),
+        )
+
+
+def candidate(i: int) -> dict:
+    return {
+        "candidate_id": f"cand-{i}",
+        "name": f"Candidate {i}",
+        "designation": "Software Engineer",
+        "experience": 3 + i % 7,
+        "technical_skills": ["Python", "FastAPI", "PostgreSQL", "Docker", "Kafka", "AWS"][: 3 + i % 4],
+        "professional_summary": "Backend engineer building APIs and data pipelines. " * 3,
+    }
+
+
+async def run(label: str, ttl_seconds: int):
+    gateway.CONTEXT_CACHE_TTL_SECONDS = ttl_seconds
+    gateway.CONTEXT_CACHE_MIN_TOKENS = 0
+    backend = FakeCachingGemini()
+    gateway.set_backend(backend)
+    score_cache._cache.clear()
+
+    latencies = []
+    for call in range(CALLS):
+        batch = [candidate(call * CANDIDATES_PER_CALL + i) for i in range(CANDIDATES_PER_CALL)]
+        started = time.perf_counter()
+        await analyze_multiple_resumes_structured(JOB_TEXT, batch)
+        latencies.append(time.perf_counter() - started)
+
+    input_tokens = statistics.mean(c["input_tokens"] for c in backend.calls)
+    billed = statistics.mean(c["billed_tokens"] for c in backend.calls)
+    latencies.sort()
+    print(
+        f"{label:<14} input tokens/call={input_tokens:7.0f}  billed/call={billed:7.0f}  "
+        f"latency p50={statistics.median(latencies) * 1000:6.1f}ms  p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:6.1f}ms"
+    )
+
+
+async def main():
+    print(f"rubric prefix: ~{SCORING_PREFIX.tokens} tokens, {CANDIDATES_PER_CALL} candidates per call, {CALLS} calls")
+    await run("inline", 0)
+    await run("context cache", 3600)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+# Run from backend/: python -m benchmarks.bench_scoring_batches
+# Scores one JD against N candidates through a fake model that truncates its
+# output past MODEL_OUTPUT_LIMIT tokens and always fails on one poisoned resume.
+# Compares the previous single-prompt call (full candidates, indent=2, all or
+# nothing) with the token-budgeted batch planner.
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+from google.genai.types import GenerateContentConfig
+
+from llmservices import gateway, score_cache
+from llmservices.gateway import estimate_tokens
+from llmservices.topscore_gemini import (
+    SCORING_PAYLOAD_TEMPLATE, SCORING_PREFIX, analyze_multiple_resumes_structured,
+)
+
+MODEL_OUTPUT_LIMIT = 8192
+OUTPUT_TOKENS_PER_RESULT = 400
+LATENCY_PER_OUTPUT_TOKEN = 0.00002
+POISONED_ID = "cand-13"
+
+JD = {
+    "jobtitle": "Senior Backend Engineer",
+    "required_skills": ["Python", "FastAPI", "PostgreSQL", "Kafka", "Kubernetes"],
+    "description": "Build and operate high-throughput Python services. " * 10,
+    "salary_range": "not used for scoring",
+}
+
+
+class FakeScoringGemini:
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        self.input_tokens += estimate_tokens(contents) + estimate_tokens(config.system_instruction or "")
+        candidates = json.loads(contents.split("Candidate Resumes:\n", 1)[1])
+        output_tokens = len(candidates) * OUTPUT_TOKENS_PER_RESULT
+        await asyncio.sleep(0.05 + min(output_tokens, MODEL_OUTPUT_LIMIT) * LATENCY_PER_OUTPUT_TOKEN)
+        if output_tokens > MODEL_OUTPUT_LIMIT or any(c["candidate_id"] == POISONED_ID for c in candidates):
+            return SimpleNamespace(parsed=None, text="[{\"candidate_id\": \"trunc", usage_metadata=None)
+        parsed = [
+            {"candidate_id": c["candidate_id"], "skills_score": 80, "experience_score": 70,
+             "education_score": 60, "certifications_score": 50, "uid": "", "resume_url": ""}
+            for c in candidates
+        ]
+        return SimpleNamespace(parsed=parsed, text=json.dumps(parsed), usage_metadata=None)
+
+
+def candidate(i: int) -> dict:
+    return {
+        "uid": "bench-user",
+        "candidate_id": f"cand-{i}",
+        "resume_url": f"https://example.blob.core.windows.net/resumes/{i}.pdf",
+        "content_sha256": "0" * 64,
+        "name": f"Candidate {i}",
+        "email": f"c{i}@example.com",
+        "contact_number": "+91 98765 43210",
+        "designation": "Software Engineer",
+        "experience": 2 + i % 9,
+        "technical_skills": ["Python", "FastAPI", "PostgreSQL", "Docker", "Kafka", "AWS"],
+        "professional_summary": "Backend engineer building APIs and data pipelines. " * 4,
+        "location": "Bengaluru",
+    }
+
+
+async def single_call(job, candidates: list) -> list:
+    payload = SCORING_PAYLOAD_TEMPLATE.format(job_text=job, candidates_json=json.dumps(candidates, indent=2))
+    response = await gateway.generate_with_prefix(SCORING_PREFIX, payload, GenerateContentConfig())
+    return response.parsed or [{"error": "Scoring response is not a JSON list"}]
+
+
+async def run(label: str, candidates: list, score):
+    backend = FakeScoringGemini()
+    gateway.set_backend(backend)
+    score_cache._cache.clear()
+
+    started = time.perf_counter()
+    results = await score(JD, candidates)
+    elapsed = time.perf_counter() - started
+    scored = sum(1 for r in results if "error" not in r)
+    print(
+        f"{label:<10} {len(candidates):>5} candidates  scored={scored:>5}  calls={backend.calls:>4}  "
+        f"input tokens={backend.input_tokens:>8}  {elapsed:6.2f}s"
+    )
+
+
+async def main():
+    gateway.CONTEXT_CACHE_TTL_SECONDS = 0
+    for count in (20, 200, 1000):
+        candidates = [candidate(i) for i in range(count)]
+        await run("one call", candidates, single_call)
+        await run("planned", candidates, analyze_multiple_resumes_structured)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
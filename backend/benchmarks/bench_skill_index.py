@@ -0,0 +1,82 @@
+# Run from backend/: python -m benchmarks.bench_skill_index
+# Lookup cost of the inverted index against a full scan, plus the Firestore
+# side: documents read per lookup and how large and how write-hot the busiest
+# posting document gets, unsharded and with SKILL_INDEX_SHARDS.
+import random
+import time
+import uuid
+
+from benchmarks.corpus import make_candidate, make_jd
+from services.skills import normalize_skills, count_overlaps
+from storage.skill_index import POSTING_SHARDS, _shard
+
+# Firestore limits the index has to stay under
+MAX_DOCUMENT_BYTES = 1024 * 1024
+SUSTAINED_WRITES_PER_DOC = 1.0
+# A bulk upload indexes this many resumes per second on one worker
+INGEST_PER_SECOND = 8
+
+CANDIDATES = 10_000
+LOOKUPS = 200
+
+
+def has_skill_overlap(jd_skills, candidate_skills, min_overlap=2):
+    return len(set(jd_skills).intersection(set(candidate_skills))) >= min_overlap
+
+
+def main():
+    rng = random.Random(7)
+    # Role-based skill sets (benchmarks.corpus), so common skills are as
+    # skewed as in a real tech hiring account
+    candidates = {
+        str(uuid.UUID(int=rng.getrandbits(128))): make_candidate(rng, i)["technical_skills"]
+        for i in range(CANDIDATES)
+    }
+    jds = [make_jd(rng, i)["required_skills"] for i in range(LOOKUPS)]
+
+    postings = {}
+    started = time.perf_counter()
+    for candidate_id, skills in candidates.items():
+        for token in normalize_skills(skills):
+            postings.setdefault(token, []).append(candidate_id)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scan_matches = 0
+    for jd_skills in jds:
+        scan_matches += sum(1 for skills in candidates.values() if has_skill_overlap(jd_skills, skills, 1))
+    scan_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index_matches = 0
+    index_reads = 0
+    for jd_skills in jds:
+        index_matches += len(count_overlaps(postings, jd_skills))
+        index_reads += len(normalize_skills(jd_skills)) * POSTING_SHARDS
+    index_seconds = time.perf_counter() - started
+
+    print(f"candidates={CANDIDATES} lookups={LOOKUPS} index_build={build_seconds:.3f}s")
+    print(f"{'method':>6} {'ms/lookup':>10} {'docs read/lookup':>17} {'matches/lookup':>15}")
+    print(f"{'scan':>6} {scan_seconds / LOOKUPS * 1000:>10.2f} {CANDIDATES:>17} {scan_matches / LOOKUPS:>15.1f}")
+    print(f"{'index':>6} {index_seconds / LOOKUPS * 1000:>10.2f} {index_reads / LOOKUPS:>17.1f} {index_matches / LOOKUPS:>15.1f}")
+    posting_documents(postings)
+
+
+def posting_documents(postings: dict):
+    # Busiest token: document size (ids are 36-char uuids, ~39 bytes stored)
+    # and the share of ingest writes it takes, with and without sharding
+    token, ids = max(postings.items(), key=lambda item: len(item[1]))
+    write_share = len(ids) / CANDIDATES
+    print(f"\nbusiest token {token!r}: {len(ids)} of {CANDIDATES} candidates")
+    print(f"{'shards':>6} {'ids/doc':>8} {'KiB/doc':>8} {'writes/s/doc':>13} {'candidates at 1 MiB':>20}")
+    for shards in sorted({1, POSTING_SHARDS}):
+        per_doc = max(sum(1 for i in ids if _shard(i) % shards == s) for s in range(shards))
+        size = per_doc * 39
+        ceiling = int(MAX_DOCUMENT_BYTES / 39 / write_share * shards)
+        writes = INGEST_PER_SECOND * write_share / shards
+        flag = "  over the ~1/s guidance" if writes > SUSTAINED_WRITES_PER_DOC else ""
+        print(f"{shards:>6} {per_doc:>8} {size / 1024:>8.0f} {writes:>13.2f} {ceiling:>20}{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# Synthetic resumes and job descriptions for the benchmarks. Uploaded files
+# are plain text (or PDF with a text layer) with one "Label: value" line per
+# extracted field, which is what benchmarks.fake_gemini reads them back from.
+import random
+
+SKILLS = [
+    "Python", "Django", "FastAPI", "Flask", "Java", "Spring", "Kotlin", "Go", "Rust", "C++", "C#", ".NET",
+    "JavaScript", "TypeScript", "React", "Angular", "Vue", "Node.js", "SQL", "PostgreSQL", "MySQL",
+    "MongoDB", "Redis", "Kafka", "RabbitMQ", "Docker", "Kubernetes", "Terraform", "AWS", "Azure",
+    "Google Cloud", "Spark", "Airflow", "Pandas", "TensorFlow", "PyTorch", "Machine Learning", "Tableau",
+    "Power BI", "Excel", "Selenium", "Jenkins", "Git", "Linux", "GraphQL", "REST",
+]
+ROLES = {
+    "Backend Engineer": ["Python", "Django", "FastAPI", "PostgreSQL", "Redis", "Kafka", "Docker", "REST"],
+    "Java Developer": ["Java", "Spring", "Kotlin", "MySQL", "Kafka", "Docker", "REST", "Jenkins"],
+    "Frontend Engineer": ["JavaScript", "TypeScript", "React", "Angular", "Vue", "GraphQL", "Node.js"],
+    "Data Engineer": ["Python", "SQL", "Spark", "Airflow", "Kafka", "AWS", "Pandas", "PostgreSQL"],
+    "ML Engineer": ["Python", "TensorFlow", "PyTorch", "Machine Learning", "Pandas", "SQL", "Docker"],
+    "DevOps Engineer": ["Docker", "Kubernetes", "Terraform", "AWS", "Azure", "Linux", "Jenkins", "Git"],
+    "Data Analyst": ["SQL", "Excel", "Tableau", "Power BI", "Python", "Pandas"],
+}
+FIRST_NAMES = ["Aarav", "Priya", "Rahul", "Ananya", "Vikram", "Sneha", "Arjun", "Meera", "Karan", "Divya",
+               "Rohan", "Isha", "Nikhil", "Pooja", "Sameer", "Neha", "Aditya", "Kavya", "Manish", "Ritu"]
+LAST_NAMES = ["Sharma", "Iyer", "Patel", "Reddy", "Gupta", "Nair", "Singh", "Menon", "Rao", "Das"]
+CITIES = ["Bengaluru", "Hyderabad", "Pune", "Chennai", "Mumbai", "Delhi", "Kochi", "Remote"]
+COMPANIES = ["Acme Analytics", "Northwind Systems", "Bluefin Labs", "Orbit Retail", "Helix Health", "Quanta Pay"]
+INSTITUTIONS = ["IIT Madras", "NIT Trichy", "BITS Pilani", "Anna University", "VIT Vellore", "Pune University"]
+DEGREES = ["B.Tech Computer Science", "B.E. Information Technology", "M.Tech Software Systems", "MCA", "B.Sc Statistics"]
+CERTIFICATIONS = ["AWS Certified Developer", "CKA", "Azure Fundamentals", "Oracle Java SE", "Google Data Analytics",
+                  "Terraform Associate", "PMP"]
+
+
+def make_candidate(rng: random.Random, index: int, role: str = None) -> dict:
+    role = role or rng.choice(list(ROLES))
+    skills = list(dict.fromkeys(rng.sample(ROLES[role], rng.randint(3, 6)) + rng.sample(SKILLS, rng.randint(1, 4))))
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    experience = round(rng.uniform(0, 15), 1)
+    return {
+        "name": f"{name} {index}",
+        "designation": role,
+        "experience": experience,
+        "contact_number": f"+91 9{rng.randint(100000000, 999999999)}",
+        "email": f"{name.lower().replace(' ', '.')}.{index}@example.com",
+        "location": rng.choice(CITIES),
+        "education": [{
+            "degree": rng.choice(DEGREES),
+            "institution": rng.choice(INSTITUTIONS),
+            "year": str(2024 - int(experience) - rng.randint(0, 2)),
+        }],
+        "technical_skills": skills,
+        "key_achievements": [
+            f"Cut {rng.choice(['latency', 'cloud spend', 'build time'])} by {rng.randint(10, 60)}% using {skills[0]}",
+            f"Led a team of {rng.randint(2, 9)} on a {rng.choice(skills)} migration",
+        ],
+        "certifications": rng.sample(CERTIFICATIONS, rng.randint(0, 2)),
+        "projects": [{
+            "title": f"{rng.choice(['Billing', 'Search', 'Reporting', 'Onboarding'])} platform",
+            "description": f"Built with {', '.join(skills[:3])} for {rng.choice(COMPANIES)}.",
+        }],
+        "professional_summary": f"{role} with {experience} years of experience in {', '.join(skills[:3])}.",
+    }
+
+
+def make_jd(rng: random.Random, index: int, role: str = None) -> dict:
+    role = role or rng.choice(list(ROLES))
+    required = rng.sample(ROLES[role], 5)
+    company = rng.choice(COMPANIES)
+    return {
+        "jobtitle": f"Senior {role} {index}",
+        "company": company,
+        "location": rng.choice(CITIES),
+        "required_experience": f"{rng.randint(2, 8)}+ years",
+        "job_type": "Full-time",
+        "required_skills": required,
+        "responsibilities": f"Design and build systems with {', '.join(required[:3])}; review code and mentor engineers.",
+        "qualifications": rng.choice(DEGREES),
+        "salary_range": f"{rng.randint(15, 30)}-{rng.randint(31, 60)} LPA",
+        "posted_date": f"2025-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+        "contact_email": f"careers{index}@example.com",
+        "description": f"{company} is hiring a {role} to work on {rng.choice(['payments', 'search', 'data platform', 'mobile'])}.",
+    }
+
+
+def _label(field: str) -> str:
+    return field.replace("_", " ").title()
+
+
+def _value(value) -> str:
+    if isinstance(value, list):
+        return "; ".join(_value(item) for item in value)
+    if isinstance(value, dict):
+        return ", ".join(str(item) for item in value.values() if item)
+    return str(value)
+
+
+def render_document(fields: dict) -> str:
+    return "\n".join(f"{_label(field)}: {_value(value)}" for field, value in fields.items()) + "\n"
+
+
+def to_pdf(text: str) -> bytes:
+    import fitz
+
+    with fitz.open() as doc:
+        lines = text.splitlines()
+        for start in range(0, len(lines), 50):
+            page = doc.new_page()
+            page.insert_text((50, 60), "\n".join(lines[start:start + 50]), fontsize=9)
+        return doc.tobytes()
+
+
+def document_file(fields: dict, name: str, file_format: str = "txt") -> tuple:
+    # (filename, bytes, content type) ready for a multipart upload
+    text = render_document(fields)
+    if file_format == "pdf":
+        return f"{name}.pdf", to_pdf(text), "application/pdf"
+    return f"{name}.txt", text.encode("utf-8"), "text/plain"
@@ -0,0 +1,117 @@
+# Run from backend/: python -m benchmarks.eval_prerank_recall [--file sample.jsonl | --uid UID]
+# Recall@N of the lexical pre-ranker against labeled relevance, to pick
+# PRERANK_TOP_N: every candidate cut by the pre-ranker is one the LLM never sees.
+#
+#   --file  JSONL, one JD per line: {"jd": {...}, "candidates": [{...}], "relevant": ["candidate_id", ...]}
+#   --uid   Labels from Firestore: candidates the LLM scored at or above
+#           --min-score for each of the user's JDs (users/{uid}/top_score)
+# Without either, a synthetic labeled sample is generated.
+import argparse
+import json
+import random
+import statistics
+import time
+
+from benchmarks.corpus import ROLES, SKILLS
+from services.prerank import rank_candidates, recall_at_n
+from services.skills import normalize_skills
+
+CUTOFFS = (10, 20, 50, 100, 200)
+
+
+def synthetic_sample(jds: int = 20, pool: int = 2000, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    sample = []
+    for j in range(jds):
+        title = rng.choice(list(ROLES))
+        required = rng.sample(ROLES[title], 5)
+        jd = {"jobtitle": f"Senior {title}", "required_skills": required,
+              "responsibilities": f"Design and build systems with {', '.join(required[:3])}."}
+        others = [role for role in ROLES if role != title]
+        candidates, relevant = [], []
+        for i in range(pool):
+            role = title if rng.random() < 0.02 else rng.choice(others)
+            skills = rng.sample(ROLES[role], rng.randint(3, 6)) + rng.sample(SKILLS, rng.randint(1, 4))
+            candidate = {
+                "candidate_id": f"jd{j}-c{i}",
+                "designation": role,
+                "technical_skills": skills,
+                "professional_summary": f"{role} with experience in {', '.join(skills[:3])}.",
+            }
+            # Mirrors find_overlaps: only candidates sharing a skill reach the ranker
+            overlap = len(normalize_skills(skills) & normalize_skills(required))
+            if overlap == 0:
+                continue
+            candidates.append(candidate)
+            # Label: what a careful scorer would rank highly
+            if role == title and overlap >= 3:
+                relevant.append(candidate["candidate_id"])
+        sample.append({"jd": jd, "candidates": candidates, "relevant": relevant})
+    return sample
+
+
+def firestore_sample(uid: str, min_score: float) -> list:
+    from firebase_config import db
+
+    user_ref = db.collection("users").document(uid)
+    candidates = [{**doc.to_dict(), "candidate_id": doc.id} for doc in user_ref.collection("candidates").stream()]
+    sample = []
+    for jd_doc in user_ref.collection("job_descriptions").stream():
+        scored = user_ref.collection("top_score").document(jd_doc.id).collection("candidates")
+        relevant = [
+            doc.id for doc in scored.where("total_score", ">=", min_score).select(["total_score"]).stream()
+        ]
+        if not relevant:
+            continue
+        jd = jd_doc.to_dict()
+        required = normalize_skills(jd.get("required_skills", []))
+        pool = [c for c in candidates if normalize_skills(c.get("technical_skills", [])) & required]
+        sample.append({"jd": jd, "candidates": pool, "relevant": relevant})
+    return sample
+
+
+def evaluate(sample: list):
+    recalls = {n: [] for n in CUTOFFS}
+    sent = {n: [] for n in CUTOFFS}
+    rank_seconds = []
+    for entry in sample:
+        pool = entry["candidates"]
+        started = time.perf_counter()
+        ranked = [c["candidate_id"] for c in rank_candidates(entry["jd"], pool)]
+        rank_seconds.append(time.perf_counter() - started)
+        for n in CUTOFFS:
+            recall = recall_at_n(ranked, entry["relevant"], n)
+            if recall == recall:  # skip JDs without labels (NaN)
+                recalls[n].append(recall)
+            sent[n].append(min(n, len(pool)) / max(len(pool), 1))
+
+    pools = [len(entry["candidates"]) for entry in sample]
+    labeled = [len(entry["relevant"]) for entry in sample]
+    print(f"{len(sample)} JDs, pool size mean {statistics.mean(pools):.0f} (max {max(pools)}), "
+          f"relevant mean {statistics.mean(labeled):.0f}, "
+          f"rank time mean {statistics.mean(rank_seconds) * 1000:.1f}ms")
+    print(f"{'N':>5} {'recall@N':>9} {'min':>6} {'LLM share':>10}")
+    for n in CUTOFFS:
+        if recalls[n]:
+            print(f"{n:>5} {statistics.mean(recalls[n]):>9.3f} {min(recalls[n]):>6.2f} {statistics.mean(sent[n]):>9.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file")
+    parser.add_argument("--uid")
+    parser.add_argument("--min-score", type=float, default=70)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file) as f:
+            sample = [json.loads(line) for line in f if line.strip()]
+    elif args.uid:
+        sample = firestore_sample(args.uid, args.min_score)
+    else:
+        sample = synthetic_sample()
+    evaluate(sample)
+
+
+if __name__ == "__main__":
+    main()
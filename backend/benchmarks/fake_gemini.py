@@ -0,0 +1,245 @@
+# Run from backend/: python -m benchmarks.fake_gemini --port 8089 --latency 0.4 --failure-rate 0.01
+# Stand-in for the Gemini API (generateContent and cachedContents) so the app
+# can be load-tested without credentials: point it here with
+# GEMINI_BASE_URL=http://127.0.0.1:8089 and any GOOGLE_API_KEY.
+#
+# Responses follow the request's response schema. Extraction fields are read
+# back from "Label: value" lines in the uploaded text (see benchmarks.corpus);
+# scoring requests get one deterministic result per candidate in the payload.
+# Token usage is estimated like llmservices.gateway.estimate_tokens and summed
+# on GET /stats. Latency is base + jitter + per output token.
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+config = {
+    "latency": float(os.getenv("FAKE_GEMINI_LATENCY", "0.4")),
+    "jitter": float(os.getenv("FAKE_GEMINI_JITTER", "0.1")),
+    "seconds_per_output_token": float(os.getenv("FAKE_GEMINI_SECONDS_PER_OUTPUT_TOKEN", "0.002")),
+    "failure_rate": float(os.getenv("FAKE_GEMINI_FAILURE_RATE", "0")),
+    "rate_limit_share": float(os.getenv("FAKE_GEMINI_RATE_LIMIT_SHARE", "0.5")),
+    "seed": int(os.getenv("FAKE_GEMINI_SEED", "0")),
+}
+stats = {
+    "requests": 0, "failures": 0, "cache_creates": 0,
+    "prompt_tokens": 0, "cached_tokens": 0, "output_tokens": 0,
+}
+_caches = {}  # cachedContents name -> token count of its system instruction
+_rng = random.Random(config["seed"])
+
+app = FastAPI()
+
+
+def _tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _parts_text(content) -> tuple:
+    # (text, tokens) of a Content or a list of them
+    contents = content if isinstance(content, list) else [content]
+    texts, tokens = [], 0
+    for item in contents:
+        for part in (item or {}).get("parts", []):
+            if "text" in part:
+                texts.append(part["text"])
+                tokens += _tokens(part["text"])
+            elif "inlineData" in part:
+                data = base64.b64decode(part["inlineData"].get("data", ""))
+                tokens += len(data) // 100 + 258
+                texts.append(data.decode("latin-1"))
+    return "\n".join(texts), tokens
+
+
+def _schema_type(schema: dict) -> str:
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if str(k).lower() != "null"), "string")
+    return str(kind or "object").lower()
+
+
+def _resolve(schema: dict, defs: dict) -> dict:
+    if "$ref" in schema:
+        return _resolve(defs.get(schema["$ref"].rsplit("/", 1)[-1], {}), defs)
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            options = [s for s in schema[key] if _schema_type(s) != "null"]
+            return _resolve(options[0] if options else {}, defs)
+    return schema
+
+
+def _filler(schema: dict, defs: dict, name: str, text: str, seed: int):
+    schema = _resolve(schema, defs)
+    kind = _schema_type(schema)
+    label = re.search(rf"^\s*{re.escape(name.replace('_', ' '))}\s*:\s*(.*)$", text, re.I | re.M) if name else None
+    found = label.group(1).strip() if label else None
+
+    if schema.get("enum"):
+        return schema["enum"][seed % len(schema["enum"])]
+    if kind == "object":
+        properties = schema.get("properties", {})
+        return {key: _filler(value, defs, key, text, seed + i) for i, (key, value) in enumerate(properties.items())}
+    if kind == "array":
+        items = _resolve(schema.get("items", {}), defs)
+        values = [value.strip() for value in found.split(";") if value.strip()] if found is not None else None
+        if values is not None and _schema_type(items) == "string":
+            return values
+        count = len(values) if values is not None else 2
+        return [_filler(items, defs, "", text, seed + i) for i in range(count)]
+    if kind in ("number", "integer"):
+        try:
+            value = float(re.search(r"-?\d+(\.\d+)?", found).group()) if found else (seed * 37) % 100
+        except AttributeError:
+            value = (seed * 37) % 100
+        return int(value) if kind == "integer" else float(value)
+    if kind == "boolean":
+        return seed % 2 == 0
+    return found if found is not None else f"{name or 'value'} {seed % 1000}"
+
+
+def _score_results(schema: dict, defs: dict, payload: str) -> list:
+    # Scoring payload: "Job Description:\n{json}\n\nCandidate Resumes:\n[...]"
+    job_text, _, candidates_text = payload.partition("Candidate Resumes:")
+    try:
+        candidates = json.loads(candidates_text.strip())
+    except ValueError:
+        candidates = []
+    try:
+        job = json.loads(job_text.partition("Job Description:")[2].strip())
+    except ValueError:
+        job = {}
+    job_skills = {skill.lower() for skill in job.get("required_skills", [])} if isinstance(job, dict) else set()
+    item_schema = _resolve(schema.get("items", {}), defs)
+    results = []
+    for candidate in candidates:
+        seed = int(hashlib.sha1(json.dumps(candidate, sort_keys=True).encode()).hexdigest()[:8], 16)
+        result = _filler(item_schema, defs, "", "", seed)
+        skills = candidate.get("technical_skills", [])
+        matched = [s for s in skills if s.lower() in job_skills]
+        result.update({
+            "candidate_id": candidate.get("candidate_id", ""),
+            "name": candidate.get("name", ""),
+            "skills_matched": matched,
+            "skills_score": round(100 * len(matched) / max(len(job_skills), 1), 1),
+            "experience_score": float(seed % 101),
+            "education_score": float((seed >> 8) % 101),
+            "certifications_score": float((seed >> 16) % 101),
+        })
+        results.append(result)
+    return results
+
+
+def _error(code: int, status: str, message: str):
+    return JSONResponse(status_code=code, content={"error": {"code": code, "message": message, "status": status}})
+
+
+@app.post("/{api_version}/cachedContents")
+async def create_cached_content(api_version: str, request: Request):
+    body = await request.json()
+    _, tokens = _parts_text(body.get("systemInstruction") or {})
+    name = f"cachedContents/{hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest()[:16]}"
+    _caches[name] = tokens
+    stats["cache_creates"] += 1
+    ttl = float(str(body.get("ttl", "3600s")).rstrip("s"))
+    return {
+        "name": name,
+        "model": body.get("model"),
+        "displayName": body.get("displayName"),
+        "expireTime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + ttl)),
+        "usageMetadata": {"totalTokenCount": tokens},
+    }
+
+
+@app.post("/{api_version}/models/{target}")
+async def generate_content(api_version: str, target: str, request: Request):
+    model, _, action = target.partition(":")
+    if action != "generateContent":
+        return _error(404, "NOT_FOUND", f"Unsupported method {action}")
+    body = await request.json()
+    stats["requests"] += 1
+
+    if _rng.random() < config["failure_rate"]:
+        stats["failures"] += 1
+        await asyncio.sleep(config["latency"] / 4)
+        if _rng.random() < config["rate_limit_share"]:
+            return _error(429, "RESOURCE_EXHAUSTED", "Fake quota exceeded")
+        return _error(503, "UNAVAILABLE", "Fake backend unavailable")
+
+    cached_name = body.get("cachedContent")
+    if cached_name and cached_name not in _caches:
+        return _error(404, "NOT_FOUND", f"{cached_name} not found")
+    cached_tokens = _caches.get(cached_name, 0)
+    _, system_tokens = _parts_text(body.get("systemInstruction") or {})
+    text, content_tokens = _parts_text(body.get("contents", []))
+
+    generation = body.get("generationConfig", {})
+    schema = generation.get("responseJsonSchema") or generation.get("responseSchema") or {}
+    defs = schema.get("$defs") or schema.get("defs") or {}
+    if "Candidate Resumes:" in text:
+        output = _score_results(schema, defs, text)
+    else:
+        seed = int(hashlib.sha1(text.encode("utf-8", "replace")).hexdigest()[:8], 16)
+        output = _filler(schema, defs, "", text, seed)
+    output_text = json.dumps(output)
+    output_tokens = _tokens(output_text)
+
+    prompt_tokens = cached_tokens + system_tokens + content_tokens
+    stats["prompt_tokens"] += prompt_tokens
+    stats["cached_tokens"] += cached_tokens
+    stats["output_tokens"] += output_tokens
+    await asyncio.sleep(max(0.0, config["latency"] + _rng.uniform(-1, 1) * config["jitter"]
+                            + output_tokens * config["seconds_per_output_token"]))
+
+    usage = {
+        "promptTokenCount": prompt_tokens,
+        "candidatesTokenCount": output_tokens,
+        "totalTokenCount": prompt_tokens + output_tokens,
+    }
+    if cached_tokens:
+        usage["cachedContentTokenCount"] = cached_tokens
+    return {
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": output_text}]},
+            "finishReason": "STOP",
+            "index": 0,
+        }],
+        "usageMetadata": usage,
+        "modelVersion": model,
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    return {**stats, "config": config}
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=config["latency"])
+    parser.add_argument("--jitter", type=float, default=config["jitter"])
+    parser.add_argument("--seconds-per-output-token", type=float, default=config["seconds_per_output_token"])
+    parser.add_argument("--failure-rate", type=float, default=config["failure_rate"])
+    parser.add_argument("--seed", type=int, default=config["seed"])
+    args = parser.parse_args()
+    config.update(
+        latency=args.latency, jitter=args.jitter, seconds_per_output_token=args.seconds_per_output_token,
+        failure_rate=args.failure_rate, seed=args.seed,
+    )
+    _rng.seed(args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+# Run from backend/ with the Firestore emulator and Azurite running:
+#   firebase emulators:start --only firestore          (localhost:8080)
+#   azurite-blob --blobHost 127.0.0.1                   (localhost:10000)
+#   FIRESTORE_EMULATOR_HOST=localhost:8080 python -m benchmarks.load_suite \
+#       --sizes 10,1000,10000 --out benchmarks/baselines/local.json
+#   ... --compare benchmarks/baselines/local.json      (exit status 1 on regression)
+#
+# Starts benchmarks.fake_gemini and the app (uvicorn main:app) as subprocesses,
+# seeds one user per corpus size with that many candidates directly in
+# Firestore, then drives the upload, top-score and list endpoints over HTTP.
+# Reports p50/p95/p99 latency, throughput, peak RSS of the app's process tree
+# (parser workers included) and Gemini calls/tokens per scenario, and writes
+# everything as JSON so a later run can be compared against it.
+# Auth uses unsigned emulator ID tokens (FIREBASE_AUTH_EMULATOR_HOST is set
+# for the app; firebase_admin then skips signature checks, no emulator needed).
+import argparse
+import asyncio
+import base64
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+from benchmarks.corpus import document_file, make_candidate, make_jd
+
+# Azurite's well-known development account
+AZURITE_CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+    "AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw==;"
+    "BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;"
+)
+PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID", "demo-recruitpro")
+SEEDED_JDS = 20
+# Latency regressions smaller than this are treated as noise
+MIN_LATENCY_DELTA_MS = 5.0
+# What the client's top matches page asks for (served from the leaderboard)
+TOP_SCORE_FIELDS = (
+    "candidate_id,name,designation,email,contact,location,experience,education,total_score,"
+    "score_breakdown,skills_matched,key_achievements,key_strengths,resume_url"
+)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def emulator_id_token(uid: str) -> str:
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    now = int(time.time())
+    claims = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}", "aud": PROJECT_ID,
+        "sub": uid, "user_id": uid, "iat": now, "exp": now + 3600, "auth_time": now,
+    }
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(claims)}."
+
+
+def tree_rss_kb(pid: int) -> int:
+    # Resident memory of a process and its descendants (Linux /proc)
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                total += next((int(line.split()[1]) for line in f if line.startswith("VmRSS:")), 0)
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pending.extend(int(child) for child in f.read().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return total
+
+
+class MemorySampler:
+    def __init__(self, pid: int, interval: float = 0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = 0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            self.peak_kb = max(self.peak_kb, tree_rss_kb(self.pid))
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self):
+        self.peak_kb = tree_rss_kb(self.pid)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc_info):
+        self._task.cancel()
+        self.peak_kb = max(self.peak_kb, tree_rss_kb(self.pid))
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def summarize(latencies: list, statuses: dict, wall_seconds: float, peak_kb: int, gemini: dict) -> dict:
+    latencies = sorted(latencies)
+    errors = sum(count for status, count in statuses.items() if status == "error" or int(status) >= 500)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": statuses,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / wall_seconds, 2) if wall_seconds else 0.0,
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+        "gemini": gemini,
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, app_pid: int, gemini_url: str, operations: list, concurrency: int):
+    # operations: zero-argument coroutine functions returning an httpx.Response
+    # (or a status code for multi-request operations such as page walks)
+    gate = asyncio.Semaphore(concurrency)
+    latencies, statuses, responses = [], {}, []
+
+    async def run_one(operation):
+        async with gate:
+            started = time.perf_counter()
+            try:
+                response = await operation()
+                status = str(getattr(response, "status_code", response))
+            except Exception:
+                response, status = None, "error"
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            responses.append(response)
+
+    before = (await client.get(f"{gemini_url}/stats")).json()
+    with MemorySampler(app_pid) as sampler:
+        started = time.perf_counter()
+        await asyncio.gather(*(run_one(operation) for operation in operations))
+        wall_seconds = time.perf_counter() - started
+    after = (await client.get(f"{gemini_url}/stats")).json()
+    gemini = {key: after[key] - before[key] for key in ("requests", "failures", "prompt_tokens", "cached_tokens", "output_tokens")}
+    return summarize(latencies, statuses, wall_seconds, sampler.peak_kb, gemini), responses
+
+
+def seed_user(uid: str, size: int, seed: int) -> list:
+    # Candidates (and a few JDs) written straight to Firestore: seeding 10k
+    # candidates through the upload endpoint would benchmark the seeding.
+    from firebase_config import db
+    from services.prerank import candidate_term_vector
+    from services.scoring import initialize_user_weights
+    from storage.firestore import upsert_documents
+    from storage.skill_index import rebuild_skill_index
+
+    rng = random.Random(seed)
+    user_ref = db.collection("users").document(uid)
+    writes = []
+    for i in range(size):
+        candidate = make_candidate(rng, i)
+        candidate_id = str(uuid.uuid4())
+        candidate.update({
+            "uid": uid,
+            "candidate_id": candidate_id,
+            "resume_url": f"http://127.0.0.1:10000/devstoreaccount1/bench/{uid}/{candidate_id}/resume.txt",
+            "term_vector": candidate_term_vector(candidate),
+        })
+        writes.append((user_ref.collection("candidates").document(candidate_id), candidate))
+    jd_ids = []
+    for i in range(min(SEEDED_JDS, size)):
+        jd = make_jd(rng, i)
+        jd_id = str(uuid.uuid4())
+        jd.update({"uid": uid, "jd_id": jd_id, "jd_url": f"http://127.0.0.1:10000/devstoreaccount1/bench/{uid}/{jd_id}/jd.txt"})
+        writes.append((user_ref.collection("job_descriptions").document(jd_id), jd))
+        jd_ids.append(jd_id)
+    upsert_documents(writes)
+    rebuild_skill_index(uid)
+    initialize_user_weights(uid)
+    return jd_ids
+
+
+async def walk_pages(client: httpx.AsyncClient, url: str, headers: dict, page_size: int) -> int:
+    cursor = None
+    while True:
+        params = {"limit": page_size, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(url, params=params, headers=headers)
+        if response.status_code != 200:
+            return response.status_code
+        cursor = response.json().get("next_cursor")
+        if not cursor:
+            return 200
+
+
+async def benchmark_size(client, app_url, gemini_url, app_pid, size: int, args, run_id: str) -> dict:
+    uid = f"bench-{run_id}-{size}"
+    started = time.perf_counter()
+    await asyncio.to_thread(seed_user, uid, size, args.seed + size)
+    print(f"  seeded {size} candidates in {time.perf_counter() - started:.1f}s")
+    headers = {"Authorization": f"Bearer {emulator_id_token(uid)}"}
+    rng = random.Random(args.seed * 7919 + size)
+    results = {}
+
+    def upload(path: str, field: str, file: tuple):
+        return lambda: client.post(f"{app_url}{path}", files=[(field, file)], headers=headers)
+
+    # Each upload is a unique document, so the extraction and score caches never hit
+    resumes = [document_file(make_candidate(rng, 100000 + i), f"resume_{i}", args.format) for i in range(args.uploads)]
+    results["upload_candidate"], _ = await run_scenario(
+        client, app_pid, gemini_url, [upload("/api/candidate-resume", "resumes", f) for f in resumes], args.concurrency
+    )
+
+    jds = [document_file(make_jd(rng, 1000 + i), f"jd_{i}", args.format) for i in range(args.jd_uploads)]
+    results["upload_jd"], responses = await run_scenario(
+        client, app_pid, gemini_url, [upload("/api/upload-jd", "jd_files", f) for f in jds], args.concurrency
+    )
+    jd_ids = [
+        item["jd_id"]
+        for response in responses if response is not None and response.status_code == 200
+        for item in response.json().get("results", []) if item.get("jd_id") and item.get("scored_candidates")
+    ]
+
+    reads = {
+        "top_score": [
+            (lambda jd_id=jd_id: client.get(f"{app_url}/api/top-score/{jd_id}", params={"limit": 50, "fields": TOP_SCORE_FIELDS}, headers=headers))
+            for jd_id in (jd_ids * (args.reads // max(len(jd_ids), 1) + 1))[:args.reads]
+        ] if jd_ids else [],
+        "list_candidates": [
+            lambda: client.get(f"{app_url}/api/candidate-resumes", params={"limit": 100}, headers=headers)
+        ] * args.reads,
+        "list_jds": [
+            lambda: client.get(f"{app_url}/api/job-descriptions", params={"limit": 100}, headers=headers)
+        ] * args.reads,
+        "list_candidates_all_pages": [
+            lambda: walk_pages(client, f"{app_url}/api/candidate-resumes", headers, 500)
+        ] * max(1, args.reads // 50),
+    }
+    for name, operations in reads.items():
+        if operations:
+            results[name], _ = await run_scenario(client, app_pid, gemini_url, operations, args.concurrency)
+
+    for name, result in results.items():
+        print(f"  {name:<26} n={result['requests']:<5} err={result['errors']:<3} "
+              f"p50={result['p50_ms']:>8.1f}ms p95={result['p95_ms']:>8.1f}ms p99={result['p99_ms']:>8.1f}ms "
+              f"{result['throughput_rps']:>7.1f} req/s  peak {result['peak_rss_mb']:.0f} MB")
+    return results
+
+
+def start_process(args: list, env: dict) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, *args], env=env)
+
+
+async def wait_ready(client: httpx.AsyncClient, url: str, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with status {process.returncode}")
+        try:
+            await client.get(url)
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for size, scenarios in current["sizes"].items():
+        for name, result in scenarios.items():
+            base = baseline.get("sizes", {}).get(size, {}).get(name)
+            if not base:
+                continue
+            for key in ("p50_ms", "p95_ms", "p99_ms"):
+                if result[key] > base[key] * (1 + tolerance) and result[key] - base[key] > MIN_LATENCY_DELTA_MS:
+                    regressions.append(f"{size}/{name} {key}: {base[key]} -> {result[key]}")
+            if result["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+                regressions.append(f"{size}/{name} throughput_rps: {base['throughput_rps']} -> {result['throughput_rps']}")
+            if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+                regressions.append(f"{size}/{name} peak_rss_mb: {base['peak_rss_mb']} -> {result['peak_rss_mb']}")
+            if result["errors"] > base["errors"]:
+                regressions.append(f"{size}/{name} errors: {base['errors']} -> {result['errors']}")
+    return regressions
+
+
+async def main_async(args) -> int:
+    gemini_port, app_port = free_port(), free_port()
+    gemini_url, app_url = f"http://127.0.0.1:{gemini_port}", f"http://127.0.0.1:{app_port}"
+    connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING") or AZURITE_CONNECTION_STRING
+    container = f"bench-{uuid.uuid4().hex[:8]}"
+    run_id = uuid.uuid4().hex[:8]
+    # Seeding in this process talks to the same emulator project as the app
+    os.environ["FIREBASE_PROJECT_ID"] = PROJECT_ID
+
+    from azure.storage.blob import BlobServiceClient
+    BlobServiceClient.from_connection_string(connection_string).create_container(container)
+
+    env = {
+        **os.environ,
+        "GEMINI_BASE_URL": gemini_url,
+        "GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY", "fake"),
+        "AZURE_STORAGE_CONNECTION_STRING": connection_string,
+        "AZURE_CONTAINER_NAME": container,
+        "FIREBASE_AUTH_EMULATOR_HOST": os.getenv("FIREBASE_AUTH_EMULATOR_HOST", "127.0.0.1:9099"),
+        "FIREBASE_PROJECT_ID": PROJECT_ID,
+        "JOB_DB_PATH": f"/tmp/recruitpro-bench-{run_id}/jobs.sqlite3",
+        "JOB_SPOOL_DIR": f"/tmp/recruitpro-bench-{run_id}/job_files",
+    }
+    gemini = start_process([
+        "-m", "benchmarks.fake_gemini", "--port", str(gemini_port), "--latency", str(args.gemini_latency),
+        "--jitter", str(args.gemini_jitter), "--failure-rate", str(args.gemini_failure_rate), "--seed", str(args.seed),
+    ], env)
+    app = start_process(["-m", "uvicorn", "main:app", "--port", str(app_port), "--log-level", "warning"], env)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+            "args": vars(args),
+        },
+        "sizes": {},
+    }
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency * 2)
+        async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+            await wait_ready(client, f"{gemini_url}/stats", gemini)
+            await wait_ready(client, f"{app_url}/metrics", app)
+            report["meta"]["app_idle_rss_mb"] = round(tree_rss_kb(app.pid) / 1024, 1)
+            for size in args.sizes:
+                print(f"{size} candidates per user")
+                report["sizes"][str(size)] = await benchmark_size(client, app_url, gemini_url, app.pid, size, args, run_id)
+    finally:
+        for process in (app, gemini):
+            process.terminate()
+            process.wait(timeout=30)
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        print(f"{len(regressions)} regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+        return 1 if regressions else 0
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10,1000,10000", type=lambda v: [int(s) for s in v.split(",")])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--uploads", type=int, default=40, help="resume uploads per size")
+    parser.add_argument("--jd-uploads", type=int, default=10, help="JD uploads per size")
+    parser.add_argument("--reads", type=int, default=200, help="requests per read scenario")
+    parser.add_argument("--format", choices=("txt", "pdf"), default="txt")
+    parser.add_argument("--gemini-latency", type=float, default=0.4)
+    parser.add_argument("--gemini-jitter", type=float, default=0.1)
+    parser.add_argument("--gemini-failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--out", default=None, help="write the report as JSON (e.g. benchmarks/baselines/local.json)")
+    parser.add_argument("--compare", default=None, help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    assert os.getenv("FIRESTORE_EMULATOR_HOST"), "Set FIRESTORE_EMULATOR_HOST to the emulator address"
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
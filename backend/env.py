@@ -0,0 +1,6 @@
+from dotenv import load_dotenv
+
+# Loads .env once per process. Modules that read settings at import time import
+# this instead of calling load_dotenv() themselves (each call re-searches the
+# directory tree for the file).
+load_dotenv()
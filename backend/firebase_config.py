@@ -1,12 +1,41 @@
 
-from dotenv import load_dotenv
+import env  # noqa: F401  (loads .env)
 from fastapi import  HTTPException, Request
 
 
-import os, json, firebase_admin
+import os, json, time, asyncio, hashlib, threading, firebase_admin
+from cachetools import LRUCache
 from firebase_admin import credentials, firestore,auth
-load_dotenv()
+from google.auth.credentials import AnonymousCredentials
+from services import metrics
+
+# Verified ID tokens are reused until the token's exp or the max age, whichever
+# comes first. With AUTH_CHECK_REVOKED the max age is how long a revoked
+# session can keep working; AUTH_TOKEN_CACHE_SIZE=0 verifies every request.
+AUTH_CHECK_REVOKED = os.getenv("AUTH_CHECK_REVOKED", "false").lower() == "true"
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "4096"))
+AUTH_TOKEN_CACHE_MAX_AGE_SECONDS = int(
+    os.getenv("AUTH_TOKEN_CACHE_MAX_AGE_SECONDS", "60" if AUTH_CHECK_REVOKED else "300")
+)
+
+_init_lock = threading.Lock()
+_db = None
+_token_cache = LRUCache(maxsize=max(AUTH_TOKEN_CACHE_SIZE, 1))
+_token_lock = threading.Lock()
+token_cache_stats = {"hits": 0, "misses": 0}
+
+
+class EmulatorCredential(credentials.Base):
+    # The Firestore emulator accepts unauthenticated requests
+    def get_credential(self):
+        return AnonymousCredentials()
+
 def initialize_firebase():
+    with _init_lock:
+        _initialize_firebase()
+
+
+def _initialize_firebase():
     # Skip if an app is already initialized
     try:
         firebase_admin.get_app()
@@ -19,6 +48,12 @@ def initialize_firebase():
 
     if raw_json:
         cred = credentials.Certificate(json.loads(raw_json))
+    elif os.getenv("FIRESTORE_EMULATOR_HOST") and not os.path.exists(local_path):
+        firebase_admin.initialize_app(
+            EmulatorCredential(),
+            {"projectId": os.getenv("FIREBASE_PROJECT_ID", "demo-recruitpro")}
+        )
+        return
     else:
         if not os.path.exists(local_path):
             raise FileNotFoundError(f"Firebase credential file not found at {local_path}")
@@ -26,26 +61,81 @@ def initialize_firebase():
 
     firebase_admin.initialize_app(cred)
 
-initialize_firebase()
-db = firestore.client()
+def get_db():
+    # Created on first use rather than at import, so a cold start that never
+    # touches Firestore doesn't pay for credential loading and client setup.
+    global _db
+    if _db is None:
+        initialize_firebase()
+        with _init_lock:
+            if _db is None:
+                _db = firestore.client()
+    return _db
+
+
+class LazyFirestoreClient:
+    # Stand-in for the client so `from firebase_config import db` keeps working
+    def __getattr__(self, name):
+        return getattr(get_db(), name)
 
 
+db = LazyFirestoreClient()
 
 
-def verify_firebase_token(request: Request):
+
+
+def _bearer_token(request: Request) -> str:
     auth_header = request.headers.get("authorization")
 
     if not auth_header or not auth_header.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing or invalid Authorization header")
 
-    id_token = auth_header.split("Bearer ")[1]
+    return auth_header.split("Bearer ")[1]
+
+
+def _token_key(id_token: str) -> bytes:
+    # Keyed by hash so raw tokens are never kept in memory longer than the request
+    return hashlib.sha256(id_token.encode("utf-8")).digest()
+
 
+def _cached_token(id_token: str):
+    if AUTH_TOKEN_CACHE_SIZE <= 0:
+        return None
+    with _token_lock:
+        entry = _token_cache.get(_token_key(id_token))
+        if entry is not None and entry[1] > time.time():
+            token_cache_stats["hits"] += 1
+            return entry[0]
+        token_cache_stats["misses"] += 1
+    return None
+
+
+def _verify_and_cache(id_token: str) -> dict:
+    initialize_firebase()
     try:
-        decoded_token = auth.verify_id_token(id_token)
-        return decoded_token["uid"]
+        decoded_token = auth.verify_id_token(id_token, check_revoked=AUTH_CHECK_REVOKED)
     except auth.ExpiredIdTokenError:
         raise HTTPException(status_code=401, detail="Expired Firebase token")
+    except auth.RevokedIdTokenError:
+        raise HTTPException(status_code=401, detail="Revoked Firebase token")
     except auth.InvalidIdTokenError:
         raise HTTPException(status_code=401, detail="Invalid Firebase token")
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
+
+    if AUTH_TOKEN_CACHE_SIZE > 0:
+        expires_at = min(decoded_token["exp"], time.time() + AUTH_TOKEN_CACHE_MAX_AGE_SECONDS)
+        with _token_lock:
+            _token_cache[_token_key(id_token)] = (decoded_token, expires_at)
+    return decoded_token
+
+
+async def get_current_uid(request: Request) -> str:
+    # FastAPI dependency: cache hits are answered on the event loop, while a
+    # full verification (RSA check, occasional certificate fetch) runs in a thread.
+    id_token = _bearer_token(request)
+    decoded_token = _cached_token(id_token)
+    if decoded_token is None:
+        decoded_token = await asyncio.to_thread(_verify_and_cache, id_token)
+    metrics.set_user(decoded_token["uid"])
+    return decoded_token["uid"]
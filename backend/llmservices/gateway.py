@@ -0,0 +1,262 @@
+import asyncio
+import hashlib
+import os
+import random
+import time
+import httpx
+import env  # noqa: F401  (loads .env)
+from services import metrics
+from google import genai
+from google.genai import errors
+from google.genai.types import CreateCachedContentConfig, GenerateContentConfig, HttpOptions
+
+DEFAULT_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "1000"))
+TOKENS_PER_MINUTE = int(os.getenv("GEMINI_TOKENS_PER_MINUTE", "1000000"))
+CALL_TIMEOUT_SECONDS = float(os.getenv("GEMINI_CALL_TIMEOUT_SECONDS", "120"))
+MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", "4"))
+RETRY_BUDGET_RATIO = float(os.getenv("GEMINI_RETRY_BUDGET_RATIO", "0.1"))
+RETRY_BUDGET_MIN = int(os.getenv("GEMINI_RETRY_BUDGET_MIN", "10"))
+MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", "32"))
+# Explicit context caching for static prompt prefixes; a TTL of 0 disables it.
+# Prefixes below the model's minimum cacheable size are always sent inline.
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+CONTEXT_CACHE_REFRESH_SECONDS = 60
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+# A cached_content reference that expired or was deleted server-side
+STALE_CACHE_STATUS_CODES = {403, 404}
+
+stats = {
+    "calls": 0,
+    "retries": 0,
+    "prompt_tokens": 0,
+    "cached_tokens": 0,
+    "context_cache_creates": 0,
+    "context_cache_failures": 0,
+}
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1):
+        # Requests larger than the bucket are clamped so they can still run
+        amount = min(amount, self.capacity)
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.refill_per_second)
+
+
+class RetryBudget:
+    # Every call deposits a fraction of a retry; a retry spends a whole one.
+    # This caps retries to a share of traffic so an outage can't multiply load.
+    # The balance never exceeds minimum, so a long quiet period can't bank
+    # more than that many retries for the next outage.
+    def __init__(self, ratio: float, minimum: int):
+        self.ratio = ratio
+        self.cap = float(minimum)
+        self.balance = self.cap
+
+    def deposit(self):
+        self.balance = min(self.cap, self.balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+
+def estimate_tokens(contents) -> int:
+    if isinstance(contents, (list, tuple)):
+        return sum(estimate_tokens(c) for c in contents)
+    if isinstance(contents, str):
+        return len(contents) // 4 + 1
+    text = getattr(contents, "text", None)
+    if text:
+        return len(text) // 4 + 1
+    inline_data = getattr(contents, "inline_data", None)
+    if inline_data is not None and inline_data.data:
+        # Rough figure for binary documents (PDF pages are billed as images)
+        return len(inline_data.data) // 100 + 258
+    return 1
+
+
+class GeminiBackend:
+    def __init__(self, base_url: str = None):
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+        )
+        # Passing a transport makes the SDK use one pooled httpx client
+        # instead of opening a new aiohttp session per request.
+        self.client = genai.Client(
+            api_key=os.getenv("GOOGLE_API_KEY"),
+            http_options=HttpOptions(
+                base_url=base_url or os.getenv("GEMINI_BASE_URL"),
+                async_client_args={"transport": transport},
+            ),
+        )
+
+    async def generate_content(self, model, contents, config=None):
+        return await self.client.aio.models.generate_content(model=model, contents=contents, config=config)
+
+    async def create_cached_content(self, model, display_name, system_instruction, ttl_seconds):
+        cache = await self.client.aio.caches.create(
+            model=model,
+            config=CreateCachedContentConfig(
+                display_name=display_name,
+                system_instruction=system_instruction,
+                ttl=f"{ttl_seconds}s",
+            ),
+        )
+        return cache.name
+
+
+class StaticPrefix:
+    # Instruction text that is identical for every call of one kind. Built once
+    # at import; the version changes whenever the text does.
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.text = text
+        self.version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        self.tokens = estimate_tokens(text)
+
+
+_backend = None
+# (model, prefix version) -> (cache name or None, expires_at)
+_context_caches = {}
+_context_cache_locks = {}
+request_bucket = TokenBucket(REQUESTS_PER_MINUTE, REQUESTS_PER_MINUTE / 60)
+token_bucket = TokenBucket(TOKENS_PER_MINUTE, TOKENS_PER_MINUTE / 60)
+retry_budget = RetryBudget(RETRY_BUDGET_RATIO, RETRY_BUDGET_MIN)
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = GeminiBackend()
+    return _backend
+
+
+def set_backend(backend):
+    # Any object with an async generate_content(model, contents, config) works,
+    # e.g. GeminiBackend(base_url="http://localhost:8089") for a fake server.
+    global _backend
+    _backend = backend
+    _context_caches.clear()
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS_CODES
+    return isinstance(error, httpx.TransportError)
+
+
+def _record_usage(response, model: str):
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        stats["prompt_tokens"] += usage.prompt_token_count or 0
+        stats["cached_tokens"] += usage.cached_content_token_count or 0
+        metrics.inc("gemini_input_tokens", usage.prompt_token_count or 0, model=model)
+        metrics.inc("gemini_output_tokens", usage.candidates_token_count or 0, model=model)
+        metrics.inc("gemini_cached_tokens", usage.cached_content_token_count or 0, model=model)
+
+
+async def generate_content(contents, config=None, model: str = None, timeout: float = None):
+    backend = get_backend()
+    retry_budget.deposit()
+    tokens = estimate_tokens(contents)
+    if getattr(config, "system_instruction", None):
+        tokens += estimate_tokens(config.system_instruction)
+
+    model = model or DEFAULT_MODEL
+    for attempt in range(MAX_ATTEMPTS):
+        await request_bucket.acquire()
+        await token_bucket.acquire(tokens)
+        stats["calls"] += 1
+        try:
+            response = await asyncio.wait_for(
+                backend.generate_content(model, contents, config),
+                timeout=timeout or CALL_TIMEOUT_SECONDS,
+            )
+            _record_usage(response, model)
+            return response
+        except Exception as e:
+            if attempt == MAX_ATTEMPTS - 1 or not is_retryable(e) or not retry_budget.withdraw():
+                raise
+            stats["retries"] += 1
+            metrics.inc("gemini_retries", model=model)
+            # Full jitter exponential backoff
+            await asyncio.sleep(random.uniform(0, min(30, 0.5 * 2 ** attempt)))
+
+
+async def _context_cache_name(prefix: StaticPrefix, model: str):
+    backend = get_backend()
+    if (
+        CONTEXT_CACHE_TTL_SECONDS <= 0
+        or prefix.tokens < CONTEXT_CACHE_MIN_TOKENS
+        or not hasattr(backend, "create_cached_content")
+    ):
+        return None
+
+    key = (model, prefix.version)
+    entry = _context_caches.get(key)
+    if entry and entry[1] - CONTEXT_CACHE_REFRESH_SECONDS > time.monotonic():
+        return entry[0]
+
+    lock = _context_cache_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        entry = _context_caches.get(key)
+        if entry and entry[1] - CONTEXT_CACHE_REFRESH_SECONDS > time.monotonic():
+            return entry[0]
+        try:
+            name = await backend.create_cached_content(
+                model, f"{prefix.name}-{prefix.version}", prefix.text, CONTEXT_CACHE_TTL_SECONDS
+            )
+            stats["context_cache_creates"] += 1
+        except Exception:
+            # Model without explicit caching, prefix under its minimum size, quota...
+            # Fall back to inline instructions and try again after one TTL.
+            name = None
+            stats["context_cache_failures"] += 1
+        _context_caches[key] = (name, time.monotonic() + CONTEXT_CACHE_TTL_SECONDS)
+        return name
+
+
+async def generate_with_prefix(prefix: StaticPrefix, contents, config=None, model: str = None, timeout: float = None):
+    # The prefix becomes the system instruction: served from the explicit context
+    # cache when available (only the per-call contents are then billed at the full
+    # rate), otherwise sent inline with the request.
+    model = model or DEFAULT_MODEL
+    config = config or GenerateContentConfig()
+    cache_name = await _context_cache_name(prefix, model)
+    if cache_name:
+        try:
+            return await generate_content(
+                contents, config.model_copy(update={"cached_content": cache_name}), model, timeout
+            )
+        except errors.APIError as e:
+            if e.code not in STALE_CACHE_STATUS_CODES:
+                raise
+            _context_caches.pop((model, prefix.version), None)
+    return await generate_content(
+        contents, config.model_copy(update={"system_instruction": prefix.text}), model, timeout
+    )
@@ -0,0 +1,40 @@
+import hashlib
+import json
+import os
+import threading
+from cachetools import TTLCache
+
+SCORE_CACHE_SIZE = int(os.getenv("SCORE_CACHE_SIZE", "20000"))
+SCORE_CACHE_TTL_SECONDS = int(os.getenv("SCORE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Storage and identity fields don't affect the score, so they are left out of fingerprints
+IDENTITY_FIELDS = {"uid", "candidate_id", "jd_id", "resume_url", "jd_url", "content_sha256", "id"}
+
+_cache = TTLCache(maxsize=SCORE_CACHE_SIZE, ttl=SCORE_CACHE_TTL_SECONDS)
+_lock = threading.Lock()
+
+stats = {"hits": 0, "misses": 0, "llm_calls": 0, "llm_calls_saved": 0}
+
+
+def fingerprint(data) -> str:
+    if isinstance(data, dict):
+        data = {k: v for k, v in data.items() if k not in IDENTITY_FIELDS}
+    canonical = json.dumps(data, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def get_cached_score(jd_fingerprint: str, candidate_fingerprint: str, prompt_version: str):
+    with _lock:
+        result = _cache.get((jd_fingerprint, candidate_fingerprint, prompt_version))
+        stats["hits" if result is not None else "misses"] += 1
+    return dict(result) if result is not None else None
+
+
+def put_cached_score(jd_fingerprint: str, candidate_fingerprint: str, prompt_version: str, result: dict):
+    with _lock:
+        _cache[(jd_fingerprint, candidate_fingerprint, prompt_version)] = dict(result)
+
+
+def record_llm_call(saved: bool):
+    with _lock:
+        stats["llm_calls_saved" if saved else "llm_calls"] += 1
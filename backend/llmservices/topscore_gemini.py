@@ -1,17 +1,41 @@
+import asyncio
 import os
 import json
-from dotenv import load_dotenv
+import env  # noqa: F401  (loads .env)
 from typing import List, Dict
-from google import genai
 from google.genai.types import GenerateContentConfig
-load_dotenv()
-client = genai.Client(api_key="GEMINI_API_KEY")
+from llmservices.gateway import StaticPrefix, estimate_tokens, generate_with_prefix
+from llmservices.score_cache import fingerprint, get_cached_score, put_cached_score, record_llm_call
 
-client = genai.Client()
+# Batch planner budgets: prompt tokens per call, and response tokens per call
+# (SCORING_OUTPUT_TOKENS_PER_CANDIDATE each), so a large JD match never
+# overflows the model's output limit.
+BATCH_INPUT_TOKENS = int(os.getenv("SCORING_BATCH_INPUT_TOKENS", "30000"))
+BATCH_OUTPUT_TOKENS = int(os.getenv("SCORING_BATCH_OUTPUT_TOKENS", "8000"))
+OUTPUT_TOKENS_PER_CANDIDATE = int(os.getenv("SCORING_OUTPUT_TOKENS_PER_CANDIDATE", "450"))
+BATCH_CONCURRENCY = int(os.getenv("SCORING_BATCH_CONCURRENCY", "4"))
+BATCH_ATTEMPTS = int(os.getenv("SCORING_BATCH_ATTEMPTS", "2"))
+# Calls in flight when one new candidate is scored against its matching JDs
+# and the caller passes no gate of its own
+FANOUT_CONCURRENCY = int(os.getenv("SCORING_FANOUT_CONCURRENCY", "8"))
+
+# What the rubric actually looks at; everything else stays out of the prompt
+CANDIDATE_SCORING_FIELDS = (
+    "candidate_id", "name", "designation", "experience", "education", "technical_skills",
+    "certifications", "key_achievements", "projects", "professional_summary",
+)
+JD_SCORING_FIELDS = (
+    "jobtitle", "company", "location", "required_experience", "job_type", "required_skills",
+    "responsibilities", "qualifications", "description",
+)
+# Result field -> source candidate field, copied over instead of trusting the model's echo
+RESTAMP_FIELDS = {
+    "uid": "uid", "candidate_id": "candidate_id", "resume_url": "resume_url",
+    "email": "email", "contact": "contact_number",
+}
 
 
-def analyze_multiple_resumes_structured(job_text: str, candidates: List[Dict]) -> List[Dict]:
-    response_schema = {
+SCORING_RESPONSE_SCHEMA = {
   "type": "array",
   "items": {
     "type": "object",
@@ -64,20 +88,15 @@ def analyze_multiple_resumes_structured(job_text: str, candidates: List[Dict]) -
   }
 }
 
-
-    
-    prompt = f"""
+# Static rubric: identical for every call, so it is served from the context cache.
+# Only SCORING_PAYLOAD_TEMPLATE (job + candidates) changes per call.
+SCORING_INSTRUCTIONS = """
 You are an expert recruitment analyst. Given a job description and a candidate resume, evaluate how well the candidate matches the role 
 across key hiring dimensions: Skills, Experience, Education, and Certifications. For each section, extract relevant information from the
 resume and score the match against the job requirements from 0–100.
 using structured output.
 Only return valid JSON list. Do not include markdown or commentary.
-
-Job Description:
-{job_text}
-
-Candidate Resumes:
-{json.dumps(candidates, indent=2)}
+The job description and the candidate resumes are provided in the request.
 
 Instructions:
 For each candidate, evaluate the following:
@@ -125,20 +144,180 @@ Output Format: Return a list of candidate evaluation objects matching the predef
 
     """
 
-    try:
-        response = client.models.generate_content(
+SCORING_PAYLOAD_TEMPLATE = """Job Description:
+{job_text}
+
+Candidate Resumes:
+{candidates_json}
+"""
+
+SCORING_PREFIX = StaticPrefix("candidate-scoring", SCORING_INSTRUCTIONS)
+SCORING_PROMPT_VERSION = fingerprint([
+    SCORING_INSTRUCTIONS, SCORING_PAYLOAD_TEMPLATE, SCORING_RESPONSE_SCHEMA,
+    CANDIDATE_SCORING_FIELDS, JD_SCORING_FIELDS,
+])
+
+
+def _compact_json(data) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def project_candidate(candidate: Dict) -> Dict:
+    return {k: candidate[k] for k in CANDIDATE_SCORING_FIELDS if candidate.get(k) not in (None, "", [])}
+
+
+def project_job(job) -> str:
+    if isinstance(job, dict):
+        return _compact_json({k: job[k] for k in JD_SCORING_FIELDS if job.get(k) not in (None, "", [])})
+    return str(job)
+
+
+def _restamp(result: Dict, candidate: Dict) -> Dict:
+    for target, source in RESTAMP_FIELDS.items():
+        if candidate.get(source) is not None:
+            result[target] = candidate[source]
+    return result
+
+
+def plan_batches(job_json: str, items: List[tuple]) -> List[List[tuple]]:
+    # items are (candidate_id, compact candidate JSON). Greedy packing in input
+    # order; a candidate larger than the whole budget still gets its own batch.
+    base_tokens = SCORING_PREFIX.tokens + estimate_tokens(SCORING_PAYLOAD_TEMPLATE) + estimate_tokens(job_json)
+    max_candidates = max(1, BATCH_OUTPUT_TOKENS // OUTPUT_TOKENS_PER_CANDIDATE)
+    batches, current, used = [], [], base_tokens
+    for item in items:
+        tokens = estimate_tokens(item[1]) + 1
+        if current and (used + tokens > BATCH_INPUT_TOKENS or len(current) >= max_candidates):
+            batches.append(current)
+            current, used = [], base_tokens
+        current.append(item)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def _score_batch(job_json: str, batch: List[tuple], gate: asyncio.Semaphore) -> Dict:
+    payload = SCORING_PAYLOAD_TEMPLATE.format(
+        job_text=job_json,
+        candidates_json="[" + ",".join(serialized for _, serialized in batch) + "]"
+    )
+    async with gate:
+        record_llm_call(saved=False)
+        response = await generate_with_prefix(
+            SCORING_PREFIX,
             model="gemini-2.0-flash",
-            contents=prompt,
+            contents=payload,
             config=GenerateContentConfig(
                 response_mime_type="application/json",
-                response_schema=response_schema 
+                response_schema=SCORING_RESPONSE_SCHEMA,
+                max_output_tokens=BATCH_OUTPUT_TOKENS
             ),
         )
-        parsed = response.parsed 
-        return parsed
+    parsed = response.parsed
+    if not isinstance(parsed, list):
+        # Truncated or malformed output
+        raise ValueError("Scoring response is not a JSON list")
+    batch_ids = {candidate_id for candidate_id, _ in batch}
+    return {
+        result["candidate_id"]: result
+        for result in parsed
+        if isinstance(result, dict) and result.get("candidate_id") in batch_ids
+    }
+
+
+async def _score_with_fallback(job_json: str, batch: List[tuple], gate: asyncio.Semaphore, attempt: int = 1) -> Dict:
+    # A batch whose output was truncated or malformed is bisected, candidates
+    # the model skipped are re-sent on their own, and a single candidate that
+    # keeps failing gets an error entry; one bad resume never costs the rest of
+    # the JD its scores. Other errors (quota, unavailable, timeouts) were
+    # already retried by the gateway: re-sending smaller batches would only
+    # multiply the load, so the batch fails as a whole.
+    try:
+        results, error = await _score_batch(job_json, batch, gate), None
+    except ValueError as e:
+        # Also covers JSON decode and response schema validation errors
+        results, error = {}, e
     except Exception as e:
-        return [{
-            "error": str(e),
-            "raw_candidates": candidates[:2] 
-        }]
+        return {candidate_id: {"candidate_id": candidate_id, "error": str(e)} for candidate_id, _ in batch}
+
+    missing = [item for item in batch if item[0] not in results]
+    if not missing:
+        return results
+
+    if len(missing) == 1:
+        if attempt < BATCH_ATTEMPTS:
+            return {**results, **await _score_with_fallback(job_json, missing, gate, attempt + 1)}
+        candidate_id = missing[0][0]
+        results[candidate_id] = {
+            "candidate_id": candidate_id,
+            "error": str(error) if error else "No score returned for candidate"
+        }
+        return results
+
+    if len(missing) < len(batch):
+        groups = [missing]
+    else:
+        middle = len(missing) // 2
+        groups = [missing[:middle], missing[middle:]]
+    for part in await asyncio.gather(*(_score_with_fallback(job_json, group, gate, attempt) for group in groups)):
+        results.update(part)
+    return results
+
+
+async def analyze_multiple_resumes_structured(job_text, candidates: List[Dict], gate: asyncio.Semaphore = None) -> List[Dict]:
+    # job_text is the JD document (dict) or its plain text. Returns one result per
+    # candidate; candidates that could not be scored come back as
+    # {"candidate_id", "error"}. gate caps calls in flight; pass one in to share
+    # it across several JDs.
+    # Keyed on what the prompt sees (JD_SCORING_FIELDS), like the candidate
+    # side, so storage fields and re-uploads of the same JD still hit
+    job_json = project_job(job_text)
+    jd_fingerprint = fingerprint(job_json)
+    cached_results = []
+    pending = {}
+    for candidate in candidates:
+        projected = project_candidate(candidate)
+        candidate_fingerprint = fingerprint(projected)
+        cached = get_cached_score(jd_fingerprint, candidate_fingerprint, SCORING_PROMPT_VERSION)
+        if cached:
+            # Identical content may belong to a different upload, so re-stamp identity fields
+            cached_results.append(_restamp(cached, candidate))
+        else:
+            pending[candidate.get("candidate_id")] = (candidate, candidate_fingerprint, _compact_json(projected))
+
+    if not pending:
+        record_llm_call(saved=True)
+        return cached_results
+
+    gate = gate or asyncio.Semaphore(BATCH_CONCURRENCY)
+    batches = plan_batches(job_json, [(candidate_id, entry[2]) for candidate_id, entry in pending.items()])
+    merged = {}
+    for part in await asyncio.gather(*(_score_with_fallback(job_json, batch, gate) for batch in batches)):
+        merged.update(part)
+
+    results = []
+    for candidate_id, (candidate, candidate_fingerprint, _) in pending.items():
+        result = merged[candidate_id]
+        if "error" not in result:
+            _restamp(result, candidate)
+            put_cached_score(jd_fingerprint, candidate_fingerprint, SCORING_PROMPT_VERSION, result)
+        results.append(result)
+    return cached_results + results
+
+
+async def score_candidate_against_jds(jobs: List[tuple], candidate: Dict, gate: asyncio.Semaphore = None) -> Dict:
+    # jobs are (jd_id, JD document). Per-JD calls run concurrently under one
+    # shared gate, held per Gemini call; each still goes through the score
+    # cache and the batch fallback. Returns {jd_id: result}, with an error
+    # entry for failed JDs.
+    gate = gate or asyncio.Semaphore(FANOUT_CONCURRENCY)
+
+    async def score_one(jd_id, jd_data):
+        try:
+            results = await analyze_multiple_resumes_structured(jd_data, [candidate], gate)
+        except Exception as e:
+            results = [{"candidate_id": candidate.get("candidate_id"), "error": str(e)}]
+        return jd_id, results[0]
 
+    return dict(await asyncio.gather(*(score_one(jd_id, jd_data) for jd_id, jd_data in jobs)))
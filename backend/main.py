@@ -1,17 +1,54 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import asyncio
 import os
-from dotenv import load_dotenv
+import env  # noqa: F401  (loads .env)
 from routers import job_description
 from routers import score_weights
 from routers import candidates
 from routers import topscore
-load_dotenv()
-app = FastAPI()
+from routers import jobs
+from routers import metrics
+from services.metrics import MetricsMiddleware
+from services.jobs import start_workers, stop_workers
+from services.parsing_service import shutdown_parser_pool
+from firebase_config import get_db
+from storage.azure import get_blob_service_client, get_async_container_client, close_async_client
+from llmservices.gateway import get_backend
+
+# Clients are created on first use; set PREWARM_CLIENTS=true to create them
+# during startup instead (slower start, no setup cost on the first request).
+PREWARM_CLIENTS = os.getenv("PREWARM_CLIENTS", "false").lower() == "true"
+
+
+def prewarm_clients():
+    get_db()
+    get_blob_service_client()
+    get_backend()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if PREWARM_CLIENTS:
+        await asyncio.to_thread(prewarm_clients)
+        get_async_container_client()
+    # Background ingestion workers for ?mode=async uploads
+    workers = start_workers()
+    yield
+    await stop_workers(workers)
+    shutdown_parser_pool()
+    await close_async_client()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(candidates.router,prefix="/api")
 app.include_router(job_description.router,prefix="/api")
 app.include_router(topscore.router,prefix="/api")
 app.include_router(score_weights.router,prefix="/api")
+app.include_router(jobs.router,prefix="/api")
+# Prometheus scrape endpoint, outside /api
+app.include_router(metrics.router)
 
 origins_raw = os.getenv("ALLOWED_ORIGINS", "")
 origins = [o.strip() for o in origins_raw.split(",") if o.strip()]
@@ -22,3 +59,5 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added last so it wraps CORS too and times the whole request
+app.add_middleware(MetricsMiddleware)
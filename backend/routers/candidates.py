@@ -1,27 +1,43 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Request
-from firebase_config import verify_firebase_token, db
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Query, Depends
+from fastapi.responses import JSONResponse
+from firebase_config import get_current_uid, db
 from pydantic import BaseModel, Field
 from typing import List, Optional
-from google import genai
-import os
-from services.parser import extract_text_from_docx
+from services.parsing_service import parse_document
+from services.prerank import candidate_term_vector
+from services import metrics
 import json
-from dotenv import load_dotenv
+import env  # noqa: F401  (loads .env)
 import re
-from urllib.parse import urlparse
 from google.genai.types import GenerateContentConfig,Part
 import uuid
-from storage.azure import upload_resume_to_azure,delete_resume_from_azure
-from llmservices.topscore_gemini import analyze_multiple_resumes_structured
-from services.scoring import calculate_total_score
-from storage.firestore import save_candidate_topscore_to_firestore
+from storage.azure import upload_stream_to_azure, hash_upload, blob_exists, blob_name_for, blob_name_from_url
+from llmservices.topscore_gemini import score_candidate_against_jds
+from llmservices.gateway import StaticPrefix, generate_with_prefix
+from services.scoring import calculate_total_scores
+from storage.firestore import save_candidate_scores_to_firestore, get_documents, set_document
 from services.scoring import initialize_user_weights
-load_dotenv()
+from services.pipeline import run_pipeline, run_stage, iter_pipeline, stage_limits
+from services.streaming import negotiate_stream, detach_uploads, stream_results, stream_events
+from services.deletion import MAX_BULK_DELETE, cascade_delete, run_cascade_delete
+from services.jobs import create_job, register_processor
+from storage.pagination import fetch_page, MAX_PAGE_SIZE
+from storage.skill_index import index_skills, find_overlaps
+from storage.versions import get_version, version_write
+from services.responses import json_response, make_etag, not_modified
+from storage.extraction_cache import extraction_version, extraction_cache_key, get_cached_extraction, put_cached_extraction, drop_cached_extraction
 
-client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
 
 router = APIRouter()
 
+# Stored on the candidate document for the JD-side pre-ranker only; never
+# part of an API response
+INTERNAL_FIELDS = ("term_vector",)
+
+
+def _public(candidate: dict) -> dict:
+    return {k: v for k, v in candidate.items() if k not in INTERNAL_FIELDS}
+
 class Education(BaseModel):
     degree: str
     institution: str
@@ -46,76 +62,120 @@ class Candidate(BaseModel):
     professional_summary: str
 
 
+CANDIDATE_EXTRACTION_PROMPT = f"""You are an intelligent information extraction engine. Your task is to extract structured candidate information from the uploaded resume document.
+
+Return only valid JSON matching this schema:
+{Candidate.schema_json(indent=2)}
+### General Instructions:
+- Read the resume carefully and extract accurate data for each field.
+- Use only the information present in the resume. **Do not guess or hallucinate**.
+- If a field is not found, set it to null or an empty list as appropriate.
+- Ensure the final output is strictly valid JSON.
+
+### Field-Level Guidelines:
+- **name**: Full name of the candidate. Usually found at the top or in the contact section.
+- **designation**: Current or most recent job title (e.g., "Senior Software Engineer").
+- **experience**: Total **professional experience in years**, as a float (e.g., 4.5).
+- **contact_number**: Candidate’s phone number.
+- **email**: Candidate’s email address.
+- **location**: Candidate’s **current location or address**. Usually found in the header, contact section, or email signature.
+    - If the candidate's current city or address is explicitly mentioned, extract it.
+    - **Do not use** locations from past job roles or university locations unless clearly stated as the current location.
+- **education**: Extract a list of degrees with:
+    - Degree title (e.g., B.Tech, M.Sc)
+    - Field of study (e.g., Computer Science)
+    - Institution name
+    - Graduation year if available
+- **technical_skills**: List of technologies, programming languages, tools, or frameworks mentioned.
+- **key_achievements**: Bullet points or sentences indicating major professional accomplishments or recognitions.
+- **certifications**: Any relevant professional certifications or completed courses (e.g., AWS Certified Developer).
+- **projects**: List of key projects with:
+    - Title
+    - Description (concise summary of what the project does) if not available not include DECLARATION
+    - Technologies used (if mentioned)
+- **professional_summary**: The summary or objective section—usually at the top. Should be concise and written in first or third person.
+Return only valid and well-formatted JSON that matches the schema above.
+
+"""
+CANDIDATE_EXTRACTION_VERSION = extraction_version(CANDIDATE_EXTRACTION_PROMPT, Candidate)
+CANDIDATE_EXTRACTION_PREFIX = StaticPrefix("candidate-extraction", CANDIDATE_EXTRACTION_PROMPT)
+
+
 @router.post("/candidate-resume")
 async def candidate_resumes(
     request: Request,
-    resumes: List[UploadFile] = File(...)
+    resumes: List[UploadFile] = File(...),
+    mode: str = Query("sync", pattern="^(sync|async)$"),
+    uid: str = Depends(get_current_uid)
 ):  
-    uid = verify_firebase_token(request)
-    results = []
-    initialize_user_weights(uid)
-
-    for resume in resumes:
-        try:
-            resume_bytes = await resume.read()
-            candidate_id = str(uuid.uuid4())
-            resume_url = upload_resume_to_azure(
+    await run_stage("firestore", initialize_user_weights, uid)
+
+    if mode == "async":
+        job_id = await create_job(uid, "candidate-resume", resumes)
+        return JSONResponse(status_code=202, content={
+            "status": "queued", "uid": uid, "job_id": job_id, "status_url": f"/api/jobs/{job_id}"
+        })
+
+    stream_type = negotiate_stream(request)
+    if stream_type:
+        uploads = await detach_uploads(resumes)
+        return stream_results(
+            stream_type,
+            iter_pipeline(uploads, lambda resume: process_resume(uid, resume)),
+            uploads,
+            {"uid": uid}
+        )
+
+    results = await run_pipeline(resumes, lambda resume: process_resume(uid, resume))
+
+    return {"status": "completed", "uid": uid, "results": results}
+
+
+async def process_resume(uid: str, resume: UploadFile) -> dict:
+    try:
+        candidate_id = str(uuid.uuid4())
+        content_sha256 = await hash_upload(resume)
+        cache_key = extraction_cache_key(content_sha256, CANDIDATE_EXTRACTION_VERSION)
+        cached = await run_stage("firestore", get_cached_extraction, uid, cache_key)
+        if cached and not await run_stage(
+            "azure", blob_exists, cached.get("blob_name") or blob_name_from_url(cached["blob_url"])
+        ):
+            # The blob was deleted after this entry was cached: extract afresh
+            await run_stage("firestore", drop_cached_extraction, uid, cache_key)
+            cached = None
+
+        if cached:
+            # Same file already extracted with the current prompt: reuse blob and data
+            candidate_dict = dict(cached["data"])
+            resume_url = cached["blob_url"]
+            blob_name = cached.get("blob_name") or blob_name_from_url(resume_url)
+        else:
+            blob_name = blob_name_for(uid, candidate_id, resume.filename)
+            resume_url = await run_stage(
+                "azure", upload_stream_to_azure,
                 uid=uid, candidate_id=candidate_id,
                 filename=resume.filename,
-                content=resume_bytes,
+                upload=resume,
                 content_type=resume.content_type or "application/pdf"
             )
-            if resume.filename.lower().endswith(".docx") or resume.content_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                extracted_text = extract_text_from_docx(resume_bytes)
-
-                file_part = Part.from_text(extracted_text)
-            else:  
+            # Local text (DOCX/RTF/TXT, PDF text layer) parsed off the event loop,
+            # streamed to the parser from the spooled upload
+            document_text = await parse_document(resume.file, resume.filename, resume.content_type)
+            if document_text is not None:
+                file_part = Part.from_text(text=document_text)
+            else:
+                # Scanned PDFs and other formats go to Gemini inline: the only
+                # path that reads the whole file into memory
+                await resume.seek(0)
                 file_part = Part.from_bytes(
-                    data=resume_bytes,
+                    data=await resume.read(),
                     mime_type=resume.content_type or "application/pdf"
                 )
 
-
-            candidate_schema_json = Candidate.schema_json(indent=2)
-            prompt = f"""You are an intelligent information extraction engine. Your task is to extract structured candidate information from the uploaded resume document.
-
-            Return only valid JSON matching this schema:
-            {candidate_schema_json}
-            ### General Instructions:
-            - Read the resume carefully and extract accurate data for each field.
-            - Use only the information present in the resume. **Do not guess or hallucinate**.
-            - If a field is not found, set it to null or an empty list as appropriate.
-            - Ensure the final output is strictly valid JSON.
-
-            ### Field-Level Guidelines:
-            - **name**: Full name of the candidate. Usually found at the top or in the contact section.
-            - **designation**: Current or most recent job title (e.g., "Senior Software Engineer").
-            - **experience**: Total **professional experience in years**, as a float (e.g., 4.5).
-            - **contact_number**: Candidate’s phone number.
-            - **email**: Candidate’s email address.
-            - **location**: Candidate’s **current location or address**. Usually found in the header, contact section, or email signature.
-                - If the candidate's current city or address is explicitly mentioned, extract it.
-                - **Do not use** locations from past job roles or university locations unless clearly stated as the current location.
-            - **education**: Extract a list of degrees with:
-                - Degree title (e.g., B.Tech, M.Sc)
-                - Field of study (e.g., Computer Science)
-                - Institution name
-                - Graduation year if available
-            - **technical_skills**: List of technologies, programming languages, tools, or frameworks mentioned.
-            - **key_achievements**: Bullet points or sentences indicating major professional accomplishments or recognitions.
-            - **certifications**: Any relevant professional certifications or completed courses (e.g., AWS Certified Developer).
-            - **projects**: List of key projects with:
-                - Title
-                - Description (concise summary of what the project does) if not available not include DECLARATION
-                - Technologies used (if mentioned)
-            - **professional_summary**: The summary or objective section—usually at the top. Should be concise and written in first or third person.
-            Return only valid and well-formatted JSON that matches the schema above.
-
-            """
-
-            response = await client.aio.models.generate_content(
+            response = await run_stage(
+                "gemini", generate_with_prefix, CANDIDATE_EXTRACTION_PREFIX,
                 model="gemini-2.0-flash",
-                contents=[file_part, prompt],
+                contents=[file_part],
                 config=GenerateContentConfig(
                     response_mime_type="application/json",
                     response_schema=Candidate,
@@ -129,78 +189,110 @@ async def candidate_resumes(
             else:
                 candidate_dict = json.loads(response.text)
 
-            candidate_dict.update({
-                "uid": uid,
-                "candidate_id": candidate_id,
-                "resume_url": resume_url
-            })
-
-            db.collection("users").document(uid) \
-              .collection("candidates").document(candidate_id) \
-              .set(candidate_dict)
-            def has_skill_overlap(jd_skills, candidate_skills, min_overlap=2):
-                return len(set(jd_skills).intersection(set(candidate_skills))) >= min_overlap
-            
-            jd_ref = db.collection("users").document(uid).collection("job_descriptions")
-            jd_docs = jd_ref.stream()
-            matching_jds = []
-
-
-            for jd_doc in jd_docs:
-                jd_dict = jd_doc.to_dict()
-                jd_skills = jd_dict.get("required_skills", [])
-                candidate_skills = candidate_dict.get("technical_skills", [])
-
-                if has_skill_overlap(jd_skills, candidate_skills, min_overlap=1):
-                    matching_jds.append((jd_doc.id, jd_dict))
-
-            # If matches found, score and store top match
-            for jd_id, jd_data in matching_jds:
-                scored = analyze_multiple_resumes_structured(jd_data, [candidate_dict])
-                for s in scored:
-                    score_result = calculate_total_score(s, uid)
-                    s["total_score"] = score_result["total_score"]
-                    s["score_breakdown"] = score_result["breakdown"]
-                for candidate in scored:
-                    save_candidate_topscore_to_firestore(uid=uid, jd_id=jd_id, candidate=candidate)
-
-
-            results.append({
-                "filename": resume.filename,
-                "candidate_id": candidate_id,
-                "parsed_data": candidate_dict
-            })
-
-        except Exception as e:
-            results.append({
-                "filename": resume.filename,
-                "error": str(e),
-                "raw_output": locals().get("response", {}).text if 'response' in locals() else None
-            })
+            await run_stage("firestore", put_cached_extraction, uid, cache_key, content_sha256, candidate_dict, resume_url, blob_name)
+
+        candidate_dict.update({
+            "uid": uid,
+            "candidate_id": candidate_id,
+            "resume_url": resume_url,
+            "blob_name": blob_name,
+            "content_sha256": content_sha256,
+            # Precomputed for the JD-side lexical pre-ranker
+            "term_vector": candidate_term_vector(candidate_dict)
+        })
+
+        await run_stage(
+            "firestore", set_document,
+            db.collection("users").document(uid)
+              .collection("candidates").document(candidate_id),
+            candidate_dict,
+            version_write(uid, "candidates"),
+        )
+        candidate_skills = candidate_dict.get("technical_skills", [])
+        await run_stage("firestore", index_skills, uid, "candidate", candidate_id, candidate_skills)
+
+        # Index lookup instead of streaming every JD the user owns
+        jd_overlaps = await run_stage("firestore", find_overlaps, uid, "jd", candidate_skills, 1)
+        jd_ref = db.collection("users").document(uid).collection("job_descriptions")
+        jd_docs = await run_stage("firestore", get_documents, jd_ref, jd_overlaps)
+        matching_jds = [(jd_doc.id, jd_doc.to_dict()) for jd_doc in jd_docs]
+
+        # Score against every matching JD at once, then total and store in one batch
+        results_by_jd = {}
+        if matching_jds:
+            # Each Gemini call takes its own "gemini" stage slot: one run_stage
+            # around the whole fan-out would hold one slot for up to
+            # len(matching_jds) concurrent calls
+            with metrics.timed("gemini", "score_candidate_against_jds"):
+                results_by_jd = await score_candidate_against_jds(
+                    matching_jds, candidate_dict, stage_limits["gemini"]
+                )
+        scored = {jd_id: s for jd_id, s in results_by_jd.items() if "error" not in s}
+        if scored:
+            score_results = await run_stage("firestore", calculate_total_scores, list(scored.values()), uid)
+            for s, score_result in zip(scored.values(), score_results):
+                s["total_score"] = score_result["total_score"]
+                s["score_breakdown"] = score_result["breakdown"]
+            await run_stage("firestore", save_candidate_scores_to_firestore, uid, scored)
+
+        result = {
+            "filename": resume.filename,
+            "candidate_id": candidate_id,
+            "parsed_data": _public(candidate_dict),
+            "matched_jds": len(matching_jds),
+            "scored_jds": len(scored)
+        }
+        # JDs the candidate could not be scored against are reported, not saved with zero scores
+        failed_jds = [{"jd_id": jd_id, "error": s["error"]} for jd_id, s in results_by_jd.items() if "error" in s]
+        if failed_jds:
+            result["failed_jds"] = failed_jds
+        return result
+
+    except Exception as e:
+        return {
+            "filename": resume.filename,
+            "error": str(e),
+            "raw_output": locals().get("response", {}).text if 'response' in locals() else None
+        }
 
-    return {"status": "completed", "uid": uid, "results": results}
+
+register_processor("candidate-resume", process_resume)
 
 
 @router.get("/candidate-resumes")
-async def get_candidate_resumes(request: Request):
+async def get_candidate_resumes(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    uid: str = Depends(get_current_uid)
+):
     try:
-        uid = verify_firebase_token(request)
+        # Version first: a client that is up to date costs one read, not the collection
+        version = await run_stage("firestore", get_version, uid, "candidates")
+        etag = make_etag(uid, "candidates", version, limit, cursor, fields)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
 
         candidates_ref = db.collection("users").document(uid).collection("candidates")
-        docs = candidates_ref.stream()
+        docs, next_cursor = await run_stage("firestore", fetch_page, candidates_ref, candidates_ref, limit, cursor, fields)
 
         candidate_list = []
         for doc in docs:
-            candidate = doc.to_dict()
-            candidate["id"] = doc.id  
+            candidate = _public(doc.to_dict())
+            candidate["id"] = doc.id
             candidate_list.append(candidate)
 
-        return {
+        return json_response(request, {
             "status": "success",
             "uid": uid,
-            "candidates": candidate_list
-        }
+            "candidates": candidate_list,
+            "next_cursor": next_cursor
+        }, etag)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching resumes: {str(e)}")
 
@@ -210,31 +302,48 @@ async def get_candidate_resumes(request: Request):
 
 
 @router.delete("/candidate-resume/{candidate_id}")
-async def delete_candidate_resume(request: Request, candidate_id: str):
+async def delete_candidate_resume(candidate_id: str, uid: str = Depends(get_current_uid)):
     try:
-        uid = verify_firebase_token(request)
-
-        candidate_doc_ref = db.collection("users").document(uid).collection("candidates").document(candidate_id)
-        doc_snapshot = candidate_doc_ref.get()
-
-        if not doc_snapshot.exists:
+        summary = await run_cascade_delete(uid, "candidate", [candidate_id])
+        if summary["errors"]:
+            raise Exception("; ".join(f"{e['phase']}: {e['error']}" for e in summary["errors"]))
+        if summary["found"] == 0:
             raise HTTPException(status_code=404, detail="Candidate not found")
-
-        candidate_data = doc_snapshot.to_dict()
-
-
-        resume_url = candidate_data.get("resume_url")
-        if resume_url:
-            parsed_url = urlparse(resume_url)
-            blob_path = parsed_url.path.lstrip(f"/{os.getenv('AZURE_CONTAINER_NAME')}/")
-            delete_resume_from_azure(blob_path)
-
-        candidate_doc_ref.delete()
+        if summary["blobs_failed"]:
+            # The candidate is gone; only its file is left behind in Azure
+            return {
+                "status": "partial",
+                "message": f"Candidate {candidate_id} deleted, but its resume file could not be removed",
+                "blobs_failed": summary["blobs_failed"],
+            }
 
         return {
             "status": "success",
             "message": f"Candidate {candidate_id} and resume deleted successfully"
         }
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting candidate: {str(e)}")
+
+
+class BulkDeleteCandidatesRequest(BaseModel):
+    candidate_ids: List[str] = Field(..., min_length=1, max_length=MAX_BULK_DELETE)
+
+
+@router.post("/candidate-resumes/bulk-delete")
+async def bulk_delete_candidate_resumes(
+    request: Request,
+    body: BulkDeleteCandidatesRequest,
+    uid: str = Depends(get_current_uid)
+):
+    # Deletes candidates with their top-score entries, skill index postings and
+    # resume blobs. Send Accept: application/x-ndjson or text/event-stream for progress.
+    media_type = negotiate_stream(request)
+    if media_type:
+        return stream_events(media_type, cascade_delete(uid, "candidate", body.candidate_ids))
+    try:
+        return {"status": "success", "uid": uid, **await run_cascade_delete(uid, "candidate", body.candidate_ids)}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error deleting candidate: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error deleting candidates: {str(e)}")
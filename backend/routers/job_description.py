@@ -1,24 +1,33 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Request
-from services.parser import extract_text_from_docx
-from firebase_config import verify_firebase_token, db
-from pydantic import BaseModel
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Query, Depends
+from fastapi.responses import JSONResponse
+from services.parsing_service import parse_document
+from services.prerank import prerank_candidates
+from services import metrics
+from firebase_config import get_current_uid, db
+from pydantic import BaseModel, Field
 from typing import List, Optional
-from google import genai
-import os
+import asyncio
 import json
-from dotenv import load_dotenv
+import env  # noqa: F401  (loads .env)
 import re
-from urllib.parse import urlparse
 import uuid
-from storage.azure import upload_resume_to_azure ,delete_resume_from_azure
+from storage.azure import upload_stream_to_azure, hash_upload, blob_exists, blob_name_for, blob_name_from_url
 from google.genai.types import GenerateContentConfig,Part 
-from  services.scoring import calculate_total_score
-from storage.firestore import save_topscore_results_to_firestore
+from  services.scoring import calculate_total_scores
+from storage.firestore import save_topscore_results_to_firestore, get_documents, set_document
 from llmservices.topscore_gemini import analyze_multiple_resumes_structured
+from llmservices.gateway import StaticPrefix, generate_with_prefix
 from services.scoring import initialize_user_weights
-load_dotenv()
+from services.pipeline import run_pipeline, run_stage, iter_pipeline, stage_limits
+from services.streaming import negotiate_stream, detach_uploads, stream_results, stream_events
+from services.deletion import MAX_BULK_DELETE, cascade_delete, run_cascade_delete
+from services.jobs import create_job, register_processor
+from storage.pagination import fetch_page, MAX_PAGE_SIZE
+from storage.skill_index import index_skills, find_overlaps
+from storage.versions import get_version, version_write
+from services.responses import json_response, make_etag, not_modified
+from storage.extraction_cache import extraction_version, extraction_cache_key, get_cached_extraction, put_cached_extraction, drop_cached_extraction
 
-client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
 
 
 router = APIRouter()
@@ -39,167 +48,223 @@ class JobDescription(BaseModel):
 
 
 
-@router.post("/upload-jd")
-async def upload_multiple_jds(
-    request: Request,
-    jd_files: List[UploadFile] = File(...)
-):
-    uid = verify_firebase_token(request)
-    results = []
-    initialize_user_weights(uid)
+JD_EXTRACTION_PROMPT = f"""
+You are an information extraction engine.
 
-    for jd_file in jd_files:
-        try:
-            jd_bytes = await jd_file.read()
-            jd_filename = jd_file.filename.lower()
-            jd_content_type = jd_file.content_type or "application/pdf"
-            jd_id = str(uuid.uuid4())
-
-            jd_url = upload_resume_to_azure(
-                uid=uid,
-                candidate_id=jd_id,
-                filename=jd_file.filename,
-                content=jd_bytes,
-                content_type=jd_file.content_type or "application/pdf"
-            )
+Task: Read the job description   extract ONLY the information that is explicitly supported by the text. Do NOT guess or invent anything.
 
-            if jd_filename.endswith(".docx") or jd_content_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                # Extract text for docx (fallback if Part fails)
-                extracted_text = extract_text_from_docx(jd_bytes)
-                file_part = Part.from_text(extracted_text)
-            else:
-                # Default to binary Part for PDFs
-                file_part = Part.from_bytes(
-                    data=jd_bytes,
-                    mime_type=jd_content_type
-                )
-            jd_schema = JobDescription.schema_json(indent=2)
-            prompt = f"""
-            You are an information extraction engine.
-
-            Task: Read the job description   extract ONLY the information that is explicitly supported by the text. Do NOT guess or invent anything.
-
-            Output: return ONLY valid JSON. Do not include comments, markdown, or extra text.
-            Extract the following fields:
-
-            - **jobtitle**: The exact job title for the role.
-            - **company**: The company or organization offering the job.
-            - **location**: The primary job location or work location if mentioned. Use city and/or country. If the job is remote, include "Remote".
-            - **required_experience**: The total years or range of professional experience required for the role (e.g., "3+ years", "5–7 years").
-            - **job_type**: Full-time, part-time, contract, internship, etc.
-            - **required_skills**: A list of core technical or soft skills mentioned (e.g., Python, communication, SQL, etc.).
-            - **responsibilities**: Bullet points or a paragraph describing what the job role involves or expects the candidate to do.
-            - **qualifications**: Educational background or certifications required (e.g., "Bachelor's in Computer Science").
-            - **salary_range**: If a salary or compensation range is mentioned (e.g., "₹10–15 LPA", "$70,000–$90,000"), include it.
-            - **posted_date**: The date when the job was posted, if explicitly mentioned.
-            - **contact_email**: Any email provided for applications or inquiries.
-            - **description**: The full body text of the job description or its overview.
-
-            Match this schema:
-            {jd_schema}
-
-            """
-            try:
-                response = await client.aio.models.generate_content(
-                    model="gemini-2.0-flash",
-                    contents=[file_part, prompt],
-                    config=GenerateContentConfig(
-                        response_mime_type="application/json",
-                        response_schema=JobDescription,
-                        temperature=0.2
-                    )
-                )
-                jd_model = response.text  
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=str(e))
-
-            try:
-                jd_model = response.text  
-                jd_dict = jd_model.dict()
-            except Exception as parse_err:
-   
-                jd_dict = json.loads(response.text)
+Output: return ONLY valid JSON. Do not include comments, markdown, or extra text.
+Extract the following fields:
 
+- **jobtitle**: The exact job title for the role.
+- **company**: The company or organization offering the job.
+- **location**: The primary job location or work location if mentioned. Use city and/or country. If the job is remote, include "Remote".
+- **required_experience**: The total years or range of professional experience required for the role (e.g., "3+ years", "5–7 years").
+- **job_type**: Full-time, part-time, contract, internship, etc.
+- **required_skills**: A list of core technical or soft skills mentioned (e.g., Python, communication, SQL, etc.).
+- **responsibilities**: Bullet points or a paragraph describing what the job role involves or expects the candidate to do.
+- **qualifications**: Educational background or certifications required (e.g., "Bachelor's in Computer Science").
+- **salary_range**: If a salary or compensation range is mentioned (e.g., "₹10–15 LPA", "$70,000–$90,000"), include it.
+- **posted_date**: The date when the job was posted, if explicitly mentioned.
+- **contact_email**: Any email provided for applications or inquiries.
+- **description**: The full body text of the job description or its overview.
 
+Match this schema:
+{JobDescription.schema_json(indent=2)}
 
-            jd_dict.update({
-                "uid": uid,
-                "jd_id": jd_id,
-                "jd_url": jd_url
-            })
+"""
+JD_EXTRACTION_VERSION = extraction_version(JD_EXTRACTION_PROMPT, JobDescription)
+JD_EXTRACTION_PREFIX = StaticPrefix("jd-extraction", JD_EXTRACTION_PROMPT)
 
-            db.collection("users").document(uid).collection("job_descriptions").document(jd_id).set(jd_dict)
 
-            results.append({
-                "filename": jd_file.filename,
-                "jd_id": jd_id,
-                "parsed_data": jd_dict
-            })
+@router.post("/upload-jd")
+async def upload_multiple_jds(
+    request: Request,
+    jd_files: List[UploadFile] = File(...),
+    mode: str = Query("sync", pattern="^(sync|async)$"),
+    uid: str = Depends(get_current_uid)
+):
+    await run_stage("firestore", initialize_user_weights, uid)
+
+    if mode == "async":
+        job_id = await create_job(uid, "upload-jd", jd_files)
+        return JSONResponse(status_code=202, content={
+            "status": "queued", "uid": uid, "job_id": job_id, "status_url": f"/api/jobs/{job_id}"
+        })
+
+    stream_type = negotiate_stream(request)
+    if stream_type:
+        uploads = await detach_uploads(jd_files)
+        return stream_results(
+            stream_type,
+            iter_pipeline(
+                uploads,
+                lambda jd_file: process_jd(uid, jd_file),
+                on_error=lambda jd_file, e: {"filename": jd_file.filename, "error": str(e)}
+            ),
+            uploads,
+            {"uid": uid}
+        )
+
+    results = await run_pipeline(
+        jd_files,
+        lambda jd_file: process_jd(uid, jd_file),
+        on_error=lambda jd_file, e: {"filename": jd_file.filename, "error": str(e)}
+    )
 
-            candidates_ref = db.collection("users").document(uid).collection("candidates")
-            candidates = candidates_ref.stream()
-            candidate_list = []
-            for doc in candidates:
-                data = doc.to_dict()
-                candidate_list.append(data)
-                  
+    return {
+        "status": "completed",
+        "uid": uid,
+        "results": results
+    }
 
-            def has_skill_overlap(jd_skills, candidate_skills, min_overlap=2):
-                return len(set(jd_skills).intersection(set(candidate_skills))) >= min_overlap
 
+async def process_jd(uid: str, jd_file: UploadFile) -> dict:
+    jd_content_type = jd_file.content_type or "application/pdf"
+    jd_id = str(uuid.uuid4())
+    content_sha256 = await hash_upload(jd_file)
+    cache_key = extraction_cache_key(content_sha256, JD_EXTRACTION_VERSION)
+    cached = await run_stage("firestore", get_cached_extraction, uid, cache_key)
+    if cached and not await run_stage(
+        "azure", blob_exists, cached.get("blob_name") or blob_name_from_url(cached["blob_url"])
+    ):
+        # The blob was deleted after this entry was cached: extract afresh
+        await run_stage("firestore", drop_cached_extraction, uid, cache_key)
+        cached = None
+
+    if cached:
+        jd_dict = dict(cached["data"])
+        jd_url = cached["blob_url"]
+        blob_name = cached.get("blob_name") or blob_name_from_url(jd_url)
+    else:
+        blob_name = blob_name_for(uid, jd_id, jd_file.filename)
+        jd_url = await run_stage(
+            "azure", upload_stream_to_azure,
+            uid=uid,
+            candidate_id=jd_id,
+            filename=jd_file.filename,
+            upload=jd_file,
+            content_type=jd_file.content_type or "application/pdf"
+        )
+        # Local text (DOCX/RTF/TXT, PDF text layer) parsed off the event loop,
+        # streamed to the parser from the spooled upload
+        document_text = await parse_document(jd_file.file, jd_file.filename, jd_content_type)
+        if document_text is not None:
+            file_part = Part.from_text(text=document_text)
+        else:
+            # Scanned PDFs and other formats go to Gemini as bytes: the only
+            # path that reads the whole file into memory
+            await jd_file.seek(0)
+            file_part = Part.from_bytes(
+                data=await jd_file.read(),
+                mime_type=jd_content_type
+            )
+        try:
+            response = await run_stage(
+                "gemini", generate_with_prefix, JD_EXTRACTION_PREFIX,
+                model="gemini-2.0-flash",
+                contents=[file_part],
+                config=GenerateContentConfig(
+                    response_mime_type="application/json",
+                    response_schema=JobDescription,
+                    temperature=0.2
+                )
+            )
+            jd_model = response.text  
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
-            jd_skills = jd_dict.get("required_skills", [])    
+        try:
+            jd_model = response.text  
+            jd_dict = jd_model.dict()
+        except Exception as parse_err:
+   
+            jd_dict = json.loads(response.text)
 
+        await run_stage("firestore", put_cached_extraction, uid, cache_key, content_sha256, jd_dict, jd_url, blob_name)
 
 
-            filtered_candidates = []
-            for c in candidate_list:
-                candidate_skills = c.get("technical_skills", [])
-                if has_skill_overlap(jd_skills, candidate_skills, min_overlap=1):
-                    filtered_candidates.append(c)
-   
 
+    jd_dict.update({
+        "uid": uid,
+        "jd_id": jd_id,
+        "jd_url": jd_url,
+        "blob_name": blob_name,
+        "content_sha256": content_sha256
+    })
+
+    await run_stage(
+        "firestore", set_document,
+        db.collection("users").document(uid).collection("job_descriptions").document(jd_id),
+        jd_dict,
+        version_write(uid, "job_descriptions"),
+    )
+
+    result = {
+        "filename": jd_file.filename,
+        "jd_id": jd_id,
+        "parsed_data": jd_dict,
+        "matched_candidates": 0,
+        "scored_candidates": 0
+    }
 
-            if filtered_candidates:
-                topscore_results = analyze_multiple_resumes_structured(jd_dict, filtered_candidates)
-     
+    jd_skills = jd_dict.get("required_skills", [])
+    await run_stage("firestore", index_skills, uid, "jd", jd_id, jd_skills)
 
-                for candidate in topscore_results:
-                        result = calculate_total_score(candidate, uid)
-    
-                        candidate["total_score"] = result["total_score"]
-                        candidate["score_breakdown"] = result["breakdown"]
+    # Index lookup instead of streaming every candidate the user owns
+    candidate_overlaps = await run_stage("firestore", find_overlaps, uid, "candidate", jd_skills, 1)
+    candidates_ref = db.collection("users").document(uid).collection("candidates")
+    candidates = await run_stage("firestore", get_documents, candidates_ref, candidate_overlaps)
+    filtered_candidates = [doc.to_dict() for doc in candidates]
+    result["matched_candidates"] = len(filtered_candidates)
 
-                save_topscore_results_to_firestore(uid=uid, jd_id=jd_id, topscore_results=topscore_results)
-            else:
-         
-                return "matching candidates found for the given JD."
+    if filtered_candidates:
+        # Lexical pre-ranking: only the PRERANK_TOP_N most relevant go to the LLM
+        with metrics.timed("skill_match", "prerank_candidates"):
+            shortlist = await asyncio.to_thread(prerank_candidates, jd_dict, filtered_candidates)
+        result["shortlisted_candidates"] = len(shortlist)
+        # Each batch call takes its own "gemini" stage slot, as in process_resume
+        with metrics.timed("gemini", "analyze_multiple_resumes_structured"):
+            topscore_results = await analyze_multiple_resumes_structured(jd_dict, shortlist, stage_limits["gemini"])
+        # Candidates whose batch could not be scored are reported, not saved with zero scores
+        failed = [r for r in topscore_results if "error" in r]
+        topscore_results = [r for r in topscore_results if "error" not in r]
+        if failed:
+            result["failed_candidates"] = failed
 
+        score_results = await run_stage("firestore", calculate_total_scores, topscore_results, uid)
+        for candidate, score_result in zip(topscore_results, score_results):
+                candidate["total_score"] = score_result["total_score"]
+                candidate["score_breakdown"] = score_result["breakdown"]
 
-            
-            
-        except Exception as e:
-            results.append({
-                "filename": jd_file.filename,
-                "error": str(e)
-            })
+        await run_stage("firestore", save_topscore_results_to_firestore, uid=uid, jd_id=jd_id, topscore_results=topscore_results)
+        result["scored_candidates"] = sum(1 for c in topscore_results if "total_score" in c and "error" not in c)
+    else:
+        result["message"] = "No matching candidates found for the given JD."
 
-    return {
-        "status": "completed",
-        "uid": uid,
-        "results": results
-    }
+    return result
 
 
+register_processor("upload-jd", process_jd)
 
 
 @router.get("/job-descriptions")
-async def get_job_descriptions(request: Request):
+async def get_job_descriptions(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    uid: str = Depends(get_current_uid)
+):
     try:
-        uid = verify_firebase_token(request)
+        version = await run_stage("firestore", get_version, uid, "job_descriptions")
+        etag = make_etag(uid, "job_descriptions", version, limit, cursor, fields)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
 
         jd_ref = db.collection("users").document(uid).collection("job_descriptions")
-        docs = jd_ref.stream()
+        docs, next_cursor = await run_stage("firestore", fetch_page, jd_ref, jd_ref, limit, cursor, fields)
 
         jd_list = []
         for doc in docs:
@@ -207,12 +272,15 @@ async def get_job_descriptions(request: Request):
             jd["id"] = doc.id
             jd_list.append(jd)
 
-        return {
+        return json_response(request, {
             "status": "success",
             "uid": uid,
-            "job_descriptions": jd_list
-        }
+            "job_descriptions": jd_list,
+            "next_cursor": next_cursor
+        }, etag)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching JDs: {str(e)}")
     
@@ -220,32 +288,48 @@ async def get_job_descriptions(request: Request):
 
 
 @router.delete("/job-description/{jd_id}")
-async def delete_job_description(request: Request, jd_id: str):
+async def delete_job_description(jd_id: str, uid: str = Depends(get_current_uid)):
     try:
-        uid = verify_firebase_token(request)
-
-
-        jd_doc_ref = db.collection("users").document(uid).collection("job_descriptions").document(jd_id)
-        doc_snapshot = jd_doc_ref.get()
-
-        if not doc_snapshot.exists:
+        summary = await run_cascade_delete(uid, "jd", [jd_id])
+        if summary["errors"]:
+            raise Exception("; ".join(f"{e['phase']}: {e['error']}" for e in summary["errors"]))
+        if summary["found"] == 0:
             raise HTTPException(status_code=404, detail="Job Description not found")
-
-        jd_data = doc_snapshot.to_dict()
-
-       
-        jd_url = jd_data.get("jd_url")
-        if jd_url:
-            parsed_url = urlparse(jd_url)
-            blob_path = parsed_url.path.lstrip(f"/{os.getenv('AZURE_CONTAINER_NAME')}/")
-            delete_resume_from_azure(blob_path)
-        
-        jd_doc_ref.delete()
+        if summary["blobs_failed"]:
+            # The JD is gone; only its file is left behind in Azure
+            return {
+                "status": "partial",
+                "message": f"Job Description {jd_id} deleted, but its file could not be removed",
+                "blobs_failed": summary["blobs_failed"],
+            }
 
         return {
             "status": "success",
             "message": f"Job Description {jd_id} and associated file deleted successfully"
         }
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting JD: {str(e)}")
+
+
+class BulkDeleteJDsRequest(BaseModel):
+    jd_ids: List[str] = Field(..., min_length=1, max_length=MAX_BULK_DELETE)
+
+
+@router.post("/job-descriptions/bulk-delete")
+async def bulk_delete_job_descriptions(
+    request: Request,
+    body: BulkDeleteJDsRequest,
+    uid: str = Depends(get_current_uid)
+):
+    # Deletes JDs with their top-score entries, skill index postings and files.
+    # Send Accept: application/x-ndjson or text/event-stream for progress.
+    media_type = negotiate_stream(request)
+    if media_type:
+        return stream_events(media_type, cascade_delete(uid, "jd", body.jd_ids))
+    try:
+        return {"status": "success", "uid": uid, **await run_cascade_delete(uid, "jd", body.jd_ids)}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error deleting JD: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error deleting JDs: {str(e)}")
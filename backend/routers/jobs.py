@@ -0,0 +1,14 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends
+from firebase_config import get_current_uid
+from services.jobs import get_job
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}")
+async def get_ingestion_job(job_id: str, uid: str = Depends(get_current_uid)):
+    job = await asyncio.to_thread(get_job, job_id, uid)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,32 @@
+import os
+import secrets
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+import env  # noqa: F401  (loads .env)
+from firebase_config import token_cache_stats
+from llmservices import gateway, score_cache
+from services import metrics, scoring
+from storage import extraction_cache, leaderboard
+
+# Scrapers must send "Authorization: Bearer <METRICS_TOKEN>". Without a token
+# the endpoint is off unless METRICS_PUBLIC=true (see services.metrics).
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+metrics.register_stats("auth_token_cache", token_cache_stats)
+metrics.register_stats("extraction_cache", extraction_cache.stats)
+metrics.register_stats("score_cache", score_cache.stats)
+metrics.register_stats("score_weights_cache", scoring.stats)
+metrics.register_stats("gemini", gateway.stats)
+metrics.register_stats("leaderboard", leaderboard.stats)
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics(request: Request):
+    if not METRICS_TOKEN:
+        if not metrics.METRICS_PUBLIC:
+            raise HTTPException(status_code=404, detail="Not Found")
+    elif not secrets.compare_digest(request.headers.get("Authorization", ""), f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,7 +1,11 @@
-from fastapi import APIRouter,Request,HTTPException
+from fastapi import APIRouter,HTTPException,BackgroundTasks,Depends,Request
 from pydantic import BaseModel
 from typing import Dict
-from firebase_config import db,verify_firebase_token
+from firebase_config import db,get_current_uid
+from services.scoring import invalidate_user_weights
+from services.rerank import rerank_user_scores
+from services.responses import json_response, make_etag, not_modified
+from storage.versions import get_version, version_write
 
 router = APIRouter()
 
@@ -13,8 +17,12 @@ class WeightUpdateRequest(BaseModel):
             raise HTTPException(status_code=400, detail="Weights must sum up to 100.")
         
 @router.get("/user-weights")
-def get_user_weights(request: Request):
-    uid = verify_firebase_token(request)
+def get_user_weights(request: Request, uid: str = Depends(get_current_uid)):
+    etag = make_etag(uid, "score_weights", get_version(uid, "score_weights"))
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
     weights_ref = db.collection("users").document(uid).collection("score_weights")
     weights_docs = weights_ref.stream()
 
@@ -26,19 +34,32 @@ def get_user_weights(request: Request):
         if role and weights:
             user_weights[role] = weights
 
-    return { "weights": user_weights}
+    return json_response(request, { "weights": user_weights}, etag)
+
+
 
 
+@router.get("/user-weights/rerank-status")
+def get_rerank_status(uid: str = Depends(get_current_uid)):
+    status_doc = db.collection("users").document(uid).collection("rerank_jobs").document("latest").get()
+    if not status_doc.exists:
+        return {"status": "idle"}
+    return status_doc.to_dict()
 
 
 @router.put("/user-weights/{role}")
-def update_user_weights(request:Request, role: str, body: WeightUpdateRequest):
-    uid = verify_firebase_token(request)
+def update_user_weights(role: str, body: WeightUpdateRequest, background_tasks: BackgroundTasks, uid: str = Depends(get_current_uid)):
     weights_ref = db.collection("users").document(uid).collection("score_weights").document(role)
     body.validate_total()
 
     if weights_ref.get().exists:
-        weights_ref.update({"weights": body.weights})
-        return {"message": f"Updated weights for role '{role}'"}
+        batch = db.batch()
+        batch.update(weights_ref, {"weights": body.weights})
+        batch.set(*version_write(uid, "score_weights"), merge=True)
+        batch.commit()
+        invalidate_user_weights(uid)
+        # Stored totals for this profile type are recomputed without any LLM calls
+        background_tasks.add_task(rerank_user_scores, uid, roles=[role])
+        return {"message": f"Updated weights for role '{role}'", "rerank": "scheduled"}
     else:
         return {"error": f"Role '{role}' does not exist for user: {uid}"}
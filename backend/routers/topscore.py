@@ -1,16 +1,73 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from typing import Optional
+from firebase_admin import firestore
 from firebase_config import db
-from firebase_config import verify_firebase_token
+from firebase_config import get_current_uid
+from storage.pagination import fetch_page, parse_fields, MAX_PAGE_SIZE
+from storage.leaderboard import ENTRY_FIELDS, get_leaderboard
+from services.pipeline import run_stage
+from services.responses import json_response, make_etag, not_modified
 
 router = APIRouter()
 
-@router.get("/top-score/{jd_id}")
-async def get_top_score_candidates(jd_id: str, request: Request):
-    uid = verify_firebase_token(request)
-    if not uid:
-        raise HTTPException(status_code=401, detail="Unauthorized")
 
+def _page_from_leaderboard(board: dict, limit: Optional[int], fields: Optional[str]):
+    # (candidates, next_cursor) when the board can answer the request, else None.
+    # Board entries hold ENTRY_FIELDS only, so only requests projecting onto
+    # those fields are served from it; a request without fields always gets
+    # the full documents, *_explanation texts included, from the query.
+    projection = parse_fields(fields)
+    if not projection or not set(projection) <= set(ENTRY_FIELDS):
+        return None
+    entries = board["entries"]
+    if limit is None:
+        if not board["complete"]:
+            return None
+        page, next_cursor = entries, None
+    else:
+        if limit > len(entries) and not board["complete"]:
+            return None
+        page = entries[:limit]
+        more = len(entries) > limit or not board["complete"]
+        next_cursor = page[-1]["candidate_id"] if more and page else None
+    page = [
+        {**{k: entry[k] for k in projection if k in entry}, "candidate_id": entry["candidate_id"]}
+        for entry in page
+    ]
+    return page, next_cursor
+
+@router.get("/top-score/{jd_id}")
+async def get_top_score_candidates(
+    request: Request,
+    jd_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    order_by: str = Query("-total_score", pattern="^-?total_score$"),
+    uid: str = Depends(get_current_uid),
+):
     try:
+        # The leaderboard document carries the JD's score version: one read
+        # answers a revalidation, and a first page by score that asks for
+        # leaderboard fields only (see ENTRY_FIELDS) too. A missing board is
+        # rebuilt in a transaction, so this stays off the event loop.
+        board = await run_stage("firestore", get_leaderboard, uid, jd_id)
+        etag = None
+        if board:
+            etag = make_etag(uid, "top_score", jd_id, board["version"], limit, cursor, fields, order_by)
+            cached = not_modified(request, etag)
+            if cached:
+                return cached
+        if board and not cursor and order_by == "-total_score":
+            page = _page_from_leaderboard(board, limit, fields)
+            if page is not None:
+                result, next_cursor = page
+                if not result:
+                    raise HTTPException(status_code=404, detail="No top score candidates found.")
+                return json_response(
+                    request, {"jd_id": jd_id, "top_score_candidates": result, "next_cursor": next_cursor}, etag
+                )
+
         candidates_ref = (
             db.collection("users")
             .document(uid)
@@ -18,7 +75,10 @@ async def get_top_score_candidates(jd_id: str, request: Request):
             .document(jd_id)
             .collection("candidates")
         )
-        candidates = candidates_ref.stream()
+        # Sorting happens in Firestore, so a limit never reads the whole subcollection
+        direction = firestore.Query.DESCENDING if order_by.startswith("-") else firestore.Query.ASCENDING
+        query = candidates_ref.order_by("total_score", direction=direction)
+        candidates, next_cursor = await run_stage("firestore", fetch_page, query, candidates_ref, limit, cursor, fields)
 
         result = []
         for doc in candidates:
@@ -26,16 +86,16 @@ async def get_top_score_candidates(jd_id: str, request: Request):
             data["candidate_id"] = doc.id
             result.append(data)
 
-        # Sort by total_score in descending order
-        result.sort(key=lambda x: x.get("total_score", 0), reverse=True)
-
-        if not result:
+        if not result and not cursor:
             raise HTTPException(status_code=404, detail="No top score candidates found.")
 
-        return {
+        return json_response(request, {
             "jd_id": jd_id,
-            "top_score_candidates": result
-        }
+            "top_score_candidates": result,
+            "next_cursor": next_cursor
+        }, etag)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching top score data: {str(e)}")
@@ -0,0 +1,208 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from google.api_core import exceptions as gcp_exceptions
+from firebase_config import db
+from services import metrics
+from storage.azure import blob_name_from_url, delete_blobs_from_azure
+from storage.extraction_cache import invalidate_extractions_many
+from storage.firestore import delete_documents
+from storage.leaderboard import remove_from_leaderboards
+from storage.queries import chunks
+from storage.skill_index import unindex_many
+from storage.versions import version_write
+
+MAX_BULK_DELETE = 1000
+SCAN_CONCURRENCY = 8
+
+KINDS = {
+    "candidate": {"collection": "candidates", "url_field": "resume_url", "skills_field": "technical_skills"},
+    "jd": {"collection": "job_descriptions", "url_field": "jd_url", "skills_field": "required_skills"},
+}
+
+
+def _user_ref(uid: str):
+    return db.collection("users").document(uid)
+
+
+def _load_documents(uid: str, kind: str, ids: list) -> dict:
+    collection_ref = _user_ref(uid).collection(KINDS[kind]["collection"])
+    refs = [collection_ref.document(doc_id) for doc_id in dict.fromkeys(ids)]
+    metrics.record_firestore(reads=len(refs))
+    snapshots = db.get_all(refs)
+    return {snapshot.id: snapshot.to_dict() for snapshot in snapshots if snapshot.exists}
+
+
+def _blob_targets(uid: str, kind: str, docs: dict) -> tuple:
+    # Blobs (and their extraction cache entries) that no surviving document
+    # points at. Re-uploads of the same file share one blob via the extraction cache.
+    url_field = KINDS[kind]["url_field"]
+    collection_ref = _user_ref(uid).collection(KINDS[kind]["collection"])
+    urls = list(dict.fromkeys(data[url_field] for data in docs.values() if data.get(url_field)))
+    shared = set()
+    for chunk in chunks(urls):
+        for snapshot in collection_ref.where(url_field, "in", chunk).select([url_field]).stream():
+            if snapshot.id not in docs:
+                shared.add(snapshot.get(url_field))
+
+    blob_names, content_hashes = {}, set()
+    for data in docs.values():
+        url = data.get(url_field)
+        if url and url not in shared:
+            blob_names[data.get("blob_name") or blob_name_from_url(url)] = True
+            if data.get("content_sha256"):
+                content_hashes.add(data["content_sha256"])
+    return list(blob_names), content_hashes
+
+
+def _candidate_entry_refs(uid: str, ids: list) -> list:
+    # A candidate can have an entry under any JD. One collection-group query
+    # per 30 candidates finds them all, instead of one query per JD and chunk.
+    # Needs the collection-group single-field index on candidates.candidate_id
+    # (Firestore console: Indexes > Single field > Add exemption).
+    prefix = f"{_user_ref(uid).path}/top_score/"
+    refs, matched = [], 0
+    for chunk in chunks(ids):
+        query = db.collection_group("candidates").where("candidate_id", "in", chunk).select([])
+        for snapshot in query.stream():
+            matched += 1
+            # The group also holds users/{uid}/candidates itself
+            if snapshot.reference.path.startswith(prefix):
+                refs.append(snapshot.reference)
+    metrics.record_firestore(reads=max(matched, 1))
+    return refs
+
+
+def _top_score_refs(uid: str, kind: str, ids: list) -> list:
+    top_score_ref = _user_ref(uid).collection("top_score")
+
+    def jd_refs(jd_id):
+        jd_ref = top_score_ref.document(jd_id)
+        return [jd_ref] + list(jd_ref.collection("candidates").list_documents())
+
+    def candidate_refs(jd_ref, chunk):
+        # Per-JD lookup by document id, 30 candidates per query, keys only
+        candidates_ref = jd_ref.collection("candidates")
+        query = candidates_ref.where("__name__", "in", [candidates_ref.document(c) for c in chunk]).select([])
+        return [snapshot.reference for snapshot in query.stream()]
+
+    if kind == "candidate":
+        try:
+            return _candidate_entry_refs(uid, ids)
+        except gcp_exceptions.FailedPrecondition:
+            pass  # index not created yet: scan JD by JD
+
+    with ThreadPoolExecutor(max_workers=SCAN_CONCURRENCY) as pool:
+        if kind == "jd":
+            futures = [pool.submit(jd_refs, jd_id) for jd_id in ids]
+        else:
+            futures = [
+                pool.submit(candidate_refs, jd_ref, chunk)
+                for jd_ref in top_score_ref.list_documents()
+                for chunk in chunks(ids)
+            ]
+        return [ref for future in futures for ref in future.result()]
+
+
+def _delete_top_scores(uid: str, kind: str, ids: list) -> int:
+    refs = _top_score_refs(uid, kind, ids)
+    deleted = delete_documents(refs)
+    if kind == "candidate":
+        # A JD's leaderboard lives on its top_score document, so deleting a JD
+        # takes the board with it; candidates have to be taken off each board
+        ids_by_jd = {}
+        for ref in refs:
+            ids_by_jd.setdefault(ref.parent.parent.id, []).append(ref.id)
+        remove_from_leaderboards(uid, ids_by_jd)
+    return deleted
+
+
+def _delete_documents(uid: str, kind: str, docs: dict) -> int:
+    collection_ref = _user_ref(uid).collection(KINDS[kind]["collection"])
+    deleted = delete_documents(
+        [collection_ref.document(doc_id) for doc_id in docs], version=version_write(uid, KINDS[kind]["collection"])
+    )
+    skills_field = KINDS[kind]["skills_field"]
+    unindex_many(uid, kind, {doc_id: data.get(skills_field, []) for doc_id, data in docs.items()})
+    return deleted
+
+
+async def cascade_delete(uid: str, kind: str, ids: list):
+    # Async generator of progress events for deleting candidates or JDs along
+    # with their top-score entries, skill index postings, extraction cache
+    # entries and blobs. The last event has phase "done" and the totals; errors
+    # are reported in it, never raised, since a streamed response has already
+    # sent its status line.
+    summary = {
+        "phase": "done",
+        "requested": len(ids),
+        "found": 0,
+        "documents_deleted": 0,
+        "top_scores_deleted": 0,
+        "blobs_deleted": 0,
+        "blobs_failed": [],
+        "errors": [],
+    }
+    try:
+        docs = await asyncio.to_thread(_load_documents, uid, kind, ids)
+    except Exception as e:
+        summary["errors"].append({"phase": "load", "error": str(e)})
+        yield summary
+        return
+    summary["found"] = len(docs)
+    yield {"phase": "loaded", "requested": len(ids), "found": len(docs)}
+    if not docs:
+        yield summary
+        return
+
+    try:
+        blob_names, content_hashes = await asyncio.to_thread(_blob_targets, uid, kind, docs)
+    except Exception as e:
+        # Nothing deleted yet: once the documents are gone their blobs could
+        # no longer be found, so the whole delete is left for a retry
+        summary["errors"].append({"phase": "blobs", "error": str(e)})
+        yield summary
+        return
+    doc_ids = list(docs)
+
+    async def delete_blobs():
+        # Cache entries go first: if dropping them fails the blobs stay, and no
+        # entry is left pointing at a deleted blob
+        await asyncio.to_thread(invalidate_extractions_many, uid, content_hashes)
+        return await delete_blobs_from_azure(blob_names) if blob_names else {"deleted": 0, "failed": []}
+
+    async def run_phase(phase, awaitable):
+        try:
+            return phase, await awaitable, None
+        except Exception as e:
+            return phase, None, e
+
+    # Firestore batches and Azure blob batches run side by side
+    tasks = [
+        asyncio.create_task(run_phase("top_scores", asyncio.to_thread(_delete_top_scores, uid, kind, doc_ids))),
+        asyncio.create_task(run_phase("documents", asyncio.to_thread(_delete_documents, uid, kind, docs))),
+        asyncio.create_task(run_phase("blobs", delete_blobs())),
+    ]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            phase, result, error = await finished
+            if error is not None:
+                summary["errors"].append({"phase": phase, "error": str(error)})
+                yield {"phase": phase, "error": str(error)}
+            elif phase == "blobs":
+                summary["blobs_deleted"] = result["deleted"]
+                summary["blobs_failed"] = result["failed"]
+                yield {"phase": phase, "deleted": result["deleted"], "failed": len(result["failed"])}
+            else:
+                summary[f"{phase}_deleted"] = result
+                yield {"phase": phase, "deleted": result}
+    finally:
+        for task in tasks:
+            task.cancel()
+    yield summary
+
+
+async def run_cascade_delete(uid: str, kind: str, ids: list) -> dict:
+    summary = None
+    async for event in cascade_delete(uid, kind, ids):
+        summary = event
+    return summary
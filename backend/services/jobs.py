@@ -0,0 +1,345 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import time
+import uuid
+import env  # noqa: F401  (loads .env)
+from starlette.datastructures import Headers, UploadFile
+from services import metrics
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "data/jobs.sqlite3")
+JOB_SPOOL_DIR = os.getenv("JOB_SPOOL_DIR", "data/job_files")
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+POLL_INTERVAL_SECONDS = float(os.getenv("INGEST_POLL_INTERVAL_SECONDS", "1"))
+# A claimed file belongs to its worker until the lease runs out; the worker
+# renews it while the file is processing. Files whose lease expired (worker
+# process died or hung) go back to any worker, on this or another process.
+LEASE_SECONDS = float(os.getenv("INGEST_LEASE_SECONDS", "120"))
+LEASE_RENEW_SECONDS = LEASE_SECONDS / 3
+# A file whose lease ran out this many times (it keeps killing or hanging its
+# worker) is marked failed instead of being handed out again
+MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+# Finished jobs and their results are kept this long for GET /jobs/{id}
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+PURGE_INTERVAL_SECONDS = float(os.getenv("JOB_PURGE_INTERVAL_SECONDS", "3600"))
+
+logger = logging.getLogger(__name__)
+
+# kind -> async callable(uid, UploadFile) returning the per-file result dict
+processors = {}
+
+
+def register_processor(kind: str, process):
+    processors[kind] = process
+
+
+def _connect():
+    os.makedirs(os.path.dirname(JOB_DB_PATH) or ".", exist_ok=True)
+    conn = sqlite3.connect(JOB_DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def init_job_store():
+    conn = _connect()
+    try:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                uid TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_files (
+                job_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                filename TEXT NOT NULL,
+                content_type TEXT,
+                path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                lease_owner TEXT,
+                lease_expires_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (job_id, idx)
+            );
+            CREATE INDEX IF NOT EXISTS job_files_status ON job_files (status);
+            CREATE INDEX IF NOT EXISTS jobs_status_updated ON jobs (status, updated_at);
+        """)
+        # Stores created before leases: their running rows have no lease and
+        # count as expired
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(job_files)")}
+        for column, kind in (("lease_owner", "TEXT"), ("lease_expires_at", "REAL"), ("attempts", "INTEGER NOT NULL DEFAULT 0")):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE job_files ADD COLUMN {column} {kind}")
+    finally:
+        conn.close()
+
+
+def _store_job(job_id: str, uid: str, kind: str, files: list):
+    # Blocking: spool writes and the SQLite insert run in a worker thread
+    job_dir = os.path.join(JOB_SPOOL_DIR, job_id)
+    os.makedirs(job_dir, exist_ok=True)
+
+    rows = []
+    for idx, upload in enumerate(files):
+        path = os.path.join(job_dir, str(idx))
+        with open(path, "wb") as out:
+            shutil.copyfileobj(upload.file, out, 1024 * 1024)
+        rows.append((job_id, idx, upload.filename, upload.content_type, path, "queued"))
+
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "INSERT INTO jobs (id, uid, kind, status, total, created_at, updated_at) VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+            (job_id, uid, kind, len(rows), now, now),
+        )
+        conn.executemany(
+            "INSERT INTO job_files (job_id, idx, filename, content_type, path, status) VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+async def create_job(uid: str, kind: str, files: list) -> str:
+    job_id = str(uuid.uuid4())
+    await asyncio.to_thread(_store_job, job_id, uid, kind, files)
+    return job_id
+
+
+def _update_progress(conn, job_id: str) -> bool:
+    # Inside the caller's transaction; True once every file of the job is done
+    conn.execute("""
+        UPDATE jobs SET
+            completed = (SELECT COUNT(*) FROM job_files WHERE job_id = ? AND status IN ('completed', 'failed')),
+            updated_at = ?
+        WHERE id = ?
+    """, (job_id, time.time(), job_id))
+    conn.execute("UPDATE jobs SET status = 'completed' WHERE id = ? AND completed = total", (job_id,))
+    return conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()["status"] == "completed"
+
+
+def _fail_exhausted(conn, now: float) -> list:
+    # Inside the caller's transaction: files whose lease ran out MAX_ATTEMPTS
+    # times become failed. Returns the jobs this finished.
+    rows = conn.execute("""
+        SELECT job_id, idx, filename FROM job_files
+        WHERE status = 'running' AND COALESCE(lease_expires_at, 0) < ? AND attempts >= ?
+    """, (now, MAX_ATTEMPTS)).fetchall()
+    for row in rows:
+        result = {"filename": row["filename"], "error": f"Processing did not finish after {MAX_ATTEMPTS} attempts"}
+        conn.execute(
+            "UPDATE job_files SET status = 'failed', result = ?, lease_owner = NULL, lease_expires_at = NULL "
+            "WHERE job_id = ? AND idx = ?",
+            (json.dumps(result), row["job_id"], row["idx"]),
+        )
+    if rows:
+        metrics.inc("ingest_files_abandoned", len(rows))
+    return [job_id for job_id in dict.fromkeys(row["job_id"] for row in rows) if _update_progress(conn, job_id)]
+
+
+def _remove_spool(job_ids):
+    for job_id in job_ids:
+        shutil.rmtree(os.path.join(JOB_SPOOL_DIR, job_id), ignore_errors=True)
+
+
+def claim_next_file():
+    conn = _connect()
+    try:
+        # IMMEDIATE takes the write lock up front, so two workers never claim the same row
+        conn.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        finished = _fail_exhausted(conn, now)
+        row = conn.execute("""
+            SELECT f.job_id, f.idx, f.filename, f.content_type, f.path, j.uid, j.kind
+            FROM job_files f JOIN jobs j ON j.id = f.job_id
+            WHERE f.status = 'queued'
+               OR (f.status = 'running' AND COALESCE(f.lease_expires_at, 0) < ?)
+            ORDER BY j.created_at, f.idx
+            LIMIT 1
+        """, (now,)).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            _remove_spool(finished)
+            return None
+        owner = f"{os.getpid()}:{uuid.uuid4().hex[:12]}"
+        conn.execute(
+            "UPDATE job_files SET status = 'running', lease_owner = ?, lease_expires_at = ?, attempts = attempts + 1 "
+            "WHERE job_id = ? AND idx = ?",
+            (owner, now + LEASE_SECONDS, row["job_id"], row["idx"]),
+        )
+        conn.execute("UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?", (now, row["job_id"]))
+        conn.execute("COMMIT")
+        _remove_spool(finished)
+        return {**dict(row), "lease_owner": owner}
+    finally:
+        conn.close()
+
+
+def renew_lease(job_id: str, idx: int, owner: str) -> bool:
+    # False when the lease already expired and another worker took the file
+    conn = _connect()
+    try:
+        cursor = conn.execute(
+            "UPDATE job_files SET lease_expires_at = ? WHERE job_id = ? AND idx = ? AND status = 'running' AND lease_owner = ?",
+            (time.time() + LEASE_SECONDS, job_id, idx, owner),
+        )
+        return cursor.rowcount > 0
+    finally:
+        conn.close()
+
+
+def complete_file(job_id: str, idx: int, owner: str, result: dict):
+    status = "failed" if "error" in result else "completed"
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        updated = conn.execute(
+            "UPDATE job_files SET status = ?, result = ?, lease_owner = NULL, lease_expires_at = NULL "
+            "WHERE job_id = ? AND idx = ? AND status = 'running' AND lease_owner = ?",
+            (status, json.dumps(result, default=str), job_id, idx, owner),
+        ).rowcount
+        if not updated:
+            # Lease lost: the worker that took the file over records its result
+            conn.execute("COMMIT")
+            return
+        finished = _update_progress(conn, job_id)
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    if finished:
+        _remove_spool([job_id])
+
+
+def purge_finished_jobs() -> int:
+    # Drops jobs that finished more than JOB_RETENTION_SECONDS ago, with their
+    # file rows, results and any spool files left behind
+    cutoff = time.time() - JOB_RETENTION_SECONDS
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        job_ids = [row["id"] for row in conn.execute(
+            "SELECT id FROM jobs WHERE status = 'completed' AND updated_at < ?", (cutoff,)
+        )]
+        for job_id in job_ids:
+            conn.execute("DELETE FROM job_files WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    _remove_spool(job_ids)
+    return len(job_ids)
+
+
+def get_job(job_id: str, uid: str):
+    conn = _connect()
+    try:
+        job = conn.execute("SELECT * FROM jobs WHERE id = ? AND uid = ?", (job_id, uid)).fetchone()
+        if job is None:
+            return None
+        files = conn.execute(
+            "SELECT idx, filename, status, result FROM job_files WHERE job_id = ? ORDER BY idx", (job_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "total": job["total"],
+        "completed": job["completed"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "results": [
+            {
+                "filename": f["filename"],
+                "status": f["status"],
+                **(json.loads(f["result"]) if f["result"] else {}),
+            }
+            for f in files
+        ],
+    }
+
+
+async def _run_file(claimed: dict) -> dict:
+    process = processors[claimed["kind"]]
+    with open(claimed["path"], "rb") as f:
+        upload = UploadFile(
+            f,
+            filename=claimed["filename"],
+            headers=Headers({"content-type": claimed["content_type"] or ""}),
+        )
+        try:
+            with metrics.track_request(f"job {claimed['kind']}", claimed["uid"]):
+                return await process(claimed["uid"], upload)
+        except Exception as e:
+            return {"filename": claimed["filename"], "error": str(e)}
+
+
+async def _keep_lease(claimed: dict):
+    while True:
+        await asyncio.sleep(LEASE_RENEW_SECONDS)
+        try:
+            if not await asyncio.to_thread(renew_lease, claimed["job_id"], claimed["idx"], claimed["lease_owner"]):
+                return
+        except Exception:
+            # Try again on the next tick; the lease outlasts a few missed renewals
+            logger.exception("Renewing the lease on %s/%s failed", claimed["job_id"], claimed["idx"])
+
+
+async def worker_loop():
+    while True:
+        try:
+            claimed = await asyncio.to_thread(claim_next_file)
+            if claimed is None:
+                await asyncio.sleep(POLL_INTERVAL_SECONDS)
+                continue
+            renewer = asyncio.create_task(_keep_lease(claimed))
+            try:
+                result = await _run_file(claimed)
+            finally:
+                renewer.cancel()
+            await asyncio.to_thread(complete_file, claimed["job_id"], claimed["idx"], claimed["lease_owner"], result)
+        except Exception:
+            # A SQLite error (locked database, full disk) costs this iteration
+            # only. A file whose result was not recorded keeps its lease until
+            # it expires and is then processed again.
+            logger.exception("Ingestion worker iteration failed")
+            metrics.inc("ingest_worker_errors")
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+
+async def purge_loop():
+    while True:
+        try:
+            purged = await asyncio.to_thread(purge_finished_jobs)
+            if purged:
+                logger.info("Purged %d finished ingestion jobs", purged)
+        except Exception:
+            logger.exception("Purging finished ingestion jobs failed")
+        await asyncio.sleep(PURGE_INTERVAL_SECONDS)
+
+
+def start_workers(count: int = None) -> list:
+    init_job_store()
+    workers = [asyncio.create_task(worker_loop()) for _ in range(count if count is not None else INGEST_WORKERS)]
+    return workers + [asyncio.create_task(purge_loop())]
+
+
+async def stop_workers(workers: list):
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
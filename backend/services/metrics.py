@@ -0,0 +1,255 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+import env  # noqa: F401  (loads .env)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# /metrics without METRICS_TOKEN (e.g. a scraper on a private network). uid
+# labels identify users, so per-user series are off in that mode.
+METRICS_PUBLIC = os.getenv("METRICS_PUBLIC", "false").lower() == "true"
+# Per-user series are kept for the first METRICS_MAX_USERS uids seen by this
+# worker; later users are folded into uid="other" to bound label cardinality.
+METRICS_PER_USER = os.getenv("METRICS_PER_USER", "true").lower() == "true" and not METRICS_PUBLIC
+METRICS_MAX_USERS = int(os.getenv("METRICS_MAX_USERS", "500"))
+PREFIX = "recruitpro_"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+# Counters that are also summed per request and per user
+REQUEST_COUNTERS = ("firestore_reads", "firestore_writes", "gemini_input_tokens", "gemini_output_tokens")
+
+HELP = {
+    "stage_seconds": "Time spent in one pipeline stage",
+    "stage_wait_seconds": "Time waiting for a pipeline stage's concurrency slot",
+    "request_seconds": "HTTP request latency, including streamed bodies",
+    "requests_total": "HTTP requests by route and status",
+    "firestore_reads_total": "Firestore documents read",
+    "firestore_writes_total": "Firestore documents written or deleted",
+    "firestore_retries_total": "Retried Firestore batch commits",
+    "gemini_input_tokens_total": "Gemini prompt tokens billed",
+    "gemini_output_tokens_total": "Gemini output tokens billed",
+    "gemini_cached_tokens_total": "Gemini prompt tokens served from the context cache",
+    "gemini_retries_total": "Retried Gemini calls",
+    "ingest_worker_errors_total": "Ingestion worker iterations that failed (job store errors)",
+    "user_requests_total": "Requests per user (uid=\"other\" past METRICS_MAX_USERS)",
+}
+for _name in REQUEST_COUNTERS:
+    HELP[f"request_{_name}"] = f"{HELP[_name + '_total']} per request"
+    HELP[f"user_{_name}_total"] = f"{HELP[_name + '_total']} per user"
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [count per bucket..., count above last bucket, sum, count]
+_buckets = {}     # histogram name -> bucket bounds
+_stats = {}       # name -> module-level stats dict, read at scrape time
+_users = set()
+_request = contextvars.ContextVar("metrics_request", default=None)
+
+
+class RequestMetrics:
+    # Per-request totals. Mutable and shared with threads started through
+    # asyncio.to_thread, which copies the context.
+    __slots__ = ("route", "uid", "counts")
+
+    def __init__(self, route: str, uid: str = None):
+        self.route = route
+        self.uid = uid
+        self.counts = dict.fromkeys(REQUEST_COUNTERS, 0)
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _inc_locked(key: tuple, amount: float):
+    _counters[key] = _counters.get(key, 0) + amount
+
+
+def _observe_locked(key: tuple, value: float, buckets: tuple):
+    histogram = _histograms.get(key)
+    if histogram is None:
+        _buckets.setdefault(key[0], buckets)
+        histogram = _histograms[key] = [0] * (len(buckets) + 3)
+    histogram[bisect.bisect_left(buckets, value)] += 1
+    histogram[-2] += value
+    histogram[-1] += 1
+
+
+def inc(name: str, amount: float = 1, **labels):
+    if not METRICS_ENABLED or not amount:
+        return
+    key = (name, _labels(labels))
+    current = _request.get()
+    with _lock:
+        _inc_locked(key, amount)
+        if current is not None and name in current.counts:
+            current.counts[name] += amount
+
+
+def observe(name: str, value: float, buckets: tuple = LATENCY_BUCKETS, **labels):
+    if not METRICS_ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _observe_locked(key, value, buckets)
+
+
+def record_firestore(reads: int = 0, writes: int = 0):
+    inc("firestore_reads", reads)
+    inc("firestore_writes", writes)
+
+
+class timed:
+    # Works around both sync and async code: with timed("parse"): ...
+    # A class rather than @contextmanager, which costs a generator per use.
+    __slots__ = ("stage", "op", "started")
+
+    def __init__(self, stage: str, op: str = ""):
+        self.stage = stage
+        self.op = op
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe("stage_seconds", time.perf_counter() - self.started, stage=self.stage, op=self.op)
+
+
+def register_stats(name: str, stats: dict):
+    # Existing stats dicts (cache hits, retries...) exported as-is at scrape time
+    _stats[name] = stats
+
+
+def set_user(uid: str):
+    current = _request.get()
+    if current is not None:
+        current.uid = uid
+
+
+def _finish_request(current: RequestMetrics, seconds: float, status: str = None):
+    # Everything a finished request records, under one lock acquisition
+    route = (("route", current.route),)
+    with _lock:
+        if status is not None:
+            _inc_locked(("requests", route + (("status", status),)), 1)
+            _observe_locked(("request_seconds", route), seconds, LATENCY_BUCKETS)
+        for name, value in current.counts.items():
+            _observe_locked((f"request_{name}", route), value, COUNT_BUCKETS)
+        if METRICS_PER_USER and current.uid:
+            uid = current.uid
+            if uid not in _users:
+                if len(_users) < METRICS_MAX_USERS:
+                    _users.add(uid)
+                else:
+                    uid = "other"
+            user = (("uid", uid),)
+            _inc_locked(("user_requests", user), 1)
+            for name, value in current.counts.items():
+                if value:
+                    _inc_locked((f"user_{name}", user), value)
+
+
+@contextmanager
+def track_request(route: str, uid: str = None):
+    # Request scope for work outside HTTP handling, e.g. background ingestion jobs
+    current = RequestMetrics(route, uid)
+    token = _request.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    finally:
+        _request.reset(token)
+        if METRICS_ENABLED:
+            _finish_request(current, time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    # Plain ASGI middleware rather than BaseHTTPMiddleware: it sees the end of
+    # streamed bodies and adds no extra task per request.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        current = RequestMetrics("unmatched")
+        token = _request.set(current)
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                current.route = f"{scope['method']} {route.path}"
+            _finish_request(current, time.perf_counter() - started, status)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def render() -> str:
+    # Prometheus text exposition format 0.0.4
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, list(values)) for key, values in _histograms.items())
+        stats = {name: dict(values) for name, values in _stats.items()}
+
+    lines = []
+    seen = set()
+
+    def header(metric: str, kind: str, help_key: str):
+        if metric not in seen:
+            seen.add(metric)
+            lines.append(f"# HELP {metric} {HELP.get(help_key, help_key.replace('_', ' '))}")
+            lines.append(f"# TYPE {metric} {kind}")
+
+    for (name, labels), value in counters:
+        metric = f"{PREFIX}{name}_total"
+        header(metric, "counter", f"{name}_total")
+        lines.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+
+    for (name, labels), values in histograms:
+        metric = f"{PREFIX}{name}"
+        header(metric, "histogram", name)
+        cumulative = 0
+        bounds = [_format_value(bound) for bound in _buckets[name]] + ["+Inf"]
+        for bound, count in zip(bounds, values[:-2]):
+            cumulative += count
+            lines.append(f"{metric}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+        lines.append(f"{metric}_sum{_format_labels(labels)} {_format_value(values[-2])}")
+        lines.append(f"{metric}_count{_format_labels(labels)} {values[-1]}")
+
+    for name, values in sorted(stats.items()):
+        metric = f"{PREFIX}{name}_total"
+        header(metric, "counter", f"{name} events")
+        for event, value in sorted(values.items()):
+            lines.append(f"{metric}{_format_labels((('event', event),))} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
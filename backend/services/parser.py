@@ -1,9 +1,170 @@
 import io
+import re
+import fitz
 from docx import Document
+from docx.oxml.ns import qn
+from docx.table import Table
+
+# Below this a PDF is treated as scanned/image-only and sent to Gemini as bytes
+MIN_CHARS_PER_PAGE = 200
+MIN_READABLE_RATIO = 0.85
+
+_SPACES = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+RTF_CONTENT_TYPES = {"application/rtf", "text/rtf"}
+
+
+def _table_lines(table):
+    lines = []
+    for row in table.rows:
+        cells = []
+        for cell in row.cells:
+            text = " ".join(p.text.strip() for p in cell.paragraphs if p.text.strip())
+            # Merged cells repeat the same object across the row
+            if text and (not cells or cells[-1] != text):
+                cells.append(text)
+        if cells:
+            lines.append(" | ".join(cells))
+    return lines
+
+
+def _block_lines(container):
+    # Paragraphs and tables in document order
+    lines = []
+    for block in container.iter_inner_content():
+        if isinstance(block, Table):
+            lines.extend(_table_lines(block))
+        elif block.text.strip():
+            lines.append(block.text.strip())
+    return lines
 
 
 def extract_text_from_docx(data):
     doc = Document(io.BytesIO(data))
-    return "\n".join([para.text.strip() for para in doc.paragraphs if para.text.strip()])
+    lines = []
+    seen_parts = set()
+    for section in doc.sections:
+        for part in (section.header, section.footer):
+            # Linked headers/footers point at the same part in every section
+            if not part.is_linked_to_previous and id(part.part) not in seen_parts:
+                seen_parts.add(id(part.part))
+                lines.extend(_block_lines(part))
+
+    lines.extend(_block_lines(doc))
+
+    # Text boxes (w:txbxContent) live inside drawing runs that Paragraph.text skips.
+    # Word stores each box twice (DrawingML + VML fallback), hence the dedupe.
+    seen_boxes = set()
+    for box in doc.element.body.iter(qn("w:txbxContent")):
+        text = "\n".join("".join(t.text or "" for t in p.iter(qn("w:t"))).strip() for p in box.iter(qn("w:p"))).strip()
+        if text and text not in seen_boxes:
+            seen_boxes.add(text)
+            lines.append(text)
+    return "\n".join(lines)
+
+
+_RTF_DESTINATIONS = {
+    "fonttbl", "colortbl", "stylesheet", "info", "pict", "object", "header", "footer",
+    "headerl", "headerr", "footerl", "footerr", "fldinst", "themedata", "datastore",
+    "latentstyles", "listtable", "listoverridetable", "rsidtbl", "generator", "xmlnstbl",
+}
+_RTF_TOKEN = re.compile(r"\\([a-z]{1,32})(-?\d{1,10})? ?|\\'([0-9a-f]{2})|\\([^a-z])|([{}])|[\r\n]+|(.)", re.I | re.S)
+
+
+def extract_text_from_rtf(data):
+    rtf = data.decode("latin-1") if isinstance(data, bytes) else data
+    stack, ignorable, out = [], False, []
+    skip = 0  # \uN is followed by one ANSI fallback character we must drop
+    for word, arg, hexcode, char, brace, plain in _RTF_TOKEN.findall(rtf):
+        if skip and (plain or hexcode):
+            skip -= 1
+            continue
+        skip = 0
+        if brace == "{":
+            stack.append(ignorable)
+        elif brace == "}":
+            ignorable = stack.pop() if stack else False
+        elif char:
+            if char == "*":
+                ignorable = True
+            elif not ignorable and char in "\\{}":
+                out.append(char)
+            elif not ignorable and char == "~":
+                out.append(" ")
+        elif word:
+            if word.lower() in _RTF_DESTINATIONS:
+                ignorable = True
+            elif ignorable:
+                continue
+            elif word in ("par", "line", "row"):
+                out.append("\n")
+            elif word in ("tab", "cell"):
+                out.append("\t")
+            elif word == "u" and arg:
+                out.append(chr(int(arg) % 65536))
+                skip = 1
+        elif hexcode and not ignorable:
+            out.append(bytes([int(hexcode, 16)]).decode("cp1252", errors="replace"))
+        elif plain and not ignorable:
+            out.append(plain)
+    lines = (_SPACES.sub(" ", line).strip() for line in "".join(out).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def extract_text_from_plain(data):
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = data.decode("latin-1")
+    return _BLANK_LINES.sub("\n\n", text.replace("\r\n", "\n")).strip()
+
+
+def extract_text_from_pdf(data) -> tuple:
+    # Returns (text, page_count). Blocks are read in reading order (sort=True)
+    # so two-column resumes don't interleave lines from both columns.
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        pages = []
+        for page in doc:
+            blocks = page.get_text("blocks", sort=True)
+            lines = [_SPACES.sub(" ", b[4]).strip() for b in blocks if b[6] == 0]
+            pages.append("\n".join(line for line in lines if line))
+        text = _BLANK_LINES.sub("\n\n", "\n\n".join(pages)).strip()
+        return text, doc.page_count
+
+
+def is_usable_text_layer(text: str, page_count: int) -> bool:
+    if not text or page_count == 0:
+        return False
+    if len(text) / page_count < MIN_CHARS_PER_PAGE:
+        return False
+    # Broken font encodings come out as replacement, control or private-use characters
+    readable = sum(1 for ch in text if ch.isprintable() or ch in "\n\t") - text.count("\ufffd")
+    return readable / len(text) >= MIN_READABLE_RATIO
+
+
+def extract_pdf_text_layer(data):
+    # Text when the PDF has a good text layer, otherwise None (caller sends raw bytes)
+    try:
+        text, page_count = extract_text_from_pdf(data)
+    except Exception:
+        return None
+    return text if is_usable_text_layer(text, page_count) else None
 
 
+def extract_document_text(data, filename: str = "", content_type: str = ""):
+    # Text to send to Gemini, or None when only the raw bytes will do
+    # (image-only PDFs, unknown formats).
+    name = (filename or "").lower()
+    content_type = content_type or ""
+    if name.endswith(".docx") or content_type == DOCX_CONTENT_TYPE:
+        return extract_text_from_docx(data)
+    if name.endswith(".rtf") or content_type in RTF_CONTENT_TYPES or data.startswith(b"{\\rtf"):
+        return extract_text_from_rtf(data)
+    if name.endswith(".txt") or content_type == "text/plain":
+        return extract_text_from_plain(data)
+    if data.startswith(b"%PDF"):
+        return extract_pdf_text_layer(data)
+    return None
@@ -0,0 +1,155 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import resource
+import time
+import env  # noqa: F401  (loads .env)
+from services import metrics
+
+PARSER_WORKERS = int(os.getenv("PARSER_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARSE_TIMEOUT_SECONDS = float(os.getenv("PARSE_TIMEOUT_SECONDS", "30"))
+PARSER_MEMORY_LIMIT_MB = int(os.getenv("PARSER_MEMORY_LIMIT_MB", "1024"))
+# Documents go to the workers in chunks of this size, so the API process
+# never holds a whole file
+SEND_CHUNK_SIZE = 1024 * 1024
+
+# Idle workers, PARSER_WORKERS slots in all; None marks a slot whose process
+# has not been started yet or was killed. Taking a slot is the concurrency gate.
+_idle = None
+
+
+def _limit_worker_memory(limit_mb: int):
+    # A pathological document raises MemoryError in the worker instead of
+    # taking the API process down with it.
+    limit = limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _recv_document(conn):
+    # Worker side of _Worker.run: a (filename, content_type) header, then the
+    # document's chunks, then an empty chunk
+    filename, content_type = conn.recv()
+    data = bytearray()
+    while chunk := conn.recv_bytes():
+        data += chunk
+    return bytes(data), filename, content_type
+
+
+def _worker_main(conn, limit_mb: int):
+    _limit_worker_memory(limit_mb)
+    # Imported here so PyMuPDF and python-docx load in the workers only, not
+    # in the API process
+    from services.parser import extract_document_text
+    conn.send(("ready", None))
+    while True:
+        try:
+            data, filename, content_type = _recv_document(conn)
+        except EOFError:
+            return
+        try:
+            conn.send(("ok", extract_document_text(data, filename, content_type)))
+        except BaseException as e:
+            try:
+                conn.send(("error", e))
+            except Exception:
+                # Exception that does not pickle
+                conn.send(("error", RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class _Worker:
+    # One spawned parser process. Unlike a ProcessPoolExecutor worker it can
+    # be killed on its own, so a timed-out parse costs only its own request.
+    def __init__(self):
+        # spawn, not fork: workers start small (so the memory cap is meaningful)
+        # and don't inherit the gRPC/HTTP client threads of the API process
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, PARSER_MEMORY_LIMIT_MB), daemon=True)
+        self.process.start()
+        child_conn.close()
+        # Start-up and imports don't count against the first parse's timeout
+        self.conn.recv()
+
+    def run(self, source, filename: str, content_type: str):
+        # Blocking; EOFError/OSError when the process dies mid-parse.
+        # source is a binary file, read from the start
+        source.seek(0)
+        self.conn.send((filename, content_type))
+        while chunk := source.read(SEND_CHUNK_SIZE):
+            self.conn.send_bytes(chunk)
+        self.conn.send_bytes(b"")
+        return self.conn.recv()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+
+
+def _get_idle() -> asyncio.Queue:
+    global _idle
+    if _idle is None:
+        _idle = asyncio.Queue()
+        for _ in range(PARSER_WORKERS):
+            _idle.put_nowait(None)
+    return _idle
+
+
+def shutdown_parser_pool():
+    global _idle
+    if _idle is not None:
+        while not _idle.empty():
+            worker = _idle.get_nowait()
+            if worker is not None:
+                worker.kill()
+        _idle = None
+
+
+async def _run_on(worker: _Worker, source, filename: str, content_type: str):
+    with metrics.timed("parse", "extract_document_text"):
+        return await asyncio.wait_for(
+            asyncio.to_thread(worker.run, source, filename, content_type),
+            timeout=PARSE_TIMEOUT_SECONDS,
+        )
+
+
+async def parse_document(data, filename: str = "", content_type: str = ""):
+    # Same contract as services.parser.extract_document_text: text, or None
+    # when the caller should send the raw bytes to Gemini. data is bytes or a
+    # binary file such as an UploadFile's spooled .file, which is streamed to
+    # the worker instead of being read into memory here.
+    source = io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+    idle = _get_idle()
+    waiting_since = time.perf_counter()
+    worker = await idle.get()
+    metrics.observe("stage_wait_seconds", time.perf_counter() - waiting_since, stage="parse")
+    try:
+        for attempt in range(2):
+            if worker is None:
+                worker = await asyncio.to_thread(_Worker)
+            try:
+                status, value = await _run_on(worker, source, filename, content_type)
+            except asyncio.TimeoutError:
+                # Only this parse's process is stopped; the other slots keep working
+                worker.kill()
+                worker = None
+                raise RuntimeError(f"Parsing {filename} timed out after {PARSE_TIMEOUT_SECONDS:g}s")
+            except asyncio.CancelledError:
+                # The caller went away mid-parse; the process still owes a reply
+                worker.kill()
+                worker = None
+                raise
+            except (EOFError, OSError):
+                # The process died (crash, OOM kill): one retry on a fresh process
+                worker.kill()
+                worker = None
+                if attempt:
+                    raise RuntimeError(f"Parser process crashed while reading {filename}")
+                continue
+            if status == "ok":
+                return value
+            if isinstance(value, MemoryError):
+                raise RuntimeError(f"Parsing {filename} exceeded {PARSER_MEMORY_LIMIT_MB} MB")
+            raise value
+    finally:
+        idle.put_nowait(worker)
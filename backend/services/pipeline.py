@@ -0,0 +1,68 @@
+import asyncio
+import os
+import time
+import env  # noqa: F401  (loads .env)
+from services import metrics
+
+MAX_IN_FLIGHT_FILES = int(os.getenv("PIPELINE_MAX_IN_FLIGHT", "8"))
+
+# Per-stage concurrency limits, shared by every request on this worker
+stage_limits = {
+    "azure": asyncio.Semaphore(int(os.getenv("PIPELINE_AZURE_CONCURRENCY", "8"))),
+    "gemini": asyncio.Semaphore(int(os.getenv("PIPELINE_GEMINI_CONCURRENCY", "4"))),
+    "firestore": asyncio.Semaphore(int(os.getenv("PIPELINE_FIRESTORE_CONCURRENCY", "16"))),
+}
+
+
+async def run_stage(stage: str, func, *args, **kwargs):
+    waiting_since = time.perf_counter()
+    async with stage_limits[stage]:
+        metrics.observe("stage_wait_seconds", time.perf_counter() - waiting_since, stage=stage)
+        with metrics.timed(stage, getattr(func, "__name__", "")):
+            if asyncio.iscoroutinefunction(func):
+                return await func(*args, **kwargs)
+            # Blocking SDK calls (Azure, Firestore) run off the event loop
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+
+async def run_pipeline(items, process, on_error=None, max_in_flight: int = None) -> list:
+    gate = asyncio.Semaphore(max_in_flight or MAX_IN_FLIGHT_FILES)
+
+    async def run_one(item):
+        async with gate:
+            try:
+                return await process(item)
+            except Exception as e:
+                if on_error:
+                    return on_error(item, e)
+                return {"error": str(e)}
+
+    # gather keeps results in input order regardless of completion order
+    return await asyncio.gather(*(run_one(item) for item in items))
+
+
+async def iter_pipeline(items, process, on_error=None, max_in_flight: int = None):
+    # Same limits as run_pipeline, but yields (index, result) as each item finishes
+    gate = asyncio.Semaphore(max_in_flight or MAX_IN_FLIGHT_FILES)
+
+    async def run_one(index, item):
+        async with gate:
+            try:
+                return index, await process(item)
+            except Exception as e:
+                if on_error:
+                    return index, on_error(item, e)
+                return index, {"error": str(e)}
+
+    # Only unfinished tasks are kept: a finished task is dropped as soon as its
+    # result is yielded, so results don't pile up for the whole response
+    pending = {asyncio.create_task(run_one(index, item)) for index, item in enumerate(items)}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            while done:
+                yield done.pop().result()
+    finally:
+        # Client went away: stop work that nobody will read
+        for task in pending:
+            task.cancel()
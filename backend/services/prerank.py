@@ -0,0 +1,129 @@
+import math
+import os
+import re
+import numpy as np
+import env  # noqa: F401  (loads .env)
+from services.skills import normalize_skill
+
+# Only the PRERANK_TOP_N most relevant candidates per JD go to the LLM scorer; 0 disables the cutoff
+PRERANK_TOP_N = int(os.getenv("PRERANK_TOP_N", "50"))
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_TERMS = 200
+
+# Field weights for the candidate document (a simple BM25F): a skill listed in
+# technical_skills says more than the same word in a project description.
+CANDIDATE_FIELD_WEIGHTS = {
+    "technical_skills": 3.0,
+    "designation": 2.0,
+    "professional_summary": 1.0,
+    "projects": 1.0,
+}
+JD_FIELD_WEIGHTS = {
+    "required_skills": 3.0,
+    "jobtitle": 2.0,
+    "qualifications": 1.0,
+    "responsibilities": 1.0,
+}
+# Bump when tokenization or weights change so stored vectors are recomputed
+TERM_VECTOR_VERSION = 1
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]\+*#?")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "of", "on", "or", "our", "the", "this", "to", "was", "we", "will", "with", "you", "your",
+    "experience", "years", "year", "work", "working", "using", "used", "team", "strong", "good",
+}
+
+
+def _text_terms(text) -> list:
+    if isinstance(text, (list, tuple)):
+        return [term for item in text for term in _text_terms(item)]
+    if isinstance(text, dict):
+        return [term for value in text.values() for term in _text_terms(value)]
+    if not isinstance(text, str):
+        return []
+    words = (normalize_skill(word) for word in _WORD.findall(text.lower()))
+    return [word for word in words if word and word not in STOPWORDS]
+
+
+def _skill_terms(skills) -> list:
+    # Whole normalized skills ("machine learning") plus their words, so a JD
+    # asking for "machine learning" also matches "ml" spelled out in a summary
+    terms = []
+    for skill in skills or []:
+        token = normalize_skill(skill)
+        if token:
+            terms.append(token)
+            if " " in token:
+                terms.extend(_text_terms(token))
+    return terms
+
+
+def _weighted_terms(document: dict, field_weights: dict, skills_field: str) -> dict:
+    weights = {}
+    for field, field_weight in field_weights.items():
+        value = document.get(field)
+        terms = _skill_terms(value) if field == skills_field else _text_terms(value)
+        for term in terms:
+            weights[term] = weights.get(term, 0.0) + field_weight
+    return weights
+
+
+def candidate_term_vector(candidate: dict) -> dict:
+    # Stored on the candidate document at upload time as "term_vector"
+    terms = _weighted_terms(candidate, CANDIDATE_FIELD_WEIGHTS, "technical_skills")
+    length = sum(terms.values())
+    if len(terms) > MAX_TERMS:
+        terms = dict(sorted(terms.items(), key=lambda item: -item[1])[:MAX_TERMS])
+    return {"version": TERM_VECTOR_VERSION, "length": length, "terms": terms}
+
+
+def jd_query_terms(jd: dict) -> dict:
+    return _weighted_terms(jd, JD_FIELD_WEIGHTS, "required_skills")
+
+
+def _term_vector(candidate: dict) -> dict:
+    vector = candidate.get("term_vector")
+    if not vector or vector.get("version") != TERM_VECTOR_VERSION:
+        # Documents written before vectors existed (or with an older version)
+        vector = candidate_term_vector(candidate)
+    return vector
+
+
+def bm25_scores(query: dict, vectors: list) -> np.ndarray:
+    # IDF is computed over the candidates being ranked (the skill-overlap pool)
+    if not vectors or not query:
+        return np.zeros(len(vectors))
+    query_terms = list(query)
+    tf = np.array([[v["terms"].get(t, 0.0) for t in query_terms] for v in vectors], dtype=np.float64)
+    lengths = np.array([v["length"] for v in vectors], dtype=np.float64)
+    avg_length = lengths.mean() or 1.0
+
+    doc_freq = (tf > 0).sum(axis=0)
+    idf = np.log(1 + (len(vectors) - doc_freq + 0.5) / (doc_freq + 0.5))
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length)
+    saturated = tf * (BM25_K1 + 1) / (tf + norm[:, None])
+    query_weights = np.array([query[t] for t in query_terms], dtype=np.float64)
+    return saturated @ (idf * query_weights)
+
+
+def rank_candidates(jd: dict, candidates: list) -> list:
+    # All candidates, most relevant to the JD first. Ties keep input order.
+    scores = bm25_scores(jd_query_terms(jd), [_term_vector(c) for c in candidates])
+    return [candidates[i] for i in np.argsort(-scores, kind="stable")]
+
+
+def prerank_candidates(jd: dict, candidates: list, top_n: int = None) -> list:
+    # The top_n most relevant candidates; smaller pools are passed through as is
+    top_n = PRERANK_TOP_N if top_n is None else top_n
+    if not top_n or len(candidates) <= top_n:
+        return list(candidates)
+    return rank_candidates(jd, candidates)[:top_n]
+
+
+def recall_at_n(ranked_ids: list, relevant_ids, n: int) -> float:
+    relevant = set(relevant_ids)
+    if not relevant:
+        return math.nan
+    return len(relevant.intersection(ranked_ids[:n])) / len(relevant)
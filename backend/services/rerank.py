@@ -0,0 +1,99 @@
+import numpy as np
+from firebase_admin import firestore
+from firebase_config import db
+from services.scoring import load_user_weights, invalidate_user_weights
+from storage.leaderboard import rebuild_leaderboards
+
+SCORE_FIELDS = ["skills_score", "experience_score", "education_score", "certifications_score"]
+CATEGORIES = ["skills", "experience", "education", "certifications"]
+BATCH_SIZE = 400
+
+
+def weight_matrix(user_weights: dict, profile_types: list) -> np.ndarray:
+    matrix = np.zeros((len(profile_types), len(CATEGORIES)))
+    for row, profile_type in enumerate(profile_types):
+        weights = user_weights.get(profile_type, {})
+        total_weight = sum(weights.values()) or 1
+        matrix[row] = [weights.get(k, 0) / total_weight for k in CATEGORIES]
+    return matrix
+
+
+def compute_totals(scores: np.ndarray, profile_index: np.ndarray, weights: np.ndarray):
+    # Same rounding as calculate_total_score: each weighted part, then the sum
+    row_weights = weights[profile_index]
+    weighted = np.round(scores * row_weights, 2)
+    totals = np.round(weighted.sum(axis=1), 2)
+    return totals, weighted, np.round(row_weights, 2)
+
+
+def _load_columns(uid: str, profile_types: list, roles=None):
+    refs, scores, profile_index, old_totals = [], [], [], []
+    top_score_ref = db.collection("users").document(uid).collection("top_score")
+    # list_documents also yields JD ids whose parent doc was never written
+    for jd_ref in top_score_ref.list_documents():
+        query = jd_ref.collection("candidates").select(SCORE_FIELDS + ["profile_type", "total_score"])
+        for doc in query.stream():
+            data = doc.to_dict()
+            profile_type = data.get("profile_type") or "senior_engineer"
+            if profile_type not in profile_types or (roles and profile_type not in roles):
+                continue
+            refs.append(doc.reference)
+            scores.append([data.get(field) or 0 for field in SCORE_FIELDS])
+            profile_index.append(profile_types.index(profile_type))
+            old_totals.append(data.get("total_score"))
+    return (
+        refs,
+        np.array(scores, dtype=float).reshape(-1, len(SCORE_FIELDS)),
+        np.array(profile_index, dtype=int),
+        np.array([np.nan if t is None else t for t in old_totals], dtype=float),
+    )
+
+
+def rerank_user_scores(uid: str, roles=None, progress=None) -> dict:
+    invalidate_user_weights(uid)
+    user_weights = load_user_weights(uid)
+    profile_types = sorted(user_weights)
+    status_ref = db.collection("users").document(uid).collection("rerank_jobs").document("latest")
+
+    report = {"status": "running", "scanned": 0, "changed": 0, "written": 0}
+    try:
+        refs, scores, profile_index, old_totals = _load_columns(uid, profile_types, roles)
+        totals, weighted, row_weights = compute_totals(scores, profile_index, weight_matrix(user_weights, profile_types))
+
+        changed = np.flatnonzero(np.isnan(old_totals) | (np.abs(totals - old_totals) > 1e-9))
+        report.update(scanned=len(refs), changed=int(changed.size))
+        status_ref.set({**report, "updated_at": firestore.SERVER_TIMESTAMP})
+
+        for start in range(0, changed.size, BATCH_SIZE):
+            batch = db.batch()
+            chunk = changed[start:start + BATCH_SIZE]
+            for i in chunk:
+                batch.update(refs[i], {
+                    "total_score": float(totals[i]),
+                    "score_breakdown": {
+                        k: {
+                            "score": float(scores[i, c]),
+                            "weight": float(row_weights[i, c]),
+                            "weighted": float(weighted[i, c]),
+                        }
+                        for c, k in enumerate(CATEGORIES)
+                    },
+                })
+            # Progress rides along in the same commit
+            written = report["written"] + int(chunk.size)
+            batch.set(status_ref, {**report, "written": written, "updated_at": firestore.SERVER_TIMESTAMP})
+            batch.commit()
+            report["written"] = written
+            if progress:
+                progress(report["written"], report["changed"])
+
+        # New totals can reorder any board, so boards with a changed entry are rebuilt
+        rebuild_leaderboards(uid, sorted({refs[i].parent.parent.id for i in changed}))
+        report["status"] = "completed"
+        status_ref.set({**report, "updated_at": firestore.SERVER_TIMESTAMP})
+    except Exception as e:
+        # Readers poll this document: a run that died must not stay "running"
+        report.update(status="failed", error=str(e))
+        status_ref.set({**report, "updated_at": firestore.SERVER_TIMESTAMP})
+        raise
+    return report
@@ -0,0 +1,101 @@
+import gzip
+import hashlib
+import os
+from datetime import date, datetime
+import brotli
+import orjson
+import env  # noqa: F401  (loads .env)
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+# Bodies smaller than this go out uncompressed; the headers would eat the gain
+COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+# Bump when the JSON shape of a cached endpoint changes, so old ETags stop matching
+REPRESENTATION_VERSION = "2"
+# Preference order when the client weighs encodings equally
+ENCODINGS = ("br", "gzip")
+
+# Clients revalidate every time; a matching If-None-Match gets an empty 304
+CACHE_HEADERS = {"Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+
+
+def _default(obj):
+    # Firestore timestamps are datetime subclasses, which orjson does not take
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    return jsonable_encoder(obj)
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def make_etag(*parts) -> str:
+    # Opaque tag for a versioned resource: uid, collection, version, query parameters
+    key = "\x1f".join(str(part) for part in (REPRESENTATION_VERSION,) + parts)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def choose_encoding(accept_encoding: str):
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+    best = max(ENCODINGS, key=lambda e: (weights.get(e, weights.get("*", 0.0)), -ENCODINGS.index(e)))
+    return best if weights.get(best, weights.get("*", 0.0)) > 0 else None
+
+
+def _tag_header(etag: str, encoding) -> str:
+    # Each content coding is its own representation, so it gets its own strong tag
+    return f'"{etag}-{encoding}"' if encoding else f'"{etag}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # Any coding of the same version will do: the client stores it decoded
+        if candidate.removeprefix("W/").strip('"').split("-", 1)[0] == etag:
+            return True
+    return False
+
+
+def not_modified(request: Request, etag: str):
+    # 304 for a client that already holds this version, else None. Called
+    # before the collection is read.
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match or not _matches(if_none_match, etag):
+        return None
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    return Response(status_code=304, headers={**CACHE_HEADERS, "ETag": _tag_header(etag, encoding)})
+
+
+def json_response(request: Request, content, etag: str = None, status_code: int = 200) -> Response:
+    # orjson-encoded body, br/gzip above COMPRESSION_MIN_BYTES when the client accepts it
+    body = dumps(content)
+    headers = dict(CACHE_HEADERS) if etag else {"Vary": "Accept-Encoding"}
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    if etag:
+        headers["ETag"] = _tag_header(etag, encoding)
+    if encoding and len(body) >= COMPRESSION_MIN_BYTES:
+        if encoding == "br":
+            body = brotli.compress(body, quality=BROTLI_QUALITY)
+        else:
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
@@ -1,20 +1,62 @@
 # scoring.py
+import os
+import threading
+from cachetools import TTLCache
 from firebase_config import db
+from services import metrics
+from storage.versions import version_write
+
+WEIGHTS_CACHE_TTL_SECONDS = int(os.getenv("WEIGHTS_CACHE_TTL_SECONDS", "300"))
+
+_weights_cache = TTLCache(maxsize=10000, ttl=WEIGHTS_CACHE_TTL_SECONDS)
+_weights_lock = threading.Lock()
+
+# Firestore queries issued for weights; lets callers assert per-request read counts
+stats = {"weight_reads": 0}
+
+
+def load_user_weights(uid: str) -> dict:
+    with _weights_lock:
+        cached = _weights_cache.get(uid)
+    if cached is not None:
+        return cached
+
+    # One query returns every profile type for the user
+    user_weights = {}
+    for doc in db.collection("users").document(uid).collection("score_weights").stream():
+        data = doc.to_dict()
+        user_weights[data.get("role") or doc.id] = data.get("weights", {})
+    metrics.record_firestore(reads=max(len(user_weights), 1))
+
+    with _weights_lock:
+        stats["weight_reads"] += 1
+        if user_weights:
+            _weights_cache[uid] = user_weights
+    return user_weights
+
+
+def invalidate_user_weights(uid: str):
+    with _weights_lock:
+        _weights_cache.pop(uid, None)
+
 
 def fetch_user_weights(uid: str, profile_type: str) -> dict:
-    doc_ref = db.collection("users").document(uid).collection("score_weights").document(profile_type)
-    doc = doc_ref.get()
+    weights = load_user_weights(uid).get(profile_type)
 
-    if not doc.exists:
+    if weights is None:
         raise ValueError(f"No score weights found for user {uid} and profile {profile_type}")
     
-    data = doc.to_dict()
-    return data.get("weights", {})
+    return weights
 
 
-def calculate_total_score(candidate: dict, uid: str) -> dict:
+def calculate_total_score(candidate: dict, uid: str, user_weights: dict = None) -> dict:
     profile_type = candidate.get("profile_type", "senior_engineer")
-    weights = fetch_user_weights(uid, profile_type)
+    if user_weights is None:
+        weights = fetch_user_weights(uid, profile_type)
+    elif profile_type in user_weights:
+        weights = user_weights[profile_type]
+    else:
+        raise ValueError(f"No score weights found for user {uid} and profile {profile_type}")
 
     total_weight = sum(weights.values()) or 1
     normalized_weights = {
@@ -47,25 +89,32 @@ def calculate_total_score(candidate: dict, uid: str) -> dict:
     }
 
 
+def calculate_total_scores(candidates: list, uid: str) -> list:
+    user_weights = load_user_weights(uid)
+    return [calculate_total_score(candidate, uid, user_weights) for candidate in candidates]
 
 
 def initialize_user_weights(uid: str):
     user_doc_ref = db.collection("users").document(uid)
     weights_ref = user_doc_ref.collection("score_weights")
 
-    existing_weights = weights_ref.stream()
-
-    if not any(existing_weights): 
+    if not load_user_weights(uid): 
         default_weights = {
             "fresher": {"skills": 40, "education": 30, "certifications": 20, "experience": 10},
             "mid_level_professional": {"skills": 35, "education": 25, "certifications": 15, "experience": 25},
             "senior_engineer": {"skills": 30, "education": 20, "certifications": 10, "experience": 40},
         }
 
+        batch = db.batch()
         for role, weights in default_weights.items():
-            weights_ref.document(role).set({
+            batch.set(weights_ref.document(role), {
                 "role": role,
                 "weights": weights
             })
+        batch.set(*version_write(uid, "score_weights"), merge=True)
+        batch.commit()
+        metrics.record_firestore(writes=len(default_weights) + 1)
+        with _weights_lock:
+            _weights_cache[uid] = default_weights
 
     
\ No newline at end of file
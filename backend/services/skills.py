@@ -0,0 +1,71 @@
+import re
+
+# Canonical spelling for common aliases; keys and values are already lowercased
+SKILL_SYNONYMS = {
+    "py": "python",
+    "js": "javascript",
+    "ecmascript": "javascript",
+    "es6": "javascript",
+    "ts": "typescript",
+    "reactjs": "react",
+    "react.js": "react",
+    "nodejs": "node.js",
+    "node": "node.js",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "angularjs": "angular",
+    "golang": "go",
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "ms sql": "sql server",
+    "mssql": "sql server",
+    "amazon web services": "aws",
+    "gcp": "google cloud",
+    "google cloud platform": "google cloud",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "c sharp": "c#",
+    "csharp": "c#",
+    "cpp": "c++",
+    "dotnet": ".net",
+    "asp.net core": "asp.net",
+    "scikit learn": "scikit-learn",
+    "sklearn": "scikit-learn",
+    "tf": "tensorflow",
+    "ci/cd": "ci cd",
+    "rest api": "rest",
+    "restful api": "rest",
+    "restful apis": "rest",
+    "rest apis": "rest",
+}
+
+# "Python 3", "Java-8", "Angular v15" -> drop the separated version suffix
+_VERSION_SUFFIX = re.compile(r"[\s\-]+v?\d+(\.\d+)*(\.x|\+)?$")
+# "Python3.11", "HTML5" -> same for well-known names written with the version attached
+_ATTACHED_VERSION = re.compile(r"^(python|java|php|perl|ruby|html|css|angular|vue)\d+(\.\d+)*$")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_skill(skill) -> str:
+    if not isinstance(skill, str):
+        return ""
+    token = _WHITESPACE.sub(" ", skill.strip().lower()).strip(" ,;:")
+    token = _VERSION_SUFFIX.sub("", token)
+    token = _ATTACHED_VERSION.sub(r"\1", token)
+    return SKILL_SYNONYMS.get(token, token)
+
+
+def normalize_skills(skills) -> set:
+    return {token for token in (normalize_skill(s) for s in skills or []) if token}
+
+
+def count_overlaps(postings: dict, skills) -> dict:
+    # postings maps a normalized token to the ids that list it
+    counts = {}
+    for token in normalize_skills(skills):
+        for doc_id in postings.get(token, ()):
+            counts[doc_id] = counts.get(doc_id, 0) + 1
+    return counts
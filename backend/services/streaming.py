@@ -0,0 +1,66 @@
+import json
+from tempfile import SpooledTemporaryFile
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import UploadFile
+
+NDJSON = "application/x-ndjson"
+SSE = "text/event-stream"
+
+
+def negotiate_stream(request: Request):
+    accept = request.headers.get("accept", "")
+    for media_type in (NDJSON, SSE):
+        if media_type in accept:
+            return media_type
+    return None
+
+
+async def detach_uploads(files: list) -> list:
+    # FastAPI closes the request's files once the endpoint returns, before a
+    # streaming body runs; copy them to our own spooled files (disk above 1 MB).
+    detached = []
+    for upload in files:
+        spool = SpooledTemporaryFile(max_size=1024 * 1024)
+        await upload.seek(0)
+        while chunk := await upload.read(1024 * 1024):
+            spool.write(chunk)
+        spool.seek(0)
+        detached.append(UploadFile(spool, filename=upload.filename, headers=upload.headers))
+    return detached
+
+
+def _encode(media_type: str, event: str, payload: dict) -> str:
+    data = json.dumps(payload, default=str)
+    if media_type == SSE:
+        return f"event: {event}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+def stream_results(media_type: str, results, uploads: list, summary: dict) -> StreamingResponse:
+    # results is an async iterator of (index, result); each is written and dropped
+    async def body():
+        try:
+            total = 0
+            async for index, result in results:
+                total += 1
+                yield _encode(media_type, "result", {"index": index, **result})
+            yield _encode(media_type, "done", {**summary, "status": "completed", "total": total})
+        finally:
+            for upload in uploads:
+                upload.file.close()
+
+    return StreamingResponse(body(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def stream_events(media_type: str, events) -> StreamingResponse:
+    # events is an async iterator of progress dicts; the one with phase "done" ends the stream
+    async def body():
+        try:
+            async for event in events:
+                yield _encode(media_type, "done" if event.get("phase") == "done" else "progress", event)
+        except Exception as e:
+            # Headers are already out: end the stream with the error instead of cutting it off
+            yield _encode(media_type, "done", {"phase": "done", "errors": [{"phase": "stream", "error": str(e)}]})
+
+    return StreamingResponse(body(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -1,38 +1,144 @@
-from azure.storage.blob import BlobServiceClient, ContentSettings
-from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
+import asyncio
+import base64
+import hashlib
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from urllib.parse import unquote, urlparse
+import env  # noqa: F401  (loads .env)
 
 connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
 container_name = os.getenv("AZURE_CONTAINER_NAME")
 
-blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-container_client = blob_service_client.get_container_client(container_name)
+BLOCK_SIZE = int(os.getenv("AZURE_BLOCK_SIZE", str(4 * 1024 * 1024)))
+UPLOAD_CONCURRENCY = int(os.getenv("AZURE_UPLOAD_CONCURRENCY", "4"))
+DELETE_BATCH_SIZE = 256  # Azure blob batch limit
+
+# The Azure SDK (and aiohttp under it) is imported and the clients created on
+# first use, so importing this module costs nothing at startup.
+_service_client = None
+_async_service_client = None
+
+
+def get_blob_service_client():
+    global _service_client
+    if _service_client is None:
+        from azure.storage.blob import BlobServiceClient
+        _service_client = BlobServiceClient.from_connection_string(connection_string)
+    return _service_client
+
+
+def get_async_container_client():
+    # One async client (and connection pool) shared by every request
+    global _async_service_client
+    if _async_service_client is None:
+        from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+        _async_service_client = AsyncBlobServiceClient.from_connection_string(connection_string)
+    return _async_service_client.get_container_client(container_name)
+
+
+async def close_async_client():
+    global _async_service_client
+    if _async_service_client is not None:
+        await _async_service_client.close()
+        _async_service_client = None
+
+
+def blob_name_for(uid: str, doc_id: str, filename: str) -> str:
+    # Stored on the document as blob_name so deletes never have to parse URLs
+    return f"{uid}/{doc_id}/{filename}"
+
 
-def upload_resume_to_azure(uid: str, candidate_id: str, filename: str, content: bytes, content_type: str) -> str:
+def blob_name_from_url(url: str) -> str:
+    # Documents written before blob_name was stored. Strips the exact
+    # "/<container>/" prefix; lstrip() treated it as a character set and ate
+    # the start of uids beginning with any of those characters.
+    path = unquote(urlparse(url).path)
+    prefix = f"/{container_name}/"
+    return path[len(prefix):] if path.startswith(prefix) else path.lstrip("/")
+
+
+async def blob_exists(blob_name: str) -> bool:
+    return await get_async_container_client().get_blob_client(blob_name).exists()
+
+
+async def hash_upload(upload) -> str:
+    digest = hashlib.sha256()
+    await upload.seek(0)
+    while chunk := await upload.read(BLOCK_SIZE):
+        digest.update(chunk)
+    await upload.seek(0)
+    return digest.hexdigest()
+
+
+async def upload_stream_to_azure(uid: str, candidate_id: str, filename: str, upload, content_type: str) -> str:
+    # Reads the UploadFile in BLOCK_SIZE chunks and stages them as blocks, so at
+    # most UPLOAD_CONCURRENCY blocks are held in memory regardless of file size.
+    from azure.storage.blob import BlobBlock, ContentSettings
     try:
-        blob_name = f"{uid}/{candidate_id}/{filename}"
-        blob_client = container_client.get_blob_client(blob_name)
+        blob_name = blob_name_for(uid, candidate_id, filename)
+        blob_client = get_async_container_client().get_blob_client(blob_name)
+        content_settings = ContentSettings(content_type=content_type or "application/octet-stream")
+        digest = hashlib.sha256()
 
-        blob_client.upload_blob(
-            content,
-            overwrite=True,
-                content_settings = ContentSettings(content_type=content_type or "application/octet-stream")
-                )
+        await upload.seek(0)
+        chunk = await upload.read(BLOCK_SIZE)
+        next_chunk = await upload.read(BLOCK_SIZE) if chunk else b""
+        if not next_chunk:
+            # Small file: a single Put Blob is cheaper than stage + commit
+            digest.update(chunk)
+            await blob_client.upload_blob(
+                chunk,
+                overwrite=True,
+                content_settings=content_settings,
+                metadata={"content_sha256": digest.hexdigest()}
+            )
+        else:
+            gate = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+            block_list = []
+            tasks = []
 
+            async def stage(block_id, data):
+                try:
+                    await blob_client.stage_block(block_id, data, length=len(data))
+                finally:
+                    gate.release()
 
-        return f"https://{blob_service_client.account_name}.blob.core.windows.net/{container_name}/{blob_name}"
+            while chunk:
+                digest.update(chunk)
+                block_id = base64.b64encode(f"{len(block_list):08d}".encode()).decode()
+                block_list.append(BlobBlock(block_id=block_id))
+                await gate.acquire()
+                tasks.append(asyncio.create_task(stage(block_id, chunk)))
+                chunk, next_chunk = next_chunk, (await upload.read(BLOCK_SIZE) if next_chunk else b"")
+
+            await asyncio.gather(*tasks)
+            await blob_client.commit_block_list(
+                block_list,
+                content_settings=content_settings,
+                metadata={"content_sha256": digest.hexdigest()}
+            )
+
+        await upload.seek(0)
+        return f"https://{get_blob_service_client().account_name}.blob.core.windows.net/{container_name}/{blob_name}"
 
     except Exception as e:
         raise RuntimeError(f"Failed to upload resume to Azure: {str(e)}")
 
-def delete_resume_from_azure(blob_path: str):
-    try:
-        blob_client = container_client.get_blob_client(blob_path)
-        blob_client.delete_blob()
-    except ResourceNotFoundError:
-        raise RuntimeError(f"Blob not found: {blob_path}")
-    except Exception as e:
-        raise RuntimeError(f"Failed to delete blob: {str(e)}")
+async def delete_blobs_from_azure(blob_paths: list) -> dict:
+    # Blob batch API: up to 256 deletes per request; missing blobs are not an error
+    container = get_async_container_client()
+    deleted, failed = 0, []
+    for start in range(0, len(blob_paths), DELETE_BATCH_SIZE):
+        chunk = blob_paths[start:start + DELETE_BATCH_SIZE]
+        try:
+            responses = await container.delete_blobs(*chunk, raise_on_any_failure=False)
+            index = 0
+            async for response in responses:
+                if response.status_code in (202, 404):
+                    deleted += 1
+                else:
+                    failed.append(chunk[index])
+                index += 1
+        except Exception as e:
+            raise RuntimeError(f"Failed to delete blobs: {str(e)}")
+    return {"deleted": deleted, "failed": failed}
+
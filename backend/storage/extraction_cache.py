@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import threading
+from cachetools import TTLCache
+from firebase_admin import firestore
+from firebase_config import db
+from services import metrics
+from storage.firestore import delete_documents
+from storage.queries import chunks
+
+LOCAL_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "1024"))
+# Deletes only clear the local cache of the worker that ran them; other
+# workers drop their copy after this long (and callers check the blob on a hit)
+LOCAL_CACHE_TTL_SECONDS = int(os.getenv("EXTRACTION_CACHE_TTL_SECONDS", "300"))
+
+_local_cache = TTLCache(maxsize=LOCAL_CACHE_SIZE, ttl=LOCAL_CACHE_TTL_SECONDS)
+_lock = threading.Lock()
+
+stats = {"local_hits": 0, "persistent_hits": 0, "misses": 0, "stale_deleted": 0, "stale_delete_errors": 0, "stale_blobs": 0}
+
+# Versions computed by this process (one per document kind); entries under
+# any other version are left over from an older prompt or schema
+_current_versions = set()
+
+
+def extraction_version(prompt: str, model_cls) -> str:
+    # Any change to the prompt text or the pydantic schema yields a new version,
+    # so stale entries are never looked up again; put_cached_extraction deletes
+    # them when the same file is extracted under the new version.
+    schema = json.dumps(model_cls.model_json_schema(), sort_keys=True)
+    version = hashlib.sha256(f"{prompt}\n{schema}".encode("utf-8")).hexdigest()[:16]
+    _current_versions.add(version)
+    return version
+
+
+def extraction_cache_key(content_sha256: str, version: str) -> str:
+    return f"{content_sha256}_{version}"
+
+
+def _cache_ref(uid: str, key: str):
+    return db.collection("users").document(uid).collection("extraction_cache").document(key)
+
+
+def get_cached_extraction(uid: str, key: str):
+    with _lock:
+        entry = _local_cache.get((uid, key))
+        if entry is not None:
+            stats["local_hits"] += 1
+            return entry
+
+    snapshot = _cache_ref(uid, key).get()
+    metrics.record_firestore(reads=1)
+    if not snapshot.exists:
+        with _lock:
+            stats["misses"] += 1
+        return None
+
+    entry = snapshot.to_dict()
+    with _lock:
+        _local_cache[(uid, key)] = entry
+        stats["persistent_hits"] += 1
+    return entry
+
+
+def put_cached_extraction(uid: str, key: str, content_sha256: str, data: dict, blob_url: str, blob_name: str = None):
+    entry = {
+        "content_sha256": content_sha256,
+        "data": dict(data),
+        "blob_url": blob_url,
+        "blob_name": blob_name,
+    }
+    _cache_ref(uid, key).set({**entry, "created_at": firestore.SERVER_TIMESTAMP})
+    metrics.record_firestore(writes=1)
+    with _lock:
+        _local_cache[(uid, key)] = entry
+    try:
+        _delete_stale_versions(uid, key, content_sha256)
+    except Exception:
+        # Best effort: the next put for this file tries again
+        with _lock:
+            stats["stale_delete_errors"] += 1
+
+
+def _delete_stale_versions(uid: str, key: str, content_sha256: str):
+    # A put follows a cache miss, i.e. a fresh Gemini extraction, so one
+    # keys-only query per put is cheap next to it
+    query = (
+        db.collection("users").document(uid).collection("extraction_cache")
+          .where("content_sha256", "==", content_sha256)
+          .select([])
+    )
+    docs = list(query.stream())
+    metrics.record_firestore(reads=max(len(docs), 1))
+    stale = [
+        doc.reference for doc in docs
+        if doc.id != key and doc.id.rsplit("_", 1)[-1] not in _current_versions
+    ]
+    if stale:
+        delete_documents(stale)
+        with _lock:
+            stats["stale_deleted"] += len(stale)
+            for ref in stale:
+                _local_cache.pop((uid, ref.id), None)
+
+
+def drop_cached_extraction(uid: str, key: str):
+    # The entry's blob is gone (deleted by another worker after this one cached it)
+    _cache_ref(uid, key).delete()
+    metrics.record_firestore(writes=1)
+    with _lock:
+        _local_cache.pop((uid, key), None)
+        stats["stale_blobs"] += 1
+
+
+def invalidate_extractions_many(uid: str, content_hashes) -> int:
+    # Called before cascade deletes remove the blobs: one "in" query per 30 hashes
+    hashes = list(dict.fromkeys(h for h in content_hashes if h))
+    cache_ref = db.collection("users").document(uid).collection("extraction_cache")
+    refs = []
+    for chunk in chunks(hashes):
+        query = cache_ref.where("content_sha256", "in", chunk).select([])
+        refs.extend(doc.reference for doc in query.stream())
+    delete_documents(refs)
+    with _lock:
+        for ref in refs:
+            _local_cache.pop((uid, ref.id), None)
+    return len(refs)
@@ -1,66 +1,138 @@
+import contextvars
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from google.api_core import exceptions as gcp_exceptions
+from firebase_admin import firestore
 from firebase_config import db
+from services import metrics
+from storage.leaderboard import update_leaderboards
 
-def save_topscore_results_to_firestore(uid: str, jd_id: str, topscore_results: list):
-    for candidate in topscore_results:
-        candidate_id = candidate.get("candidate_id")
-        if not candidate_id:
-            continue  # Skip if no candidate_id
-        
-        # Path: users/{uid}/top_score/{jd_id}/candidates/{candidate_id}
-        candidate_doc_ref = (
-            db.collection("users")
-              .document(uid)
-              .collection("top_score")
-              .document(jd_id)
-              .collection("candidates")
-              .document(candidate_id)
-        )
+WRITE_BATCH_SIZE = int(os.getenv("FIRESTORE_WRITE_BATCH_SIZE", "400"))
+WRITE_CONCURRENCY = int(os.getenv("FIRESTORE_WRITE_CONCURRENCY", "4"))
+WRITE_MAX_ATTEMPTS = int(os.getenv("FIRESTORE_WRITE_MAX_ATTEMPTS", "5"))
 
+# Contention and transient backend errors; anything else is a real failure
+RETRYABLE_WRITE_ERRORS = (
+    gcp_exceptions.Aborted,
+    gcp_exceptions.DeadlineExceeded,
+    gcp_exceptions.ResourceExhausted,
+    gcp_exceptions.ServiceUnavailable,
+    gcp_exceptions.InternalServerError,
+)
+
+
+def _commit_with_retry(writes: list):
+    for attempt in range(WRITE_MAX_ATTEMPTS):
+        batch = db.batch()
+        for doc_ref, data in writes:
+            if data is None:
+                batch.delete(doc_ref)
+            else:
+                batch.set(doc_ref, data, merge=True)
+        try:
+            batch.commit()
+            metrics.record_firestore(writes=len(writes))
+            return
+        except RETRYABLE_WRITE_ERRORS:
+            if attempt == WRITE_MAX_ATTEMPTS - 1:
+                raise
+            metrics.inc("firestore_retries")
+            time.sleep(random.uniform(0, min(8, 0.2 * 2 ** attempt)))
+
+
+def upsert_documents(writes: list, batch_size: int = None, concurrency: int = None, version: tuple = None) -> int:
+    # writes: [(doc_ref, data)], applied as merge-sets so no read is needed first.
+    # data=None deletes the document. version (storage.versions.version_write)
+    # goes into every batch, so no part of the writes lands without its bump.
+    batch_size = min(batch_size or WRITE_BATCH_SIZE, 499 if version else 500)
+    chunks = [writes[i:i + batch_size] for i in range(0, len(writes), batch_size)]
+    if version:
+        chunks = [chunk + [version] for chunk in chunks]
+    if len(chunks) <= 1 or (concurrency or WRITE_CONCURRENCY) <= 1:
+        for chunk in chunks:
+            _commit_with_retry(chunk)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency or WRITE_CONCURRENCY) as pool:
+            # Each chunk runs in a copy of the caller's context, so its writes
+            # and retries count towards the current request's metrics
+            futures = [pool.submit(contextvars.copy_context().run, _commit_with_retry, chunk) for chunk in chunks]
+            for future in futures:
+                future.result()
+    return len(writes)
 
-        candidate_doc_ref.set(candidate)
-from firebase_admin import firestore
 
-def save_candidate_topscore_to_firestore(uid: str, jd_id: str, candidate: dict):
-    candidate_id = candidate.get("candidate_id")
-    if not candidate_id:
+def get_documents(collection_ref, doc_ids) -> list:
+    # Existing documents among doc_ids, fetched with one batched get_all
+    refs = [collection_ref.document(doc_id) for doc_id in doc_ids]
+    if not refs:
+        return []
+    metrics.record_firestore(reads=len(refs))
+    return [snapshot for snapshot in db.get_all(refs) if snapshot.exists]
+
+
+def set_document(doc_ref, data: dict, version: tuple = None):
+    # version (storage.versions.version_write) commits in the same batch
+    if version is None:
+        doc_ref.set(data)
+        metrics.record_firestore(writes=1)
         return
+    batch = db.batch()
+    batch.set(doc_ref, data)
+    batch.set(*version, merge=True)
+    batch.commit()
+    metrics.record_firestore(writes=2)
+
 
+def delete_documents(doc_refs: list, batch_size: int = None, concurrency: int = None, version: tuple = None) -> int:
+    # Deleting a document that doesn't exist is a no-op, so callers can pass
+    # candidate refs without reading them first
+    return upsert_documents([(ref, None) for ref in doc_refs], batch_size, concurrency, version)
+
+
+def _topscore_writes(uid: str, jd_id: str, candidates: list, new_entries: bool = False) -> list:
+    # new_entries: the candidate entries are known not to exist yet (a new JD
+    # or a new candidate), so created_at goes out with the merge-set instead of
+    # needing a read first. The JD document's created_at is set by the
+    # leaderboard transaction, which reads that document anyway.
     top_score_jd_ref = (
         db.collection("users")
           .document(uid)
           .collection("top_score")
           .document(jd_id)
     )
+    writes = [(top_score_jd_ref, {"jd_id": jd_id, "updated_at": firestore.SERVER_TIMESTAMP})]
+    stamps = {"updated_at": firestore.SERVER_TIMESTAMP}
+    if new_entries:
+        stamps["created_at"] = firestore.SERVER_TIMESTAMP
 
-    jd_snapshot = top_score_jd_ref.get()
-
+    for candidate in candidates:
+        candidate_id = candidate.get("candidate_id")
+        if not candidate_id:
+            continue  # Skip if no candidate_id
 
-    if not jd_snapshot.exists:
+        # Path: users/{uid}/top_score/{jd_id}/candidates/{candidate_id}
+        writes.append((
+            top_score_jd_ref.collection("candidates").document(candidate_id),
+            {**candidate, **stamps}
+        ))
+    return writes
 
-        top_score_jd_ref.set({
-            "jd_id": jd_id,
-            "created_at": firestore.SERVER_TIMESTAMP
-        })
 
+def save_topscore_results_to_firestore(uid: str, jd_id: str, topscore_results: list):
+    # Called for a newly uploaded JD: every entry is new
+    written = upsert_documents(_topscore_writes(uid, jd_id, topscore_results, new_entries=True))
+    update_leaderboards(uid, {jd_id: topscore_results})
+    return written
 
-    candidate_doc_ref = top_score_jd_ref.collection("candidates").document(candidate_id)
 
-    if candidate_doc_ref.get().exists:
-        # Update candidate data
-        candidate_doc_ref.update({
-            "total_score": candidate.get("total_score"),
-            "skills_score": candidate.get("skills_score"),
-            "experience_score": candidate.get("experience_score"),
-            "education_score": candidate.get("education_score"),
-            "certifications_score": candidate.get("certifications_score"),
-            "resume_url": candidate.get("resume_url"),
-            "name": candidate.get("name"),
-            "email": candidate.get("email"),
-            "updated_at": firestore.SERVER_TIMESTAMP
-        })
-    else:
-    
-        candidate_doc_ref.set({
-            **candidate,
-            "created_at": firestore.SERVER_TIMESTAMP
-        })
+def save_candidate_scores_to_firestore(uid: str, results_by_jd: dict):
+    # A newly uploaded candidate scored against many JDs ({jd_id: result}):
+    # every JD's top_score writes go out together instead of one commit per JD
+    writes = []
+    for jd_id, result in results_by_jd.items():
+        writes.extend(_topscore_writes(uid, jd_id, [result], new_entries=True))
+    written = upsert_documents(writes)
+    update_leaderboards(uid, {jd_id: [result] for jd_id, result in results_by_jd.items()})
+    return written
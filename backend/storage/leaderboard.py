@@ -0,0 +1,272 @@
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+from firebase_admin import firestore
+from firebase_config import db
+from services import metrics
+from storage.queries import chunks
+
+# Top entries kept on each users/{uid}/top_score/{jd_id} document, so the
+# top-score page is one document read instead of a subcollection query.
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "100"))
+LEADERBOARD_TRANSACTION_ATTEMPTS = int(os.getenv("LEADERBOARD_TRANSACTION_ATTEMPTS", "10"))
+TRANSACTION_JDS = 100  # each JD is one read and one write in the transaction
+SCAN_CONCURRENCY = 8
+
+# What the top-score page shows; the long *_explanation texts stay in the subcollection
+ENTRY_FIELDS = (
+    "candidate_id", "name", "designation", "email", "contact", "location", "experience", "education",
+    "profile_type", "total_score", "skills_score", "experience_score", "education_score",
+    "certifications_score", "score_breakdown", "skills_matched", "key_achievements", "key_strengths",
+    "resume_url",
+)
+
+stats = {"updates": 0, "rebuilds": 0, "refills": 0, "invalidations": 0}
+
+
+def _jd_ref(uid: str, jd_id: str):
+    return db.collection("users").document(uid).collection("top_score").document(jd_id)
+
+
+def make_entry(data: dict, candidate_id: str = None) -> dict:
+    entry = {k: data[k] for k in ENTRY_FIELDS if data.get(k) is not None}
+    if candidate_id:
+        entry["candidate_id"] = candidate_id
+    return entry
+
+
+def _rank(entry: dict) -> tuple:
+    # Same order as order_by("total_score", DESCENDING): ties fall back to the
+    # document id, also descending
+    return entry["total_score"], entry["candidate_id"]
+
+
+def merge_board(board: dict, upserts: list, removed) -> dict:
+    # A board holds the exact top len(entries) of the subcollection, and every
+    # candidate left off a truncated board ranks below its last entry. Returns
+    # None when keeping that true needs a fresh query.
+    entries = {entry["candidate_id"]: entry for entry in board["entries"]}
+    complete = board["complete"]
+    if not complete and (removed or not entries):
+        # Only a query can tell whether deletes left the JD with few enough
+        # candidates for the board to be complete again
+        return None
+    floor = min(map(_rank, entries.values())) if entries else None
+
+    for candidate_id in removed:
+        entries.pop(candidate_id, None)
+    for entry in upserts:
+        entries.pop(entry["candidate_id"], None)
+        if entry.get("total_score") is None:
+            continue  # not returned by the total_score query either
+        if complete or _rank(entry) >= floor:
+            entries[entry["candidate_id"]] = entry
+
+    ranked = sorted(entries.values(), key=_rank, reverse=True)
+    if len(ranked) > LEADERBOARD_SIZE:
+        ranked, complete = ranked[:LEADERBOARD_SIZE], False
+    if not complete and len(ranked) < LEADERBOARD_SIZE:
+        return None
+    return {"entries": ranked, "complete": complete, "size": LEADERBOARD_SIZE}
+
+
+def _stored_board(snapshot):
+    data = snapshot.to_dict() or {}
+    board = data.get("leaderboard")
+    # Boards built for another LEADERBOARD_SIZE are rebuilt on next use
+    if isinstance(board, dict) and board.get("size") == LEADERBOARD_SIZE:
+        return {**board, "version": data.get("version", 0)}
+    return None
+
+
+def _query_board(jd_ref, transaction=None) -> dict:
+    query = (
+        jd_ref.collection("candidates")
+        .select(list(ENTRY_FIELDS))
+        .order_by("total_score", direction=firestore.Query.DESCENDING)
+        .limit(LEADERBOARD_SIZE + 1)
+    )
+    docs = list(transaction.get(query) if transaction else query.stream())
+    metrics.record_firestore(reads=max(len(docs), 1))
+    entries = [make_entry(doc.to_dict(), doc.id) for doc in docs]
+    return {
+        "entries": entries[:LEADERBOARD_SIZE],
+        "complete": len(entries) <= LEADERBOARD_SIZE,
+        "size": LEADERBOARD_SIZE,
+    }
+
+
+@firestore.transactional
+def _apply_in_transaction(transaction, uid: str, changes: dict, rebuild: bool) -> dict:
+    # All reads (board documents, then any refill queries) come before the writes
+    refs = {jd_id: _jd_ref(uid, jd_id) for jd_id in changes}
+    snapshots = {snapshot.id: snapshot for snapshot in transaction.get_all(list(refs.values()))}
+    metrics.record_firestore(reads=len(refs))
+
+    boards, uncreated = {}, set()
+    for jd_id, (upserts, removed) in changes.items():
+        snapshot = snapshots.get(jd_id)
+        if snapshot is None or not snapshot.exists:
+            continue  # JD deleted in the meantime
+        board = None if rebuild else _stored_board(snapshot)
+        if board is not None:
+            board = merge_board(board, upserts, removed)
+            if board is None:
+                stats["refills"] += 1
+        if board is None:
+            board = _query_board(refs[jd_id], transaction)
+        data = snapshot.to_dict() or {}
+        # "version" sits beside the board so dropping the board keeps the count
+        boards[jd_id] = {**board, "version": data.get("version", 0) + 1}
+        if "created_at" not in data:
+            # First scores for this JD: the top_score writes are merge-sets
+            # and can't tell a new document from an existing one
+            uncreated.add(jd_id)
+
+    for jd_id, board in boards.items():
+        update = {
+            "leaderboard": {k: v for k, v in board.items() if k != "version"},
+            "version": board["version"],
+        }
+        if jd_id in uncreated:
+            update["created_at"] = firestore.SERVER_TIMESTAMP
+        transaction.update(refs[jd_id], update)
+    metrics.record_firestore(writes=len(boards))
+    return boards
+
+
+def _invalidate(uid: str, jd_ids: list):
+    # A board that could not be updated is dropped, so the next read rebuilds
+    # it instead of serving stale entries
+    batch = db.batch()
+    for jd_id in jd_ids:
+        batch.set(
+            _jd_ref(uid, jd_id),
+            {"leaderboard": firestore.DELETE_FIELD, "version": firestore.Increment(1)},
+            merge=True,
+        )
+    batch.commit()
+    metrics.record_firestore(writes=len(jd_ids))
+    stats["invalidations"] += len(jd_ids)
+
+
+def _apply(uid: str, changes: dict, rebuild: bool = False) -> dict:
+    # changes: {jd_id: (upserted entries, removed candidate ids)}
+    boards = {}
+    for chunk in chunks(list(changes), TRANSACTION_JDS):
+        transaction = db.transaction(max_attempts=LEADERBOARD_TRANSACTION_ATTEMPTS)
+        try:
+            boards.update(_apply_in_transaction(transaction, uid, {jd_id: changes[jd_id] for jd_id in chunk}, rebuild))
+        except Exception:
+            if rebuild:
+                raise
+            _invalidate(uid, chunk)
+    stats["rebuilds" if rebuild else "updates"] += len(boards)
+    return boards
+
+
+def update_leaderboards(uid: str, results_by_jd: dict) -> dict:
+    # Called after top_score results are written: {jd_id: [scored candidates]}
+    return _apply(uid, {
+        jd_id: ([make_entry(result) for result in results if result.get("candidate_id")], ())
+        for jd_id, results in results_by_jd.items()
+    })
+
+
+def remove_from_leaderboards(uid: str, ids_by_jd: dict) -> dict:
+    # Called after top_score entries are deleted: {jd_id: [candidate ids]}
+    return _apply(uid, {jd_id: ([], set(ids)) for jd_id, ids in ids_by_jd.items()})
+
+
+def rebuild_leaderboards(uid: str, jd_ids: list = None) -> dict:
+    if jd_ids is None:
+        jd_ids = [jd_ref.id for jd_ref in db.collection("users").document(uid).collection("top_score").list_documents()]
+    return _apply(uid, {jd_id: ([], ()) for jd_id in jd_ids}, rebuild=True)
+
+
+def get_leaderboard(uid: str, jd_id: str):
+    # None when the JD has no top_score document; a missing or outdated board
+    # is built on first read. "version" changes whenever the JD's scores do.
+    snapshot = _jd_ref(uid, jd_id).get()
+    metrics.record_firestore(reads=1)
+    if not snapshot.exists:
+        return None
+    board = _stored_board(snapshot)
+    if board is None:
+        board = rebuild_leaderboards(uid, [jd_id]).get(jd_id)
+    return board
+
+
+def check_leaderboard(uid: str, jd_id: str) -> dict:
+    # Compares the stored board with what the subcollection query returns
+    snapshot = _jd_ref(uid, jd_id).get()
+    metrics.record_firestore(reads=1)
+    stored = _stored_board(snapshot) if snapshot.exists else None
+    expected = _query_board(_jd_ref(uid, jd_id))
+    report = {"jd_id": jd_id, "ok": True, "entries": len(expected["entries"])}
+    if stored is None:
+        if expected["entries"]:
+            report.update(ok=False, problem="missing")
+        return report
+
+    stored_ranks = [(e.get("candidate_id"), e.get("total_score")) for e in stored["entries"]]
+    expected_ranks = [(e["candidate_id"], e["total_score"]) for e in expected["entries"]]
+    if stored_ranks != expected_ranks or stored["complete"] != expected["complete"]:
+        stored_ids = {candidate_id for candidate_id, _ in stored_ranks}
+        expected_ids = {candidate_id for candidate_id, _ in expected_ranks}
+        report.update(
+            ok=False,
+            problem="mismatch",
+            missing=sorted(expected_ids - stored_ids),
+            unexpected=sorted(stored_ids - expected_ids),
+            stale_scores=sorted(
+                candidate_id for candidate_id, score in set(stored_ranks) - set(expected_ranks)
+                if candidate_id in expected_ids
+            ),
+            complete={"stored": stored["complete"], "expected": expected["complete"]},
+        )
+    return report
+
+
+def check_leaderboards(uid: str, jd_ids: list = None, fix: bool = False) -> list:
+    if jd_ids is None:
+        jd_ids = [jd_ref.id for jd_ref in db.collection("users").document(uid).collection("top_score").list_documents()]
+    with ThreadPoolExecutor(max_workers=SCAN_CONCURRENCY) as pool:
+        reports = list(pool.map(lambda jd_id: check_leaderboard(uid, jd_id), jd_ids))
+    broken = [report["jd_id"] for report in reports if not report["ok"]]
+    if fix and broken:
+        rebuild_leaderboards(uid, broken)
+        for report in reports:
+            if not report["ok"]:
+                report["fixed"] = True
+    return reports
+
+
+def main():
+    # python -m storage.leaderboard rebuild [--uid UID] [--jd JD_ID ...]
+    # python -m storage.leaderboard check [--uid UID] [--jd JD_ID ...] [--fix]
+    parser = argparse.ArgumentParser(description="Rebuild or check per-JD top-score leaderboards")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--uid", action="append", help="limit to these users (default: all)")
+    parser.add_argument("--jd", action="append", help="limit to these JD ids")
+    parser.add_argument("--fix", action="store_true", help="rebuild boards the check finds inconsistent")
+    args = parser.parse_args()
+
+    uids = args.uid or [user_ref.id for user_ref in db.collection("users").list_documents()]
+    failures = 0
+    for uid in uids:
+        if args.command == "rebuild":
+            boards = rebuild_leaderboards(uid, args.jd)
+            print(f"{uid}: rebuilt {len(boards)} leaderboards")
+            continue
+        reports = check_leaderboards(uid, args.jd, fix=args.fix)
+        broken = [report for report in reports if not report["ok"]]
+        print(f"{uid}: {len(reports)} leaderboards, {len(broken)} inconsistent")
+        for report in broken:
+            print(f"  {report}")
+        failures += sum(1 for report in broken if not report.get("fixed"))
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
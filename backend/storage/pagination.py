@@ -0,0 +1,35 @@
+from fastapi import HTTPException
+from services import metrics
+
+MAX_PAGE_SIZE = 500
+
+
+def parse_fields(fields: str):
+    if not fields:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()] or None
+
+
+def fetch_page(query, collection_ref, limit: int = None, cursor: str = None, fields: str = None):
+    # cursor is the id of the last document on the previous page
+    projection = parse_fields(fields)
+    if projection:
+        query = query.select(projection)
+    if cursor:
+        cursor_snapshot = collection_ref.document(cursor).get()
+        metrics.record_firestore(reads=1)
+        if not cursor_snapshot.exists:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.start_after(cursor_snapshot)
+    if limit:
+        # One extra document tells us whether another page exists
+        query = query.limit(limit + 1)
+
+    docs = list(query.stream())
+    # An empty result is still billed as one read
+    metrics.record_firestore(reads=max(len(docs), 1))
+    next_cursor = None
+    if limit and len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = docs[-1].id
+    return docs, next_cursor
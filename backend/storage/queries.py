@@ -0,0 +1,5 @@
+IN_QUERY_LIMIT = 30  # Firestore "in" filter limit
+
+
+def chunks(items: list, size: int = IN_QUERY_LIMIT) -> list:
+    return [items[i:i + size] for i in range(0, len(items), size)]
@@ -0,0 +1,167 @@
+import hashlib
+import os
+import threading
+import time
+from firebase_admin import firestore
+from firebase_config import db
+from services import metrics
+from services.skills import normalize_skills, count_overlaps
+from storage.firestore import upsert_documents
+
+# Each token's posting list is split over this many documents, picked by a
+# hash of the candidate/JD id. A common skill ("python") is on nearly every
+# upload, so one document per token would pass Firestore's ~1 sustained
+# write/sec per document during bulk uploads and its 1 MiB size limit at a
+# few tens of thousands of ids (see benchmarks/bench_skill_index.py).
+# Lookups read tokens x shards documents.
+POSTING_SHARDS = int(os.getenv("SKILL_INDEX_SHARDS", "4"))
+# Stored on the user document once the backfill ran; a different value
+# (older layout, other shard count) triggers a new backfill
+INDEX_FORMAT = f"2x{POSTING_SHARDS}"
+# A backfill claim older than this is considered abandoned
+BUILD_CLAIM_SECONDS = 300
+# How long a request waits for another worker's backfill before using the
+# index as it stands
+BUILD_WAIT_SECONDS = float(os.getenv("SKILL_INDEX_BUILD_WAIT_SECONDS", "30"))
+
+POSTING_FIELDS = {"candidate": "candidate_ids", "jd": "jd_ids"}
+
+_built_uids = set()
+_build_locks = {}
+_build_locks_lock = threading.Lock()
+
+
+def _index_ref(uid: str):
+    return db.collection("users").document(uid).collection("skill_index")
+
+
+def _token_hash(token: str) -> str:
+    # Skill text may contain "/" or other characters Firestore rejects in ids
+    return hashlib.sha1(token.encode("utf-8")).hexdigest()
+
+
+def _shard(doc_id: str) -> int:
+    return int(hashlib.sha1(doc_id.encode("utf-8")).hexdigest()[:8], 16) % POSTING_SHARDS
+
+
+def _posting_doc_id(token: str, shard: int) -> str:
+    return f"{_token_hash(token)}-{shard}"
+
+
+def _posting_writes(uid: str, kind: str, ids_by_token: dict, transform) -> list:
+    # ids_by_token: {token: [doc ids]} -> one merge write per (token, shard)
+    index_ref = _index_ref(uid)
+    field = POSTING_FIELDS[kind]
+    grouped = {}
+    for token, doc_ids in ids_by_token.items():
+        for doc_id in doc_ids:
+            grouped.setdefault((token, _shard(doc_id)), []).append(doc_id)
+    return [
+        (index_ref.document(_posting_doc_id(token, shard)), {"token": token, field: transform(doc_ids)})
+        for (token, shard), doc_ids in grouped.items()
+    ]
+
+
+def index_skills(uid: str, kind: str, doc_id: str, skills):
+    upsert_documents(_posting_writes(uid, kind, {t: [doc_id] for t in normalize_skills(skills)}, firestore.ArrayUnion))
+
+
+def unindex_many(uid: str, kind: str, skills_by_id: dict):
+    # One ArrayRemove per (token, shard) for a whole set of deleted documents,
+    # instead of one write per (document, token)
+    ids_by_token = {}
+    for doc_id, skills in skills_by_id.items():
+        for token in normalize_skills(skills):
+            ids_by_token.setdefault(token, []).append(doc_id)
+    return upsert_documents(_posting_writes(uid, kind, ids_by_token, firestore.ArrayRemove))
+
+
+def find_overlaps(uid: str, kind: str, skills, min_overlap: int = 1) -> dict:
+    ensure_skill_index(uid)
+    tokens = normalize_skills(skills)
+    if not tokens:
+        return {}
+
+    index_ref = _index_ref(uid)
+    field = POSTING_FIELDS[kind]
+    refs = [index_ref.document(_posting_doc_id(t, shard)) for t in tokens for shard in range(POSTING_SHARDS)]
+    postings = {}
+    metrics.record_firestore(reads=len(refs))
+    for snapshot in db.get_all(refs):
+        if snapshot.exists:
+            data = snapshot.to_dict()
+            postings.setdefault(data["token"], []).extend(data.get(field, []))
+
+    counts = count_overlaps(postings, tokens)
+    return {doc_id: n for doc_id, n in counts.items() if n >= min_overlap}
+
+
+def rebuild_skill_index(uid: str):
+    # Additive only: postings go out as ArrayUnion merges, so ids that request
+    # handlers index while this runs are kept. Only documents of the old
+    # unsharded layout (ids without a shard suffix) are removed.
+    user_ref = db.collection("users").document(uid)
+    index_ref = _index_ref(uid)
+    for kind, collection, skills_field in (
+        ("candidate", "candidates", "technical_skills"),
+        ("jd", "job_descriptions", "required_skills"),
+    ):
+        ids_by_token = {}
+        for doc in user_ref.collection(collection).select([skills_field]).stream():
+            for token in normalize_skills(doc.to_dict().get(skills_field, [])):
+                ids_by_token.setdefault(token, []).append(doc.id)
+        upsert_documents(_posting_writes(uid, kind, ids_by_token, firestore.ArrayUnion))
+
+    legacy = [doc.reference for doc in index_ref.select([]).stream() if "-" not in doc.id]
+    if legacy:
+        upsert_documents([(ref, None) for ref in legacy])
+
+    user_ref.set({
+        "skill_index_format": INDEX_FORMAT,
+        "skill_index_claimed_at": firestore.DELETE_FIELD,
+        "skill_index_built": firestore.DELETE_FIELD,
+    }, merge=True)
+
+
+@firestore.transactional
+def _claim_build(transaction, user_ref) -> str:
+    # "built", "claimed" (this caller runs the backfill) or "busy" (another
+    # worker holds an unexpired claim)
+    snapshot = user_ref.get(transaction=transaction)
+    data = (snapshot.to_dict() or {}) if snapshot.exists else {}
+    if data.get("skill_index_format") == INDEX_FORMAT:
+        return "built"
+    claimed_at = data.get("skill_index_claimed_at")
+    if claimed_at and time.time() - claimed_at < BUILD_CLAIM_SECONDS:
+        return "busy"
+    transaction.set(user_ref, {"skill_index_claimed_at": time.time()}, merge=True)
+    return "claimed"
+
+
+def ensure_skill_index(uid: str):
+    # Users created before the index (or before the current layout) get a
+    # one-time backfill. A per-uid lock covers the requests of one bulk upload
+    # on this worker; the claim on the user document covers other workers.
+    if uid in _built_uids:
+        return
+    with _build_locks_lock:
+        lock = _build_locks.setdefault(uid, threading.Lock())
+    with lock:
+        if uid in _built_uids:
+            return
+        user_ref = db.collection("users").document(uid)
+        deadline = time.monotonic() + BUILD_WAIT_SECONDS
+        while True:
+            state = _claim_build(db.transaction(), user_ref)
+            metrics.record_firestore(reads=1)
+            if state == "claimed":
+                rebuild_skill_index(uid)
+                break
+            if state == "built":
+                break
+            if time.monotonic() > deadline:
+                # Another worker is still building: use the index as it stands
+                # and check again on the next call
+                return
+            time.sleep(0.5)
+        _built_uids.add(uid)
@@ -0,0 +1,24 @@
+from firebase_admin import firestore
+from firebase_config import db
+from services import metrics
+
+# Per-user change counters behind the ETags of the list endpoints, kept on
+# users/{uid} under "versions". Writers commit the bump in the same batch as
+# their writes and readers read the counter before the collection, so a tag
+# never outlives the data it was issued for.
+
+
+def version_write(uid: str, *collections: str) -> tuple:
+    # (doc_ref, data) to merge-set alongside the writes it covers
+    return (
+        db.collection("users").document(uid),
+        {"versions": {collection: firestore.Increment(1) for collection in collections}},
+    )
+
+
+def get_version(uid: str, collection: str) -> int:
+    snapshot = db.collection("users").document(uid).get(field_paths=[f"versions.{collection}"])
+    metrics.record_firestore(reads=1)
+    if not snapshot.exists:
+        return 0
+    return ((snapshot.to_dict() or {}).get("versions") or {}).get(collection, 0)
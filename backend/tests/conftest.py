@@ -0,0 +1,22 @@
+import pytest
+import firebase_config
+from services import metrics
+from tests.fake_firestore import FakeFirestore
+
+
+@pytest.fixture
+def fresh_metrics(monkeypatch):
+    # Empty registries, so a test sees only what it recorded itself
+    for name in ("_counters", "_histograms", "_buckets", "_stats"):
+        monkeypatch.setattr(metrics, name, {})
+    monkeypatch.setattr(metrics, "_users", set())
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", True)
+    return metrics
+
+
+@pytest.fixture
+def firestore_db(monkeypatch):
+    # Every `from firebase_config import db` proxy resolves to this client
+    fake = FakeFirestore()
+    monkeypatch.setattr(firebase_config, "_db", fake)
+    return fake
@@ -0,0 +1,222 @@
+# In-memory stand-in for the parts of the Firestore client the app uses:
+# document and collection references, merge-sets with field transforms,
+# equality/"in" queries, select/order_by/limit, batches and get_all.
+# Documents live in one dict keyed by path.
+import datetime
+from firebase_admin import firestore
+from google.cloud.firestore_v1 import transforms
+
+
+def _apply(current: dict, data: dict, merge: bool) -> dict:
+    result = dict(current) if merge else {}
+    for key, value in data.items():
+        if "." in key and merge:
+            head, rest = key.split(".", 1)
+            result[head] = _apply(result.get(head) or {}, {rest: value}, True)
+            continue
+        old = result.get(key)
+        if value is firestore.DELETE_FIELD:
+            result.pop(key, None)
+        elif value is firestore.SERVER_TIMESTAMP:
+            result[key] = datetime.datetime.now(datetime.timezone.utc)
+        elif isinstance(value, transforms.ArrayUnion):
+            result[key] = list(old or []) + [v for v in value.values if v not in (old or [])]
+        elif isinstance(value, transforms.ArrayRemove):
+            result[key] = [v for v in old or [] if v not in value.values]
+        elif isinstance(value, transforms.Increment):
+            result[key] = (old or 0) + value.value
+        elif isinstance(value, dict):
+            # Transforms apply inside maps too
+            result[key] = _apply(old if merge and isinstance(old, dict) else {}, value, True)
+        else:
+            result[key] = value
+    return result
+
+
+class Snapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return self._data.get(field)
+
+
+class DocumentRef:
+    def __init__(self, client, path: str):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def __eq__(self, other):
+        return isinstance(other, DocumentRef) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def __repr__(self):
+        return f"DocumentRef({self.path})"
+
+    @property
+    def parent(self):
+        return CollectionRef(self._client, self.path.rsplit("/", 1)[0])
+
+    def collection(self, name: str):
+        return CollectionRef(self._client, f"{self.path}/{name}")
+
+    def get(self, field_paths=None, transaction=None):
+        self._client.reads += 1
+        return Snapshot(self, self._client.docs.get(self.path))
+
+    def set(self, data: dict, merge: bool = False):
+        self._client.writes += 1
+        self._client.docs[self.path] = _apply(self._client.docs.get(self.path) or {}, data, merge)
+
+    def update(self, data: dict):
+        if self.path not in self._client.docs:
+            raise KeyError(self.path)
+        self.set(data, merge=True)
+
+    def create(self, data: dict):
+        if self.path in self._client.docs:
+            raise ValueError(f"{self.path} already exists")
+        self.set(data)
+
+    def delete(self):
+        self._client.writes += 1
+        self._client.docs.pop(self.path, None)
+
+
+class Query:
+    def __init__(self, client, matches, filters=(), order=None, limit=None, after=None):
+        self._client = client
+        self._matches = matches  # path -> bool: which documents the query ranges over
+        self._filters = list(filters)
+        self._order = order
+        self._limit = limit
+        self._after = after
+
+    def _copy(self, **changes):
+        state = {"filters": self._filters, "order": self._order, "limit": self._limit, "after": self._after}
+        state.update(changes)
+        return Query(self._client, self._matches, **state)
+
+    def where(self, field, op, value):
+        return self._copy(filters=self._filters + [(field, op, value)])
+
+    def select(self, fields):
+        return self
+
+    def order_by(self, field, direction=None):
+        return self._copy(order=(field, direction == firestore.Query.DESCENDING))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def start_after(self, snapshot):
+        return self._copy(after=snapshot.id)
+
+    @staticmethod
+    def _passes(path, data, field, op, value):
+        actual = path if field == "__name__" else data.get(field)
+        if field == "__name__":
+            value = [v.path for v in value] if op == "in" else value.path
+        if op == "==":
+            return actual == value
+        if op == "in":
+            return actual in value
+        raise NotImplementedError(op)
+
+    def stream(self, transaction=None):
+        docs = [
+            (path, data) for path, data in sorted(self._client.docs.items())
+            if self._matches(path) and all(self._passes(path, data, *f) for f in self._filters)
+        ]
+        if self._order:
+            field, descending = self._order
+            docs = [d for d in docs if d[1].get(field) is not None]
+            docs.sort(key=lambda d: (d[1][field], d[0].rsplit("/", 1)[-1]), reverse=descending)
+        if self._after is not None:
+            ids = [path.rsplit("/", 1)[-1] for path, _ in docs]
+            docs = docs[ids.index(self._after) + 1:]
+        if self._limit is not None:
+            docs = docs[:self._limit]
+        self._client.reads += max(len(docs), 1)
+        return iter([Snapshot(DocumentRef(self._client, path), data) for path, data in docs])
+
+    get = stream
+
+
+class CollectionRef(Query):
+    def __init__(self, client, path: str):
+        prefix = path + "/"
+        super().__init__(client, lambda p: p.startswith(prefix) and "/" not in p[len(prefix):])
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self):
+        return DocumentRef(self._client, self.path.rsplit("/", 1)[0]) if "/" in self.path else None
+
+    def document(self, doc_id: str = None):
+        import uuid
+        return DocumentRef(self._client, f"{self.path}/{doc_id or uuid.uuid4().hex}")
+
+    def list_documents(self):
+        # Like Firestore, includes "missing" parents that only have subcollections
+        prefix = self.path + "/"
+        ids = {p[len(prefix):].split("/", 1)[0] for p in self._client.docs if p.startswith(prefix)}
+        return [self.document(doc_id) for doc_id in sorted(ids)]
+
+
+class Batch:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def set(self, ref, data, merge=False):
+        self._ops.append(lambda: ref.set(data, merge=merge))
+
+    def update(self, ref, data):
+        self._ops.append(lambda: ref.update(data))
+
+    def delete(self, ref):
+        self._ops.append(ref.delete)
+
+    def commit(self):
+        self._client.commits += 1
+        if self._client.fail_commits:
+            self._client.fail_commits -= 1
+            raise RuntimeError("commit failed")
+        for op in self._ops:
+            op()
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.docs = {}
+        self.reads = self.writes = self.commits = 0
+        self.fail_commits = 0  # the next N commits raise
+
+    def collection(self, name: str):
+        return CollectionRef(self, name)
+
+    def collection_group(self, name: str):
+        return Query(self, lambda p: p.count("/") >= 1 and p.rsplit("/", 2)[-2] == name)
+
+    def document(self, path: str):
+        return DocumentRef(self, path)
+
+    def get_all(self, refs):
+        return [ref.get() for ref in refs]
+
+    def batch(self):
+        return Batch(self)
@@ -0,0 +1,20 @@
+import pytest
+from storage import azure
+
+
+@pytest.fixture(autouse=True)
+def container(monkeypatch):
+    monkeypatch.setattr(azure, "container_name", "resumes")
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://acct.blob.core.windows.net/resumes/uid1/cv.pdf", "uid1/cv.pdf"),
+    # Characters of the container name at the start of the uid are kept
+    ("https://acct.blob.core.windows.net/resumes/resumes-uid/cv.pdf", "resumes-uid/cv.pdf"),
+    ("https://acct.blob.core.windows.net/resumes/sure/cv.pdf", "sure/cv.pdf"),
+    ("https://acct.blob.core.windows.net/resumes/uid1/my%20cv.pdf", "uid1/my cv.pdf"),
+    ("https://acct.blob.core.windows.net/resumes/uid1/cv.pdf?sv=2024&sig=x", "uid1/cv.pdf"),
+    ("https://acct.blob.core.windows.net/other/uid1/cv.pdf", "other/uid1/cv.pdf"),
+])
+def test_blob_name_from_url(url, expected):
+    assert azure.blob_name_from_url(url) == expected
@@ -0,0 +1,134 @@
+import asyncio
+import pytest
+from services import deletion
+from storage import skill_index
+
+
+def seed_candidate(db, uid, candidate_id, sha, blob):
+    db.document(f"users/{uid}/candidates/{candidate_id}").set({
+        "candidate_id": candidate_id, "technical_skills": ["Python"], "content_sha256": sha,
+        "blob_name": blob, "resume_url": f"https://acct.blob.core.windows.net/c/{blob}",
+    })
+    db.document(f"users/{uid}/extraction_cache/{sha}_v1").set({"content_sha256": sha, "blob_name": blob})
+
+
+@pytest.fixture
+def blobs(monkeypatch):
+    deleted = []
+
+    async def delete_blobs(names):
+        deleted.extend(names)
+        return {"deleted": len(names), "failed": []}
+
+    monkeypatch.setattr(deletion, "delete_blobs_from_azure", delete_blobs)
+    return deleted
+
+
+def run(uid, kind, ids):
+    return asyncio.run(deletion.run_cascade_delete(uid, kind, ids))
+
+
+def test_blobs_are_kept_when_cache_invalidation_fails(firestore_db, blobs, monkeypatch):
+    seed_candidate(firestore_db, "u", "c1", "sha1", "u/c1/cv.pdf")
+
+    def failing_invalidate(uid, hashes):
+        raise RuntimeError("firestore down")
+
+    monkeypatch.setattr(deletion, "invalidate_extractions_many", failing_invalidate)
+    summary = run("u", "candidate", ["c1"])
+    assert {"phase": "blobs", "error": "firestore down"} in summary["errors"]
+    # No cache entry can be left pointing at a deleted blob
+    assert blobs == []
+
+
+@pytest.fixture
+def boards(monkeypatch):
+    removed = []
+    monkeypatch.setattr(deletion, "remove_from_leaderboards", lambda uid, ids_by_jd: removed.append(ids_by_jd))
+    return removed
+
+
+def seed_top_score(db, uid, jd_id, candidate_ids):
+    db.document(f"users/{uid}/top_score/{jd_id}").set({"jd_id": jd_id})
+    for candidate_id in candidate_ids:
+        db.document(f"users/{uid}/top_score/{jd_id}/candidates/{candidate_id}").set(
+            {"candidate_id": candidate_id, "total_score": 50})
+
+
+def test_candidate_delete_cascades(firestore_db, blobs, boards):
+    seed_candidate(firestore_db, "u", "c1", "sha1", "u/c1/cv.pdf")
+    seed_candidate(firestore_db, "u", "c2", "sha2", "u/c2/cv.pdf")
+    seed_top_score(firestore_db, "u", "jd1", ["c1", "c2"])
+    seed_top_score(firestore_db, "u", "jd2", ["c1"])
+    for candidate_id in ("c1", "c2"):
+        skill_index.index_skills("u", "candidate", candidate_id, ["Python"])
+
+    summary = run("u", "candidate", ["c1", "missing"])
+    assert summary["errors"] == [] and summary["found"] == 1
+    assert summary["documents_deleted"] == 1 and summary["top_scores_deleted"] == 2
+    assert blobs == ["u/c1/cv.pdf"]
+    docs = firestore_db.docs
+    assert "users/u/candidates/c1" not in docs and "users/u/candidates/c2" in docs
+    assert "users/u/top_score/jd1/candidates/c1" not in docs and "users/u/top_score/jd2/candidates/c1" not in docs
+    assert "users/u/top_score/jd1/candidates/c2" in docs
+    assert "users/u/extraction_cache/sha1_v1" not in docs and "users/u/extraction_cache/sha2_v1" in docs
+    postings = [d["candidate_ids"] for p, d in docs.items() if p.startswith("users/u/skill_index/")]
+    assert [ids for ids in postings if ids] == [["c2"]]
+    assert docs["users/u"]["versions"]["candidates"] == 1
+    assert boards == [{"jd1": ["c1"], "jd2": ["c1"]}]
+
+
+def test_shared_blob_is_kept_while_another_document_uses_it(firestore_db, blobs, boards):
+    seed_candidate(firestore_db, "u", "c1", "sha1", "u/c1/cv.pdf")
+    seed_candidate(firestore_db, "u", "c2", "sha1", "u/c1/cv.pdf")
+    summary = run("u", "candidate", ["c1"])
+    assert summary["errors"] == [] and summary["documents_deleted"] == 1
+    assert blobs == []
+    assert "users/u/extraction_cache/sha1_v1" in firestore_db.docs
+
+
+def test_jd_delete_takes_its_top_scores(firestore_db, blobs, boards):
+    firestore_db.document("users/u/job_descriptions/jd1").set({
+        "jd_url": "https://acct.blob.core.windows.net/c/u/jd1/jd.pdf", "blob_name": "u/jd1/jd.pdf",
+        "required_skills": ["Go"],
+    })
+    seed_top_score(firestore_db, "u", "jd1", ["c1", "c2"])
+    seed_top_score(firestore_db, "u", "jd2", ["c1"])
+    summary = run("u", "jd", ["jd1"])
+    assert summary["errors"] == [] and summary["top_scores_deleted"] == 3
+    assert blobs == ["u/jd1/jd.pdf"]
+    assert "users/u/job_descriptions/jd1" not in firestore_db.docs
+    assert sorted(p for p in firestore_db.docs if "/top_score/" in p) == [
+        "users/u/top_score/jd2", "users/u/top_score/jd2/candidates/c1",
+    ]
+    assert boards == []
+
+
+def test_failed_blobs_are_reported(firestore_db, boards, monkeypatch):
+    seed_candidate(firestore_db, "u", "c1", "sha1", "u/c1/cv.pdf")
+
+    async def delete_blobs(names):
+        return {"deleted": 0, "failed": names}
+
+    monkeypatch.setattr(deletion, "delete_blobs_from_azure", delete_blobs)
+    summary = run("u", "candidate", ["c1"])
+    assert summary["blobs_failed"] == ["u/c1/cv.pdf"] and summary["blobs_deleted"] == 0
+
+
+def test_single_delete_reports_the_file_left_behind(firestore_db, boards, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from firebase_config import get_current_uid
+    from routers import candidates
+
+    async def delete_blobs(names):
+        return {"deleted": 0, "failed": names}
+
+    monkeypatch.setattr(deletion, "delete_blobs_from_azure", delete_blobs)
+    seed_candidate(firestore_db, "u", "c1", "sha1", "u/c1/cv.pdf")
+    app = FastAPI()
+    app.include_router(candidates.router)
+    app.dependency_overrides[get_current_uid] = lambda: "u"
+    body = TestClient(app).delete("/candidate-resume/c1").json()
+    assert body["status"] == "partial" and body["blobs_failed"] == ["u/c1/cv.pdf"]
+    assert "users/u/candidates/c1" not in firestore_db.docs
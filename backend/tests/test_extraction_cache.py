@@ -0,0 +1,83 @@
+import pytest
+from storage import extraction_cache as cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch, firestore_db):
+    monkeypatch.setattr(cache, "_local_cache", cache.TTLCache(maxsize=16, ttl=60))
+    monkeypatch.setattr(cache, "_current_versions", {"v2", "jd1"})
+    monkeypatch.setattr(cache, "stats", dict.fromkeys(cache.stats, 0))
+
+
+def put(key, sha="abc", blob="uid/doc/cv.pdf"):
+    cache.put_cached_extraction("u", key, sha, {"name": "Ann"}, f"https://a/c/{blob}", blob)
+
+
+def entry_ids(db):
+    return sorted(path.rsplit("/", 1)[-1] for path in db.docs if "/extraction_cache/" in path)
+
+
+def test_put_then_get_hits_local_then_persistent(firestore_db):
+    put("abc_v2")
+    assert cache.get_cached_extraction("u", "abc_v2")["data"] == {"name": "Ann"}
+    assert cache.stats["local_hits"] == 1
+
+    cache._local_cache.clear()
+    reads = firestore_db.reads
+    assert cache.get_cached_extraction("u", "abc_v2")["blob_name"] == "uid/doc/cv.pdf"
+    assert cache.stats["persistent_hits"] == 1
+    assert firestore_db.reads == reads + 1
+    assert cache.get_cached_extraction("u", "missing_v2") is None
+
+
+def test_put_deletes_entries_of_old_versions_only(firestore_db):
+    put("abc_v1")
+    put("abc_jd1")
+    put("other_v1", sha="other")
+    put("abc_v2")
+    # The old candidate version goes; the JD entry and other files stay
+    assert entry_ids(firestore_db) == ["abc_jd1", "abc_v2", "other_v1"]
+    assert cache.stats["stale_deleted"] == 1
+
+
+def test_drop_removes_local_and_persistent_entry(firestore_db):
+    put("abc_v2")
+    cache.drop_cached_extraction("u", "abc_v2")
+    assert entry_ids(firestore_db) == []
+    assert cache.get_cached_extraction("u", "abc_v2") is None
+    assert cache.stats["stale_blobs"] == 1
+
+
+def test_invalidate_many_by_content_hash(firestore_db):
+    put("abc_v2")
+    put("abc_jd1")
+    put("keep_v2", sha="keep")
+    assert cache.invalidate_extractions_many("u", ["abc", None, "abc"]) == 2
+    assert entry_ids(firestore_db) == ["keep_v2"]
+    assert cache.get_cached_extraction("u", "abc_v2") is None
+
+
+def test_local_entries_expire(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache, "_local_cache", cache.TTLCache(maxsize=16, ttl=60, timer=lambda: clock[0]))
+    put("abc_v2")
+    clock[0] += 61
+    # Expired locally: served from Firestore again, where a delete would show
+    assert cache.get_cached_extraction("u", "abc_v2") is not None
+    assert cache.stats["persistent_hits"] == 1
+
+
+def test_extraction_version_tracks_prompt_and_schema():
+    from pydantic import BaseModel
+
+    class A(BaseModel):
+        name: str
+
+    class B(BaseModel):
+        name: str
+        email: str
+
+    assert cache.extraction_version("p", A) == cache.extraction_version("p", A)
+    assert cache.extraction_version("p", A) != cache.extraction_version("q", A)
+    assert cache.extraction_version("p", A) != cache.extraction_version("p", B)
+    assert cache.extraction_version("p", B) in cache._current_versions
@@ -0,0 +1,71 @@
+import asyncio
+import httpx
+import pytest
+from llmservices import gateway
+
+
+class FlakyBackend:
+    # Succeeds while healthy, then fails every call with a retryable error
+    def __init__(self):
+        self.healthy = True
+        self.calls = 0
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        if not self.healthy:
+            raise httpx.ConnectError("connection refused")
+        return object()
+
+
+@pytest.fixture
+def backend(monkeypatch, fresh_metrics):
+    fake = FlakyBackend()
+    monkeypatch.setattr(gateway, "_backend", fake)
+    monkeypatch.setattr(gateway, "retry_budget", gateway.RetryBudget(0.1, 10))
+    monkeypatch.setattr(gateway, "request_bucket", gateway.TokenBucket(1e9, 1e9))
+    monkeypatch.setattr(gateway, "token_bucket", gateway.TokenBucket(1e9, 1e9))
+    monkeypatch.setattr(gateway.random, "uniform", lambda low, high: 0)
+    monkeypatch.setitem(gateway.stats, "retries", 0)
+    return fake
+
+
+async def run_calls(count: int) -> int:
+    failures = 0
+    for _ in range(count):
+        try:
+            await gateway.generate_content("hello")
+        except httpx.ConnectError:
+            failures += 1
+    return failures
+
+
+def test_retries_after_long_healthy_period_stay_bounded(backend):
+    assert asyncio.run(run_calls(10000)) == 0
+    assert gateway.stats["retries"] == 0
+
+    backend.healthy = False
+    outage_calls = 200
+    assert asyncio.run(run_calls(outage_calls)) == outage_calls
+    # At most the banked minimum plus the ratio earned during the outage
+    assert gateway.stats["retries"] <= 10 + 0.1 * outage_calls
+    assert backend.calls == 10000 + outage_calls + gateway.stats["retries"]
+
+
+def test_budget_balance_is_capped():
+    budget = gateway.RetryBudget(0.5, 3)
+    for _ in range(1000):
+        budget.deposit()
+    assert [budget.withdraw() for _ in range(4)] == [True, True, True, False]
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw() and not budget.withdraw()
+
+
+def test_non_retryable_errors_are_not_retried(backend, monkeypatch):
+    async def bad_request(model, contents, config=None):
+        raise ValueError("bad request")
+
+    monkeypatch.setattr(backend, "generate_content", bad_request)
+    with pytest.raises(ValueError):
+        asyncio.run(gateway.generate_content("hello"))
+    assert gateway.stats["retries"] == 0
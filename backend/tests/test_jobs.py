@@ -0,0 +1,127 @@
+import asyncio
+import io
+import os
+import pytest
+from starlette.datastructures import Headers, UploadFile
+from services import jobs
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, fresh_metrics):
+    monkeypatch.setattr(jobs, "JOB_DB_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(jobs, "JOB_SPOOL_DIR", str(tmp_path / "files"))
+    jobs.init_job_store()
+    return jobs
+
+
+def uploads(*contents):
+    return [
+        UploadFile(io.BytesIO(content), filename=f"f{i}.pdf", headers=Headers({"content-type": "application/pdf"}))
+        for i, content in enumerate(contents)
+    ]
+
+
+def create(*contents):
+    return asyncio.run(jobs.create_job("u", "candidate-resume", uploads(*contents)))
+
+
+def expire_leases(store):
+    conn = store._connect()
+    conn.execute("UPDATE job_files SET lease_expires_at = 0 WHERE status = 'running'")
+    conn.close()
+
+
+def test_create_job_spools_every_file(store):
+    job_id = create(b"one", b"two" * 1000)
+    job = store.get_job(job_id, "u")
+    assert (job["status"], job["total"], job["completed"]) == ("queued", 2, 0)
+    spool = os.path.join(store.JOB_SPOOL_DIR, job_id)
+    assert [open(os.path.join(spool, name), "rb").read() for name in ("0", "1")] == [b"one", b"two" * 1000]
+    assert store.get_job(job_id, "someone-else") is None
+
+
+def test_claims_are_leased_and_completed_once(store):
+    job_id = create(b"one", b"two")
+    first, second = store.claim_next_file(), store.claim_next_file()
+    assert (first["idx"], second["idx"]) == (0, 1)
+    assert store.claim_next_file() is None
+
+    store.complete_file(job_id, 0, first["lease_owner"], {"filename": "f0.pdf", "candidate_id": "c0"})
+    assert store.renew_lease(job_id, 1, second["lease_owner"])
+    store.complete_file(job_id, 1, second["lease_owner"], {"filename": "f1.pdf", "error": "unreadable"})
+    job = store.get_job(job_id, "u")
+    assert (job["status"], job["completed"]) == ("completed", 2)
+    assert [(r["status"], r.get("candidate_id"), r.get("error")) for r in job["results"]] == [
+        ("completed", "c0", None), ("failed", None, "unreadable"),
+    ]
+    assert not os.path.exists(os.path.join(store.JOB_SPOOL_DIR, job_id))
+
+
+def test_expired_lease_moves_to_another_worker(store):
+    job_id = create(b"one")
+    stalled = store.claim_next_file()
+    expire_leases(store)
+    taken_over = store.claim_next_file()
+    assert taken_over["idx"] == 0 and taken_over["lease_owner"] != stalled["lease_owner"]
+
+    # The stalled worker lost the file: it can't renew or record a result
+    assert not store.renew_lease(job_id, 0, stalled["lease_owner"])
+    store.complete_file(job_id, 0, stalled["lease_owner"], {"filename": "f0.pdf", "error": "late"})
+    assert store.get_job(job_id, "u")["completed"] == 0
+    store.complete_file(job_id, 0, taken_over["lease_owner"], {"filename": "f0.pdf", "candidate_id": "c0"})
+    assert store.get_job(job_id, "u")["results"][0]["candidate_id"] == "c0"
+
+
+def test_file_fails_after_max_attempts(store, monkeypatch):
+    monkeypatch.setattr(jobs, "MAX_ATTEMPTS", 2)
+    job_id = create(b"poison")
+    for _ in range(2):
+        assert store.claim_next_file()["idx"] == 0
+        expire_leases(store)
+    assert store.claim_next_file() is None
+
+    job = store.get_job(job_id, "u")
+    assert (job["status"], job["completed"]) == ("completed", 1)
+    assert job["results"][0]["status"] == "failed"
+    assert "after 2 attempts" in job["results"][0]["error"]
+    assert not os.path.exists(os.path.join(store.JOB_SPOOL_DIR, job_id))
+
+
+def test_purge_drops_finished_jobs_past_retention(store, monkeypatch):
+    finished = create(b"one")
+    claimed = store.claim_next_file()
+    store.complete_file(finished, 0, claimed["lease_owner"], {"filename": "f0.pdf"})
+    queued = create(b"two")
+
+    assert store.purge_finished_jobs() == 0
+    monkeypatch.setattr(jobs, "JOB_RETENTION_SECONDS", -1)
+    assert store.purge_finished_jobs() == 1
+    assert store.get_job(finished, "u") is None
+    assert store.get_job(queued, "u")["status"] == "queued"
+
+
+def test_worker_loop_processes_and_records_errors(store, monkeypatch):
+    monkeypatch.setattr(jobs, "POLL_INTERVAL_SECONDS", 0.01)
+
+    async def process(uid, upload):
+        content = await upload.read()
+        if content == b"bad":
+            raise ValueError("unreadable")
+        return {"filename": upload.filename, "size": len(content)}
+
+    monkeypatch.setitem(jobs.processors, "candidate-resume", process)
+    job_id = create(b"abc", b"bad")
+
+    async def scenario():
+        workers = jobs.start_workers(2)
+        try:
+            while store.get_job(job_id, "u")["status"] != "completed":
+                await asyncio.sleep(0.01)
+        finally:
+            await jobs.stop_workers(workers)
+
+    asyncio.run(asyncio.wait_for(scenario(), 10))
+    results = store.get_job(job_id, "u")["results"]
+    assert [(r["status"], r.get("size"), r.get("error")) for r in results] == [
+        ("completed", 3, None), ("failed", None, "unreadable"),
+    ]
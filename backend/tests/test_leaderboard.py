@@ -0,0 +1,101 @@
+import pytest
+from storage import leaderboard
+from storage.leaderboard import merge_board
+
+
+@pytest.fixture(autouse=True)
+def small_board(monkeypatch):
+    monkeypatch.setattr(leaderboard, "LEADERBOARD_SIZE", 3)
+
+
+def entry(candidate_id, score):
+    return {"candidate_id": candidate_id, "total_score": score}
+
+
+def board(entries, complete=True):
+    return {"entries": entries, "complete": complete, "size": 3}
+
+
+def ids(result):
+    return [e["candidate_id"] for e in result["entries"]]
+
+
+def test_upsert_into_complete_board_keeps_rank_order():
+    result = merge_board(board([entry("a", 90), entry("b", 50)]), [entry("c", 70)], ())
+    assert ids(result) == ["a", "c", "b"]
+    assert result["complete"]
+
+
+def test_ties_rank_by_candidate_id_descending():
+    result = merge_board(board([entry("a", 50)]), [entry("b", 50)], ())
+    assert ids(result) == ["b", "a"]
+
+
+def test_overflow_truncates_and_marks_incomplete():
+    result = merge_board(board([entry("a", 90), entry("b", 80), entry("c", 70)]), [entry("d", 85)], ())
+    assert ids(result) == ["a", "d", "b"]
+    assert not result["complete"]
+
+
+def test_rescore_replaces_existing_entry():
+    result = merge_board(board([entry("a", 90), entry("b", 80)]), [entry("a", 10)], ())
+    assert ids(result) == ["b", "a"]
+    assert result["entries"][1]["total_score"] == 10
+
+
+def test_unscored_upsert_is_dropped():
+    result = merge_board(board([entry("a", 90)]), [{"candidate_id": "a", "total_score": None}], ())
+    assert ids(result) == []
+
+
+def test_removal_from_complete_board():
+    result = merge_board(board([entry("a", 90), entry("b", 80)]), [], {"a"})
+    assert ids(result) == ["b"]
+    assert result["complete"]
+
+
+def test_truncated_board_ignores_entries_below_its_floor():
+    full = board([entry("a", 90), entry("b", 80), entry("c", 70)], complete=False)
+    assert ids(merge_board(full, [entry("d", 60)], ())) == ["a", "b", "c"]
+
+
+def test_truncated_board_needs_refill_after_removal():
+    full = board([entry("a", 90), entry("b", 80), entry("c", 70)], complete=False)
+    assert merge_board(full, [], {"a"}) is None
+
+
+def test_truncated_board_needs_refill_when_it_falls_short():
+    full = board([entry("a", 90), entry("b", 80), entry("c", 70)], complete=False)
+    # "c" drops below the floor: something off the board may now outrank it
+    assert merge_board(full, [entry("c", 10)], ()) is None
+
+
+def test_make_entry_keeps_board_fields_only():
+    data = {"name": "Ann", "total_score": 80, "skills_explanation": "long text", "email": None}
+    assert leaderboard.make_entry(data, "a") == {"name": "Ann", "total_score": 80, "candidate_id": "a"}
+
+
+def test_top_score_endpoint_reads_board_off_the_event_loop(monkeypatch):
+    import asyncio
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from firebase_config import get_current_uid
+    from routers import topscore
+
+    loops = []
+
+    def get_leaderboard(uid, jd_id):
+        loops.append(asyncio._get_running_loop())
+        return {"version": 4, "complete": True, "entries": [entry("a", 90), entry("b", 50)]}
+
+    monkeypatch.setattr(topscore, "get_leaderboard", get_leaderboard)
+    app = FastAPI()
+    app.include_router(topscore.router)
+    app.dependency_overrides[get_current_uid] = lambda: "u"
+    response = TestClient(app).get("/top-score/jd1", params={"fields": "total_score", "limit": 1})
+    assert response.status_code == 200
+    assert response.json() == {
+        "jd_id": "jd1", "top_score_candidates": [{"total_score": 90, "candidate_id": "a"}], "next_cursor": "a",
+    }
+    # Called from a worker thread, not on the event loop
+    assert loops == [None]
@@ -0,0 +1,57 @@
+import re
+
+
+def test_render_counters_histograms_and_stats(fresh_metrics):
+    metrics = fresh_metrics
+    metrics.record_firestore(reads=3, writes=1)
+    metrics.record_firestore(reads=2)
+    metrics.inc("gemini_input_tokens", 1200, model='gemini "flash"')
+    metrics.observe("stage_seconds", 0.02, stage="parse", op="extract")
+    metrics.observe("stage_seconds", 7, stage="parse", op="extract")
+    metrics.register_stats("score_cache", {"hits": 4, "misses": 1.5})
+
+    text = metrics.render()
+    lines = text.splitlines()
+    assert text.endswith("\n")
+    assert "# TYPE recruitpro_firestore_reads_total counter" in lines
+    assert "recruitpro_firestore_reads_total 5" in lines
+    assert "recruitpro_firestore_writes_total 1" in lines
+    # Label values are escaped
+    assert 'recruitpro_gemini_input_tokens_total{model="gemini \\"flash\\""} 1200' in lines
+
+    assert "# TYPE recruitpro_stage_seconds histogram" in lines
+    buckets = [line for line in lines if line.startswith("recruitpro_stage_seconds_bucket")]
+    assert len(buckets) == len(metrics.LATENCY_BUCKETS) + 1
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts)  # cumulative
+    assert 'recruitpro_stage_seconds_bucket{op="extract",stage="parse",le="0.025"} 1' in lines
+    assert 'recruitpro_stage_seconds_bucket{op="extract",stage="parse",le="+Inf"} 2' in lines
+    assert 'recruitpro_stage_seconds_count{op="extract",stage="parse"} 2' in lines
+    assert 'recruitpro_stage_seconds_sum{op="extract",stage="parse"} 7.02' in lines
+
+    assert 'recruitpro_score_cache_total{event="hits"} 4' in lines
+    assert 'recruitpro_score_cache_total{event="misses"} 1.5' in lines
+    # One HELP/TYPE pair per metric name
+    assert len([line for line in lines if line.startswith("# TYPE ")]) == len(
+        {re.match(r"# TYPE (\S+)", line).group(1) for line in lines if line.startswith("# TYPE ")}
+    )
+
+
+def test_request_totals_and_per_user_series(fresh_metrics, monkeypatch):
+    metrics = fresh_metrics
+    monkeypatch.setattr(metrics, "METRICS_PER_USER", True)
+    with metrics.track_request("job candidate-resume", "uid-1"):
+        metrics.record_firestore(reads=4, writes=2)
+        current = metrics._request.get()
+    assert current.counts["firestore_reads"] == 4
+    assert current.counts["firestore_writes"] == 2
+    text = metrics.render()
+    assert 'recruitpro_user_firestore_reads_total{uid="uid-1"} 4' in text
+    assert 'recruitpro_user_requests_total{uid="uid-1"} 1' in text
+
+
+def test_disabled_metrics_record_nothing(fresh_metrics, monkeypatch):
+    monkeypatch.setattr(fresh_metrics, "METRICS_ENABLED", False)
+    fresh_metrics.record_firestore(reads=1)
+    fresh_metrics.observe("stage_seconds", 1, stage="parse")
+    assert fresh_metrics.render() == "\n"
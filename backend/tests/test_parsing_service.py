@@ -0,0 +1,113 @@
+import asyncio
+import io
+import os
+import time
+import pytest
+from services import parsing_service
+
+
+def _fake_worker_main(conn, limit_mb):
+    # Stands in for the real parser in the spawned process: b"hang" never
+    # answers, b"crash" kills the process, b"fail" raises, anything else is echoed
+    conn.send(("ready", None))
+    while True:
+        try:
+            data, filename, content_type = parsing_service._recv_document(conn)
+        except EOFError:
+            return
+        if data == b"hang":
+            time.sleep(3600)
+        elif data == b"crash":
+            os._exit(1)
+        elif data == b"fail":
+            conn.send(("error", ValueError(f"cannot read {filename}")))
+        else:
+            conn.send(("ok", f"{os.getpid()}:{data.decode()}"))
+
+
+@pytest.fixture
+def pool(monkeypatch, fresh_metrics):
+    monkeypatch.setattr(parsing_service, "_worker_main", _fake_worker_main)
+    monkeypatch.setattr(parsing_service, "PARSER_WORKERS", 2)
+    monkeypatch.setattr(parsing_service, "PARSE_TIMEOUT_SECONDS", 1.0)
+    monkeypatch.setattr(parsing_service, "_idle", None)
+    yield parsing_service
+    parsing_service.shutdown_parser_pool()
+
+
+@pytest.fixture
+def killed(monkeypatch):
+    # Processes stopped by parse_document, in order
+    processes = []
+    kill = parsing_service._Worker.kill
+    monkeypatch.setattr(parsing_service._Worker, "kill", lambda worker: (processes.append(worker.process), kill(worker)))
+    return processes
+
+
+def pid(text):
+    return int(text.split(":")[0])
+
+
+def test_timeout_kills_only_its_own_process(pool, killed):
+    async def scenario():
+        second, hung = await asyncio.gather(
+            pool.parse_document(b"b", "b.pdf"),
+            pool.parse_document(b"hang", "slow.pdf"),
+            return_exceptions=True,
+        )
+        after = await asyncio.gather(*(pool.parse_document(b"c", "c.pdf") for _ in range(2)))
+        return second, hung, after
+
+    second, hung, after = asyncio.run(scenario())
+    assert isinstance(hung, RuntimeError) and "slow.pdf timed out" in str(hung)
+    assert second.endswith(":b")
+    [process] = killed
+    assert not process.is_alive()
+    # The other process kept its slot and is reused; the killed one is replaced
+    assert pid(second) in {pid(text) for text in after}
+    assert process.pid not in {pid(text) for text in after}
+
+
+def test_files_are_streamed_in_chunks(pool, monkeypatch):
+    monkeypatch.setattr(pool, "SEND_CHUNK_SIZE", 4)
+    spooled = io.BytesIO(b"resume text " * 10)
+    spooled.seek(7)
+
+    async def scenario():
+        return [await pool.parse_document(spooled, "cv.txt") for _ in range(2)]
+
+    # Read from the start every time, not from the caller's position
+    assert [text.split(":", 1)[1] for text in asyncio.run(scenario())] == ["resume text " * 10] * 2
+
+
+def test_crashed_process_is_retried_once(pool):
+    async def scenario():
+        with pytest.raises(RuntimeError, match="crashed while reading cv.pdf"):
+            await pool.parse_document(b"crash", "cv.pdf")
+        return await pool.parse_document(b"ok", "ok.pdf")
+
+    assert asyncio.run(scenario()).endswith(":ok")
+
+
+def test_parser_errors_are_raised(pool):
+    async def scenario():
+        with pytest.raises(ValueError, match="cannot read cv.docx"):
+            await pool.parse_document(b"fail", "cv.docx")
+        return await pool.parse_document(b"next", "next.pdf")
+
+    assert asyncio.run(scenario()).endswith(":next")
+
+
+def test_cancelled_parse_kills_its_process(pool, killed):
+    async def scenario():
+        task = asyncio.create_task(pool.parse_document(b"hang", "slow.pdf"))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await pool.parse_document(b"next", "next.pdf")
+
+    assert asyncio.run(scenario()).endswith(":next")
+    # The hung process is gone, not left parsing in the background
+    [process] = killed
+    assert not process.is_alive()
@@ -0,0 +1,103 @@
+import asyncio
+import gc
+import weakref
+import pytest
+from services import pipeline
+
+
+class Result:
+    def __init__(self, index):
+        self.index = index
+
+
+async def process(index):
+    await asyncio.sleep(0.001 * (index % 5))
+    if index == 3:
+        raise RuntimeError("bad file")
+    return Result(index)
+
+
+def test_iter_pipeline_yields_every_item_once():
+    async def collect():
+        return [(index, result) async for index, result in pipeline.iter_pipeline(range(10), process, max_in_flight=3)]
+
+    results = asyncio.run(collect())
+    assert sorted(index for index, _ in results) == list(range(10))
+    assert dict(results)[3] == {"error": "bad file"}
+
+
+def test_iter_pipeline_does_not_keep_consumed_results():
+    refs = []
+
+    async def consume():
+        alive = []
+        gate = asyncio.Event()
+
+        async def slow_last(index):
+            if index == 19:
+                await gate.wait()
+            result = Result(index)
+            refs.append(weakref.ref(result))
+            return result
+
+        consumed = set()
+        async for index, result in pipeline.iter_pipeline(range(20), slow_last, max_in_flight=20):
+            consumed.add(index)
+            del result
+            gc.collect()
+            alive.append(sum(1 for ref in refs if ref() is not None and ref().index in consumed))
+            if len(consumed) == 19:
+                gate.set()
+        return alive
+
+    alive = asyncio.run(consume())
+    # A result is released once it has been yielded and the consumer dropped it
+    assert alive == [0] * 20
+
+
+def test_iter_pipeline_cancels_pending_work_when_closed():
+    started, cancelled = [], []
+
+    async def slow(index):
+        started.append(index)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+
+    async def run():
+        async def fast_first(index):
+            return "first" if index == 0 else await slow(index)
+
+        stream = pipeline.iter_pipeline(range(4), fast_first, max_in_flight=4)
+        assert (await stream.__anext__()) == (0, "first")
+        await stream.aclose()
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert sorted(cancelled) == sorted(started) == [1, 2, 3]
+
+
+def test_run_pipeline_keeps_input_order():
+    results = asyncio.run(pipeline.run_pipeline(range(6), process, max_in_flight=2))
+    assert [getattr(r, "index", None) for r in results] == [0, 1, 2, None, 4, 5]
+    assert results[3] == {"error": "bad file"}
+
+
+def test_run_stage_caps_concurrency(monkeypatch, fresh_metrics):
+    monkeypatch.setitem(pipeline.stage_limits, "gemini", asyncio.Semaphore(2))
+    in_flight, peak = [0], [0]
+
+    async def call():
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+
+    async def run():
+        await asyncio.gather(*(pipeline.run_stage("gemini", call) for _ in range(8)))
+
+    asyncio.run(run())
+    assert peak[0] == 2
+    assert "recruitpro_stage_wait_seconds_count" in fresh_metrics.render()
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from services import prerank
+
+
+def vector(terms):
+    return {"version": prerank.TERM_VECTOR_VERSION, "length": sum(terms.values()), "terms": terms}
+
+
+def test_bm25_empty_inputs():
+    assert prerank.bm25_scores({}, [vector({"python": 1.0})]).tolist() == [0.0]
+    assert prerank.bm25_scores({"python": 1.0}, []).tolist() == []
+
+
+def test_bm25_matches_reference_formula():
+    query = {"python": 3.0, "aws": 1.0}
+    vectors = [vector({"python": 3.0, "java": 1.0}), vector({"aws": 1.0}), vector({"go": 2.0})]
+    scores = prerank.bm25_scores(query, vectors)
+
+    n, avg = len(vectors), np.mean([v["length"] for v in vectors])
+    expected = []
+    for v in vectors:
+        total = 0.0
+        for term, weight in query.items():
+            tf = v["terms"].get(term, 0.0)
+            df = sum(1 for other in vectors if other["terms"].get(term))
+            idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+            norm = prerank.BM25_K1 * (1 - prerank.BM25_B + prerank.BM25_B * v["length"] / avg)
+            total += weight * idf * tf * (prerank.BM25_K1 + 1) / (tf + norm)
+        expected.append(total)
+    assert scores == pytest.approx(expected)
+    assert scores[2] == 0
+
+
+def test_rare_term_outweighs_common_term():
+    query = {"python": 1.0, "rust": 1.0}
+    vectors = [vector({"python": 1.0, "rust": 1.0})] + [vector({"python": 1.0, "java": 1.0})] * 5
+    vectors.append(vector({"rust": 1.0, "java": 1.0}))
+    scores = prerank.bm25_scores(query, vectors)
+    assert scores[-1] > scores[1]
+
+
+def test_candidate_vector_weights_fields():
+    candidate = {"technical_skills": ["Python"], "professional_summary": "Built python services"}
+    terms = prerank.candidate_term_vector(candidate)["terms"]
+    assert terms["python"] == prerank.CANDIDATE_FIELD_WEIGHTS["technical_skills"] + 1.0
+    assert "services" in terms
+
+
+def test_rank_and_prerank_candidates():
+    jd = {"required_skills": ["Kubernetes", "Go"], "jobtitle": "Platform engineer"}
+    candidates = [
+        {"candidate_id": "web", "technical_skills": ["React", "CSS"]},
+        {"candidate_id": "platform", "technical_skills": ["k8s", "golang"], "designation": "Platform engineer"},
+        {"candidate_id": "half", "technical_skills": ["Go"]},
+    ]
+    ranked = [c["candidate_id"] for c in prerank.rank_candidates(jd, candidates)]
+    assert ranked == ["platform", "half", "web"]
+    assert [c["candidate_id"] for c in prerank.prerank_candidates(jd, candidates, top_n=2)] == ["platform", "half"]
+    # Pools within the cutoff (or a disabled cutoff) pass through unchanged
+    assert prerank.prerank_candidates(jd, candidates, top_n=5) == candidates
+    assert prerank.prerank_candidates(jd, candidates, top_n=0) == candidates
+
+
+def test_stored_vector_of_another_version_is_recomputed():
+    candidate = {"technical_skills": ["Go"], "term_vector": {"version": -1, "length": 1, "terms": {"java": 1.0}}}
+    assert "go" in prerank._term_vector(candidate)["terms"]
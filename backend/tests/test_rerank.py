@@ -0,0 +1,48 @@
+import pytest
+from services import rerank
+
+STATUS = "users/u/rerank_jobs/latest"
+
+
+@pytest.fixture
+def seeded(firestore_db, monkeypatch):
+    rebuilt = []
+    monkeypatch.setattr(rerank, "rebuild_leaderboards", lambda uid, jd_ids: rebuilt.append(jd_ids))
+    firestore_db.document("users/u/score_weights/senior_engineer").set({
+        "role": "senior_engineer",
+        "weights": {"skills": 50, "experience": 50, "education": 0, "certifications": 0},
+    })
+    for jd_id, candidate_id, total in (("jd1", "c1", 80.0), ("jd1", "c2", 10.0), ("jd2", "c1", 10.0)):
+        firestore_db.document(f"users/u/top_score/{jd_id}/candidates/{candidate_id}").set({
+            "profile_type": "senior_engineer", "skills_score": 80, "experience_score": 80,
+            "education_score": 20, "certifications_score": 20, "total_score": total,
+        })
+    return rebuilt
+
+
+def test_rerank_writes_changed_totals(firestore_db, seeded):
+    report = rerank.rerank_user_scores("u")
+    assert report == {"status": "completed", "scanned": 3, "changed": 2, "written": 2}
+    assert firestore_db.docs["users/u/top_score/jd1/candidates/c2"]["total_score"] == 80.0
+    assert seeded == [["jd1", "jd2"]]
+    assert firestore_db.docs[STATUS]["status"] == "completed"
+
+
+def test_failed_write_marks_the_run_failed(firestore_db, seeded):
+    firestore_db.fail_commits = 1
+    with pytest.raises(RuntimeError):
+        rerank.rerank_user_scores("u")
+    status = firestore_db.docs[STATUS]
+    assert (status["status"], status["error"], status["written"]) == ("failed", "commit failed", 0)
+    assert seeded == []
+
+
+def test_failed_leaderboard_rebuild_marks_the_run_failed(firestore_db, seeded, monkeypatch):
+    def rebuild(uid, jd_ids):
+        raise RuntimeError("transaction aborted")
+
+    monkeypatch.setattr(rerank, "rebuild_leaderboards", rebuild)
+    with pytest.raises(RuntimeError):
+        rerank.rerank_user_scores("u")
+    status = firestore_db.docs[STATUS]
+    assert (status["status"], status["error"], status["written"]) == ("failed", "transaction aborted", 2)
@@ -0,0 +1,43 @@
+import pytest
+from services.responses import _matches, _tag_header, choose_encoding, make_etag
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("br", "br"),
+    ("gzip, br", "br"),
+    ("gzip;q=1, br;q=0.5", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("BR, GZIP", "br"),
+    ("*", "br"),
+    ("*;q=0.1, gzip;q=0.2", "gzip"),
+    ("*, br;q=0", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("gzip;q=oops", None),
+    (" gzip ; q=0.8 , deflate", "gzip"),
+])
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header) == expected
+
+
+def test_etag_depends_on_every_part():
+    assert make_etag("u", "candidates", 3) == make_etag("u", "candidates", 3)
+    assert make_etag("u", "candidates", 3) != make_etag("u", "candidates", 4)
+    assert make_etag("u", "candidates", 3, None) != make_etag("u", "candidates", 3, "None ")
+
+
+@pytest.mark.parametrize("encoding", [None, "gzip", "br"])
+def test_matches_any_coding_of_the_same_version(encoding):
+    etag = make_etag("u", 1)
+    assert _matches(_tag_header(etag, encoding), etag)
+    assert _matches("W/" + _tag_header(etag, encoding), etag)
+
+
+def test_matches_lists_and_wildcard():
+    etag = make_etag("u", 1)
+    assert _matches(f'"other", "{etag}-br"', etag)
+    assert _matches("*", etag)
+    assert not _matches('"other", "other-gzip"', etag)
+    assert not _matches(f'"{make_etag("u", 2)}"', etag)
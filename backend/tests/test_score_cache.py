@@ -0,0 +1,27 @@
+import asyncio
+from llmservices import score_cache, topscore_gemini
+
+
+def test_score_cache_ignores_jd_storage_fields(monkeypatch):
+    calls = []
+
+    async def scoring_batch(job_json, batch, gate):
+        calls.append([candidate_id for candidate_id, _ in batch])
+        return {candidate_id: {"candidate_id": candidate_id, "skills_score": 70} for candidate_id, _ in batch}
+
+    monkeypatch.setattr(topscore_gemini, "_score_batch", scoring_batch)
+    monkeypatch.setattr(score_cache, "_cache", score_cache.TTLCache(maxsize=100, ttl=60))
+    jd = {"jobtitle": "Backend engineer", "required_skills": ["Go"]}
+    candidate = {"candidate_id": "c1", "name": "Ann", "technical_skills": ["Go"]}
+
+    first = {**jd, "jd_id": "jd-1", "jd_url": "https://a/c/u/jd-1/jd.pdf", "blob_name": "u/jd-1/jd.pdf"}
+    again = {**jd, "jd_id": "jd-2", "jd_url": "https://a/c/u/jd-2/jd.pdf", "blob_name": "u/jd-2/jd.pdf",
+             "created_at": "2025-01-01"}
+    asyncio.run(topscore_gemini.analyze_multiple_resumes_structured(first, [candidate]))
+    results = asyncio.run(topscore_gemini.analyze_multiple_resumes_structured(again, [candidate]))
+    assert calls == [["c1"]]
+    assert results[0]["skills_score"] == 70
+
+    changed = {**again, "required_skills": ["Go", "Kubernetes"]}
+    asyncio.run(topscore_gemini.analyze_multiple_resumes_structured(changed, [candidate]))
+    assert len(calls) == 2
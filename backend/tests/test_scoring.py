@@ -0,0 +1,87 @@
+import pytest
+from cachetools import TTLCache
+from services import scoring
+
+WEIGHTS = {
+    "fresher": {"skills": 40, "education": 30, "certifications": 20, "experience": 10},
+    "senior_engineer": {"skills": 30, "education": 20, "certifications": 10, "experience": 40},
+}
+
+
+class FakeDoc:
+    def __init__(self, role, weights):
+        self.id = role
+        self._data = {"role": role, "weights": weights}
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeDb:
+    # db.collection("users").document(uid).collection("score_weights").stream()
+    def __init__(self, weights):
+        self.weights = weights
+        self.streams = 0
+
+    def collection(self, name):
+        return self
+
+    def document(self, name):
+        return self
+
+    def stream(self):
+        self.streams += 1
+        return [FakeDoc(role, weights) for role, weights in self.weights.items()]
+
+
+@pytest.fixture
+def fake_db(monkeypatch, fresh_metrics):
+    db = FakeDb(WEIGHTS)
+    monkeypatch.setattr(scoring, "db", db)
+    monkeypatch.setattr(scoring, "_weights_cache", TTLCache(maxsize=10, ttl=60))
+    monkeypatch.setitem(scoring.stats, "weight_reads", 0)
+    return db
+
+
+def candidate(profile_type="senior_engineer", score=80):
+    return {
+        "profile_type": profile_type,
+        "skills_score": score,
+        "experience_score": score,
+        "education_score": score,
+        "certifications_score": score,
+    }
+
+
+def test_batch_scoring_loads_weights_once(fake_db, fresh_metrics):
+    with fresh_metrics.track_request("test", "u1"):
+        results = scoring.calculate_total_scores([candidate() for _ in range(100)], "u1")
+        reads = fresh_metrics._request.get().counts["firestore_reads"]
+    assert len(results) == 100
+    assert fake_db.streams == 1
+    assert scoring.stats["weight_reads"] == 1
+    # One document per profile type, not one read per candidate
+    assert reads == len(WEIGHTS)
+
+
+def test_cached_weights_until_invalidated(fake_db):
+    scoring.calculate_total_scores([candidate()], "u1")
+    scoring.calculate_total_score(candidate("fresher"), "u1")
+    assert fake_db.streams == 1
+
+    scoring.invalidate_user_weights("u1")
+    scoring.calculate_total_scores([candidate()], "u1")
+    assert fake_db.streams == 2
+
+
+def test_total_score_uses_normalized_weights(fake_db):
+    result = scoring.calculate_total_score(
+        {"profile_type": "fresher", "skills_score": 100, "education_score": 50}, "u1"
+    )
+    assert result["total_score"] == 55.0
+    assert result["breakdown"]["skills"] == {"score": 100, "weight": 0.4, "weighted": 40.0}
+
+
+def test_unknown_profile_type_is_an_error(fake_db):
+    with pytest.raises(ValueError):
+        scoring.calculate_total_scores([candidate("principal")], "u1")
@@ -0,0 +1,36 @@
+import pytest
+from services.skills import count_overlaps, normalize_skill, normalize_skills
+
+
+@pytest.mark.parametrize("skill, expected", [
+    ("Python", "python"),
+    ("  Python 3 ", "python"),
+    ("Python3.11", "python"),
+    ("Java-8", "java"),
+    ("Angular v15", "angular"),
+    ("HTML5", "html"),
+    ("ReactJS", "react"),
+    ("React.js", "react"),
+    ("k8s", "kubernetes"),
+    ("Machine   Learning", "machine learning"),
+    ("ML", "machine learning"),
+    ("C#", "c#"),
+    ("C++", "c++"),
+    ("Node", "node.js"),
+    ("AWS,", "aws"),
+    ("", ""),
+    (None, ""),
+    (42, ""),
+])
+def test_normalize_skill(skill, expected):
+    assert normalize_skill(skill) == expected
+
+
+def test_normalize_skills_dedupes_and_drops_empty():
+    assert normalize_skills(["Python", "py", "python 3", "", None]) == {"python"}
+    assert normalize_skills(None) == set()
+
+
+def test_count_overlaps():
+    postings = {"python": ["a", "b"], "aws": ["b"], "go": ["c"]}
+    assert count_overlaps(postings, ["Python", "AWS", "Rust"]) == {"a": 1, "b": 2}
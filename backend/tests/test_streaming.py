@@ -0,0 +1,105 @@
+import io
+import json
+import pytest
+from fastapi import FastAPI, Request, UploadFile
+from fastapi.testclient import TestClient
+from services import streaming
+from services.pipeline import iter_pipeline
+
+
+def parse_ndjson(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def parse_sse(text):
+    events = []
+    for frame in text.strip().split("\n\n"):
+        event, data = frame.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    uploads = []
+
+    @app.post("/results")
+    async def results(request: Request, files: list[UploadFile]):
+        detached = await streaming.detach_uploads(files)
+        uploads.extend(detached)
+
+        async def process(upload):
+            content = await upload.read()
+            if content == b"bad":
+                raise ValueError("unreadable")
+            return {"filename": upload.filename, "size": len(content)}
+
+        def on_error(upload, error):
+            return {"filename": upload.filename, "error": str(error)}
+
+        media_type = streaming.negotiate_stream(request)
+        results = iter_pipeline(detached, process, on_error=on_error)
+        return streaming.stream_results(media_type, results, detached, {"batch": "b1"})
+
+    @app.get("/events")
+    async def events(request: Request, fail: bool = False):
+        async def progress():
+            yield {"phase": "loaded", "found": 2}
+            if fail:
+                raise RuntimeError("lost connection")
+            yield {"phase": "done", "deleted": 2}
+
+        return streaming.stream_events(streaming.negotiate_stream(request), progress())
+
+    test_client = TestClient(app)
+    test_client.uploads = uploads
+    return test_client
+
+
+def files(*contents):
+    return [("files", (f"f{i}.pdf", io.BytesIO(content), "application/pdf")) for i, content in enumerate(contents)]
+
+
+def test_negotiate_stream():
+    def request(accept):
+        return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+    assert streaming.negotiate_stream(request("application/x-ndjson")) == streaming.NDJSON
+    assert streaming.negotiate_stream(request("text/event-stream")) == streaming.SSE
+    assert streaming.negotiate_stream(request("application/json")) is None
+
+
+def test_ndjson_streams_each_result_then_done(client):
+    response = client.post("/results", files=files(b"abc", b"bad", b"x" * 2048),
+                           headers={"accept": streaming.NDJSON})
+    assert response.headers["content-type"].startswith(streaming.NDJSON)
+    lines = parse_ndjson(response.text)
+    assert sorted((line["index"], line.get("size"), line.get("error")) for line in lines[:-1]) == [
+        (0, 3, None), (1, None, "unreadable"), (2, 2048, None),
+    ]
+    assert lines[-1] == {"batch": "b1", "status": "completed", "total": 3}
+    # The detached copies outlive the request's files and are closed by the stream
+    assert client.uploads and all(upload.file.closed for upload in client.uploads)
+
+
+def test_sse_frames(client):
+    response = client.post("/results", files=files(b"abc"), headers={"accept": streaming.SSE})
+    assert parse_sse(response.text) == [
+        ("result", {"index": 0, "filename": "f0.pdf", "size": 3}),
+        ("done", {"batch": "b1", "status": "completed", "total": 1}),
+    ]
+
+
+def test_events_end_with_done(client):
+    response = client.get("/events", headers={"accept": streaming.NDJSON})
+    assert parse_ndjson(response.text) == [{"phase": "loaded", "found": 2}, {"phase": "done", "deleted": 2}]
+
+
+def test_events_error_ends_the_stream_with_done(client):
+    response = client.get("/events", params={"fail": True}, headers={"accept": streaming.SSE})
+    assert response.status_code == 200
+    assert parse_sse(response.text) == [
+        ("progress", {"phase": "loaded", "found": 2}),
+        ("done", {"phase": "done", "errors": [{"phase": "stream", "error": "lost connection"}]}),
+    ]
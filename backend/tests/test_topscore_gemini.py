@@ -0,0 +1,60 @@
+import pytest
+from llmservices import topscore_gemini
+from llmservices.topscore_gemini import plan_batches
+
+
+def items(sizes):
+    return [(f"c{i}", "x" * size) for i, size in enumerate(sizes)]
+
+
+def flat(batches):
+    return [candidate_id for batch in batches for candidate_id, _ in batch]
+
+
+def test_empty_input():
+    assert plan_batches("{}", []) == []
+
+
+def test_small_candidates_share_one_batch():
+    batches = plan_batches("{}", items([100] * 5))
+    assert len(batches) == 1
+    assert flat(batches) == [f"c{i}" for i in range(5)]
+
+
+def test_output_budget_caps_candidates_per_batch(monkeypatch):
+    monkeypatch.setattr(topscore_gemini, "BATCH_OUTPUT_TOKENS", 1000)
+    monkeypatch.setattr(topscore_gemini, "OUTPUT_TOKENS_PER_CANDIDATE", 300)
+    batches = plan_batches("{}", items([10] * 7))
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert flat(batches) == [f"c{i}" for i in range(7)]
+
+
+def test_input_budget_splits_and_keeps_order(monkeypatch):
+    base = topscore_gemini.SCORING_PREFIX.tokens + topscore_gemini.estimate_tokens(
+        topscore_gemini.SCORING_PAYLOAD_TEMPLATE) + topscore_gemini.estimate_tokens("{}")
+    monkeypatch.setattr(topscore_gemini, "BATCH_INPUT_TOKENS", base + 300)
+    # ~250 tokens each: two never fit together
+    batches = plan_batches("{}", items([1000, 1000, 1000]))
+    assert [len(batch) for batch in batches] == [1, 1, 1]
+
+
+def test_oversized_candidate_gets_its_own_batch(monkeypatch):
+    monkeypatch.setattr(topscore_gemini, "BATCH_INPUT_TOKENS", 10)
+    batches = plan_batches("{}", items([100, 40000, 100]))
+    assert [flat([batch]) for batch in batches] == [["c0"], ["c1"], ["c2"]]
+
+
+@pytest.mark.parametrize("error, sends", [(ValueError("not a JSON list"), 7), (RuntimeError("429"), 1)])
+def test_fallback_bisects_parse_errors_only(monkeypatch, error, sends):
+    import asyncio
+    calls = []
+
+    async def failing_batch(job_json, batch, gate):
+        calls.append(len(batch))
+        raise error
+
+    monkeypatch.setattr(topscore_gemini, "_score_batch", failing_batch)
+    monkeypatch.setattr(topscore_gemini, "BATCH_ATTEMPTS", 1)
+    results = asyncio.run(topscore_gemini._score_with_fallback("{}", items([10] * 4), asyncio.Semaphore(4)))
+    assert len(calls) == sends
+    assert all("error" in result for result in results.values()) and len(results) == 4
@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from firebase_config import get_current_uid
+from routers import candidates
+from storage import pagination, versions
+from storage.firestore import set_document, upsert_documents
+from storage.versions import get_version, version_write
+
+
+def test_document_and_version_land_together(firestore_db):
+    ref = firestore_db.document("users/u/candidates/c1")
+    firestore_db.fail_commits = 1
+    with pytest.raises(RuntimeError):
+        set_document(ref, {"name": "Ann"}, version_write("u", "candidates"))
+    assert firestore_db.docs == {}
+
+    set_document(ref, {"name": "Ann"}, version_write("u", "candidates"))
+    assert firestore_db.docs[ref.path] == {"name": "Ann"}
+    assert get_version("u", "candidates") == 1
+
+
+def test_every_write_batch_carries_the_version(firestore_db):
+    refs = [firestore_db.document(f"users/u/candidates/c{i}") for i in range(5)]
+    upsert_documents([(ref, {"n": 1}) for ref in refs], batch_size=2, version=version_write("u", "candidates"))
+    assert firestore_db.commits == 3
+    # The counter is opaque: any change to it invalidates the old tags
+    assert get_version("u", "candidates") == 3
+
+
+@pytest.fixture
+def client(firestore_db):
+    app = FastAPI()
+    app.include_router(candidates.router)
+    app.dependency_overrides[get_current_uid] = lambda: "u"
+    return TestClient(app)
+
+
+def test_list_revalidates_against_the_version(client, firestore_db, monkeypatch):
+    loops = []
+    for module, name, func in ((candidates, "get_version", versions.get_version),
+                               (candidates, "fetch_page", pagination.fetch_page)):
+        def off_loop(*args, func=func):
+            loops.append(asyncio._get_running_loop())
+            return func(*args)
+        monkeypatch.setattr(module, name, off_loop)
+
+    set_document(firestore_db.document("users/u/candidates/c1"), {"name": "Ann"}, version_write("u", "candidates"))
+    first = client.get("/candidate-resumes")
+    assert [c["name"] for c in first.json()["candidates"]] == ["Ann"]
+    etag = first.headers["etag"]
+    assert client.get("/candidate-resumes", headers={"if-none-match": etag}).status_code == 304
+
+    set_document(firestore_db.document("users/u/candidates/c2"), {"name": "Bo"}, version_write("u", "candidates"))
+    changed = client.get("/candidate-resumes", headers={"if-none-match": etag})
+    assert changed.status_code == 200 and len(changed.json()["candidates"]) == 2
+    # Version and page reads run in worker threads, not on the event loop
+    assert loops and set(loops) == {None}
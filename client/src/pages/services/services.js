@@ -158,6 +158,13 @@ export const deleteJobDescription = async (jd_id) => {
 
   return response.data;
 };
+// Fields shown on the top matches page, all kept on the JD's leaderboard
+const TOP_SCORE_FIELDS = [
+  "candidate_id", "name", "designation", "email", "contact", "location", "experience",
+  "education", "total_score", "score_breakdown", "skills_matched", "key_achievements",
+  "key_strengths", "resume_url",
+].join(",");
+
 export const getTopScoreCandidates = async (jd_id) => {
   const auth = getAuth();
   const user = auth.currentUser;
@@ -167,6 +174,8 @@ export const getTopScoreCandidates = async (jd_id) => {
   const idToken = await user.getIdToken();
 
   const response = await axios.get(`${API_BASE}/api/top-score/${jd_id}`, {
+    // Leaderboard fields only: the first page is then one document read
+    params: { fields: TOP_SCORE_FIELDS },
     headers: {
       Authorization: `Bearer ${idToken}`,
     },